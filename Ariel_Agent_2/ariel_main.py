@@ -129,6 +129,7 @@ class ArielAgentNode(discord.Client):
                                 payload = {
                                     "messages": [{"role": "user", "content": f"請執行任務：{title}"}],
                                     "agent_id": self.agent_id,
+                                    "priority": job.get('priority', 'medium'),
                                     "origin": "kanban_poller"  # 🔒 避免 Bridge 建立重複任務
                                 }
                                 result_log = "❌ 未知錯誤"
@@ -15,13 +15,15 @@ import json, datetime, shutil, subprocess, queue, threading, uuid, re, time, log
 from pathlib import Path
 
 # ── Flask ─────────────────────────────────────────────────────────────────────
-from flask import Flask, request, jsonify, Response
+from flask import Flask, request, jsonify, Response, g
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 # ── ArielOS 模組 ──────────────────────────────────────────────────────────────
 from modules.config import (
     BASE_DIR, CACHE_PATH, KANBAN_DB_PATH,
     OLLAMA_API, CEREBELLUM_MODEL, INTENT_MODEL, CEREBELLUM_FALLBACK_MODEL, DISPATCHER_MODEL,
-    log, ollama_post, IDLE_THRESHOLD, ROUTINES_PATH
+    log, ollama_post, IDLE_THRESHOLD, ROUTINES_PATH, FRONTEND_POOL_WORKERS, CHAT_DEBUG_HEADERS,
+    BRAIN_WORKERS
 )
 from modules.harness import Shield, Harness, AuditLogger
 from modules.personality import (
@@ -30,14 +32,22 @@ from modules.personality import (
 )
 from modules.cerebellum import (
     cerebellum_call, _cached_cerebellum_simple, _set_cerebellum_simple_cache,
-    cerebellum_semantic_check, cerebellum_style_transfer, cerebellum_skill_handler,
-    cerebellum_fast_track_check, cerebellum_distill_context,
-    analyze_task_intent, update_cache, search_web_worker
+    cerebellum_semantic_lookup, cerebellum_style_transfer, cerebellum_skill_handler,
+    cerebellum_classify_intent, cerebellum_fast_track_execute,
+    cerebellum_distill_context,
+    analyze_task_intent, update_cache, search_web_worker, cerebellum_stats
 )
 from modules.evolution import (
     generate_evolution_directive, get_evolution_context,
     perform_night_distillation, trigger_curiosity_idea, scheduler_worker
 )
+from modules.circuit_breaker import BREAKERS
+from modules.warmup import WARMUP, default_warmup_tasks
+from modules.latency_tracker import LATENCY
+from modules.reflex_engine import REFLEX
+from modules.metrics import METRICS, KNOWN_PATHS
+from modules.routine_warmer import ROUTINE_WARMER
+from modules.task_queue import BrainTaskQueue, PRIORITY_LEVELS
 from modules.vector_memory import VM  # 向量記憶層 (ChromaDB + sentence-transformers)
 from skill_manager import SkillManager
 from memory_manager import MemoryManager
@@ -48,7 +58,15 @@ logging.getLogger("primp").setLevel(logging.ERROR)
 # ── Flask App ─────────────────────────────────────────────────────────────────
 app = Flask(__name__)
 logging.getLogger('werkzeug').setLevel(logging.ERROR)
-task_queue: queue.Queue = queue.Queue()
+_WORKSPACE_GUARD = Harness(BASE_DIR)
+
+
+def _workspace_key(task: dict):
+    """寫入任務以工作區路徑互斥 (同一工作區不會同時有兩個檢查點/回滾)；唯讀任務不互斥"""
+    return str(_WORKSPACE_GUARD.workspace) if _WORKSPACE_GUARD.needs_checkpoint(task.get('content', '')) else None
+
+
+task_queue = BrainTaskQueue(exclusive_key=_workspace_key)
 task_results: dict = {}
 
 # ── 初始化全域實例 ────────────────────────────────────────────────────────────
@@ -123,28 +141,107 @@ last_activity_time_ref = [time.time()]  # 使用 list 以便跨函式修改
 def _spinal_chord_reflex(query: str, agent_id: str):
     return spinal_chord_reflex(query, agent_id, AGENT_REGISTRY, PE, SM)
 
-def _cerebellum_style_transfer(raw_answer: str, agent_id: str):
-    return cerebellum_style_transfer(raw_answer, agent_id, AGENT_REGISTRY, PE)
+def _cerebellum_style_transfer(raw_answer: str, agent_id: str, priority: str = "brain"):
+    return cerebellum_style_transfer(raw_answer, agent_id, AGENT_REGISTRY, PE, priority=priority)
+
+def _cerebellum_classify_intent(query: str, agent_id: str = None, llm_gate=None, priority: str = "interactive"):
+    return cerebellum_classify_intent(query, agent_id or "unknown", AGENT_REGISTRY, PE, SM, llm_gate=llm_gate,
+                                      priority=priority)
 
-def _cerebellum_fast_track_check(query: str, agent_id: str = None, **kwargs):
-    return cerebellum_fast_track_check(query, agent_id or "unknown", AGENT_REGISTRY, PE, SM, **kwargs)
+def _cerebellum_fast_track_execute(query: str, intent: tuple, agent_id: str = None, stream: bool = False,
+                                   priority: str = "interactive", **kwargs):
+    return cerebellum_fast_track_execute(query, intent, agent_id or "unknown", AGENT_REGISTRY, PE, SM, stream=stream,
+                                         priority=priority, **kwargs)
 
 def _cerebellum_skill_handler(query: str, skill_desc: str, agent_id: str):
     return cerebellum_skill_handler(query, skill_desc, agent_id, SM, AGENT_REGISTRY, PE)
 
+# ── 前端推測管線：語意快取 ∥ 意圖分類 ───────────────────────────────────────
+_FRONTEND_POOL = ThreadPoolExecutor(max_workers=FRONTEND_POOL_WORKERS, thread_name_prefix="frontend")
+
+def _timed(timings: dict, name: str, fn, *args):
+    def run():
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            timings[name] = (time.perf_counter() - started) * 1000
+    return run
+
+def _speculative_front_end(user_input: str, agent_id: str, timings: dict):
+    """⚡ 語意快取查詢與意圖分類同時進行，先得到「決定性」結果者勝出
+
+    決定性結果：快取命中、分類為 SIMPLE (分類時已產生答案)。
+    SEARCH / SKILL 等需要實際執行的分類要等快取確定未命中才採用，避免白跑搜尋。
+    分類的 CPU 階段 (關鍵字前哨、CPU 分類器) 與快取查詢並行；需要呼叫 INTENT_MODEL 時先等快取結果，
+    命中就放棄分類，不佔 LLM_SCHEDULER 名額 (見 _intent_llm_gate)。
+    回傳 (cached, cache_source, intent)：cached 為快取答案或 None，
+    cache_source 為命中途徑 (simple_cache / semantic_cache / cpu_ultra_hit)；intent 為分類結果或 None。
+    """
+    cache_future = _FRONTEND_POOL.submit(_timed(timings, "semantic_cache", cerebellum_semantic_lookup, user_input))
+
+    def _intent_llm_gate():
+        # 快取查詢先於分類送進 FIFO 執行緒池，分類執行到這裡時快取查詢必定已開始，等待不會卡死
+        try:
+            return not cache_future.result()[0]
+        except Exception:
+            return True
+
+    intent_future = _FRONTEND_POOL.submit(_timed(timings, "intent", _cerebellum_classify_intent, user_input, agent_id,
+                                                 _intent_llm_gate))
+
+    def _result(future, default):
+        try:
+            return future.result()
+        except Exception as e:
+            log(f"⚠️ [FrontEnd] 前端階段異常: {e}")
+            return default
+
+    cached, cache_source, intent = None, None, None
+    pending = {cache_future, intent_future}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        if cache_future in done:
+            cached, cache_source = _result(cache_future, (None, None))
+            if cached:
+                intent_future.cancel()
+                return cached, cache_source, None
+        if intent_future in done:
+            intent = _result(intent_future, (None, "", "error"))
+            if intent[0] == "SIMPLE":
+                cache_future.cancel()
+                return None, None, intent
+    return cached, cache_source, intent
+
 def _perform_night_distillation():
     return perform_night_distillation(AGENT_REGISTRY, MM, PE)
 
 def _trigger_curiosity_idea():
     return trigger_curiosity_idea(AGENT_REGISTRY, task_queue, last_activity_time_ref)
 
+def _warm_routine(task: str, agent_id: str, allow_skill: bool):
+    """🔥 例行任務預熱：分類後只執行搜尋 (及明確允許的技能)，回傳答案或 None
+
+    預熱不是使用者在等的請求：所有小腦呼叫以 background 優先級排隊，不佔 interactive 名額。
+    """
+    intent = _cerebellum_classify_intent(task, agent_id, priority="background")
+    if intent[0] == "SEARCH" or (intent[0] == "SKILL" and allow_skill):
+        intent_type, answer = _cerebellum_fast_track_execute(task, intent, agent_id, priority="background")
+        return answer if intent_type else None
+    return None
+
 def _scheduler_worker():
-    return scheduler_worker(_perform_night_distillation, _trigger_curiosity_idea, KM, task_queue, last_activity_time_ref)
+    return scheduler_worker(_perform_night_distillation, _trigger_curiosity_idea, KM, task_queue, last_activity_time_ref,
+                            warm_routine_fn=_warm_routine)
 
 # ── 大腦執行員 ────────────────────────────────────────────────────────────────
 
 def brain_worker():
-    """🧠 大腦執行員：Phase 3 人格邏輯分離架構"""
+    """🧠 大腦執行員：Phase 3 人格邏輯分離架構
+
+    共 BRAIN_WORKERS 條執行緒共用 task_queue (代理人公平排程、寫入任務以工作區互斥，見 modules/task_queue)；
+    每個任務結束都要 task_queue.task_done(task) 歸還名額。
+    """
     harness = Harness(BASE_DIR)
     audit = AuditLogger(BASE_DIR / "Shared_Vault" / "audit_log.jsonl")
 
@@ -164,7 +261,24 @@ def brain_worker():
             safe, reason = shield.scan(content)
             if not safe:
                 task_results[task_id] = f"🛡️ [Shield Defense] {reason}"
-                task_queue.task_done()
+                task_queue.task_done(task)
+                continue
+
+            # 🔥 例行任務：到點前已預熱的結果直接完成 (見 modules/routine_warmer)
+            warmed = ROUTINE_WARMER.take(agent_id, task.get('routine_id'), task.get('run_at')) if task.get('routine') else None
+            if warmed:
+                log(f"🔥 [RoutineWarm] 例行任務由預熱快取完成: {content[:30]}")
+                if kanban_task_id:
+                    log_snippet = warmed[:300] + "..." if len(warmed) > 300 else warmed
+                    KM.update_task(kanban_task_id, {
+                        "status": "done",
+                        "logs": f"[{datetime.datetime.now().strftime('%H:%M:%S')}] 🔥 預熱快取完成\n{log_snippet}"
+                    })
+                    notify_kanban_clients()
+                MM.append_chat(agent_id, "user", content)
+                MM.append_chat(agent_id, "assistant", warmed)
+                task_results[task_id] = warmed
+                task_queue.task_done(task)
                 continue
 
             if is_write_task:
@@ -189,7 +303,7 @@ def brain_worker():
 
             # 🧪 上下文蒸餾
             if session_context and len(session_context) > 200:
-                session_context = cerebellum_distill_context(session_context, content)
+                session_context = cerebellum_distill_context(session_context, content, agent_id=agent_id)
 
             prefix = ""
             if evo_context: prefix += evo_context + "\n"
@@ -211,7 +325,7 @@ def brain_worker():
             oc_path = shutil.which("openclaw")
             if not oc_path:
                 task_results[task_id] = "🚨 Error: OpenClaw executable not found in PATH."
-                task_queue.task_done()
+                task_queue.task_done(task)
                 continue
 
             MAX_RETRIES = 3
@@ -274,7 +388,8 @@ def brain_worker():
                                 f"請根據錯誤訊息修復這個 Bug。若缺少 import 請補上。\n"
                                 f"「只」回傳修復後的完整 Python 程式碼，絕對不要包含任何 Markdown 標籤。"
                             )
-                            fixed_code = cerebellum_call(prompt=hotfix_prompt, temperature=0.1, timeout=180, num_ctx=2048, num_predict=512)
+                            fixed_code = cerebellum_call(prompt=hotfix_prompt, temperature=0.1, timeout=180, num_ctx=2048, num_predict=512,
+                                                          priority="brain", agent_id=agent_id, site="hotfix")
                             fixed_code = re.sub(r"^```\w*\n?|\n?```$", "", fixed_code).strip()
                             if fixed_code:
                                 with open(target_file, "w", encoding="utf-8") as f:
@@ -320,7 +435,7 @@ def brain_worker():
                     agent_id
                 )
                 task_results[task_id] = final_answer
-                task_queue.task_done()
+                task_queue.task_done(task)
                 continue
 
             if is_write_task and not success:
@@ -342,7 +457,7 @@ def brain_worker():
                 try:
                     review_result = cerebellum_call(
                         prompt=review_prompt, temperature=0.1, timeout=120,
-                        num_ctx=4096, num_predict=400
+                        num_ctx=4096, num_predict=400, priority="brain", agent_id=agent_id, site="review"
                     )
                     log(f"🎭 [Reviewer] 審查: {review_result[:80]}...")
 
@@ -355,7 +470,8 @@ def brain_worker():
                         )
                         corrected = cerebellum_call(
                             prompt=correction_prompt, temperature=0.1, timeout=120,
-                            num_ctx=4096, num_predict=800
+                            num_ctx=4096, num_predict=800, priority="brain", agent_id=agent_id,
+                            site="self_correction"
                         )
                         if corrected:
                             raw_answer = corrected
@@ -386,6 +502,8 @@ def brain_worker():
             threading.Thread(target=MM._compress_old_chats, args=(agent_id,)).start()
             threading.Thread(target=update_cache, args=(content, final_answer)).start()
             task_results[task_id] = final_answer
+            if task.get('enqueued_at'):
+                METRICS.observe("brain", time.time() - task['enqueued_at'])
 
         except Exception as e:
             err_msg = f"🚨 大腦異常: {str(e)}"
@@ -396,10 +514,11 @@ def brain_worker():
                 })
             task_results[task_id] = err_msg
 
-        task_queue.task_done()
+        task_queue.task_done(task)
 
 
-threading.Thread(target=brain_worker, daemon=True).start()
+for _ in range(max(1, BRAIN_WORKERS)):
+    threading.Thread(target=brain_worker, daemon=True).start()
 
 # ── Kanban SSE ────────────────────────────────────────────────────────────────
 
@@ -413,8 +532,85 @@ def notify_kanban_clients():
     for q in dead_clients:
         kanban_clients.remove(q)
 
+# ── OpenAI 相容回應 (JSON / SSE) ──────────────────────────────────────────────
+
+def _sse_event(completion_id: str, created: int, delta: dict | None = None, finish_reason: str | None = None) -> str:
+    chunk = {
+        "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": "arielos",
+        "choices": [{"index": 0, "delta": delta or {}, "finish_reason": finish_reason}]
+    }
+    return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+
+def _chat_reply(content, stream: bool = False, on_complete=None):
+    """回覆 /v1/chat/completions：stream=True 時以 SSE 逐段送出 (content 可為字串或片段 generator)。
+
+    on_complete(full_text) 會在完整答案送出後執行 (寫入對話記憶、看板等)。
+    """
+    if not stream:
+        if on_complete:
+            on_complete(content)
+        return jsonify({"choices": [{"message": {"content": content}}]})
+
+    pieces = [content] if isinstance(content, str) else content
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+    created = int(time.time())
+
+    def event_stream():
+        parts = []
+        yield _sse_event(completion_id, created, {"role": "assistant"})
+        try:
+            for piece in pieces:
+                parts.append(piece)
+                yield _sse_event(completion_id, created, {"content": piece})
+        except Exception as e:
+            log(f"⚠️ 串流回應中斷: {e}")
+        yield _sse_event(completion_id, created, finish_reason="stop")
+        yield "data: [DONE]\n\n"
+        if on_complete:
+            try:
+                on_complete("".join(parts))
+            except Exception as e:
+                log(f"⚠️ 串流結束後處理失敗: {e}")
+
+    return Response(event_stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # ── Flask API Routes ──────────────────────────────────────────────────────────
 
+@app.after_request
+def _mark_degraded_mode(response):
+    """暖機未完成 (或有元件載入失敗) 時，在對話回應標頭如實標示降級模式"""
+    if request.path == '/v1/chat/completions':
+        mode = WARMUP.mode()
+        response.headers['X-ArielOS-Mode'] = mode
+        if mode != "ready":
+            response.headers['X-ArielOS-Degraded'] = ",".join(
+                name for name, c in WARMUP.status()["components"].items() if c["state"] != "ready")
+        if CHAT_DEBUG_HEADERS:
+            # 各階段耗時 (ms)；串流回應只計到開始送出為止
+            timings = dict(g.get("stage_timings") or {})  # 落敗的背景階段可能仍在寫入
+            if timings:
+                response.headers['Server-Timing'] = ", ".join(
+                    f"{name};dur={ms:.1f}" for name, ms in timings.items())
+            if g.get("chat_path"):
+                response.headers['X-ArielOS-Path'] = g.chat_path
+    return response
+
+@app.after_request
+def _record_chat_metrics(response):
+    """📊 依命中路徑記錄對話延遲 (大腦路徑改由 brain_worker 記錄入列到完成的時間)"""
+    if request.path == '/v1/chat/completions' and g.get("request_started") is not None:
+        path = g.get("chat_path") or ("error" if response.status_code >= 500 else None)
+        if path and path != "brain":
+            METRICS.observe(path, time.perf_counter() - g.request_started)
+    return response
+
+@app.route('/v1/health/ready', methods=['GET'])
+def health_ready():
+    """🔥 暖機就緒檢查：全部元件就緒回 200，否則 503 (ariel_launcher 哨兵據此等待)"""
+    status = WARMUP.status()
+    return jsonify(status), (200 if status["ready"] else 503)
+
 @app.route('/v1/harness/night-mode', methods=['POST'])
 def trigger_night_mode():
     result = _perform_night_distillation()
@@ -470,78 +666,97 @@ def get_task_status(task_id):
 @app.route('/v1/chat/completions', methods=['POST'])
 def chat():
     global last_activity_time_ref
+    g.request_started = time.perf_counter()
     try:
         last_activity_time_ref[0] = time.time()
         data = request.json
         user_input = data['messages'][-1]['content']
         agent_id = data.get('agent_id', 'unknown')
         origin = data.get('origin', '')
+        priority = data.get('priority') if data.get('priority') in PRIORITY_LEVELS else 'medium'
         gas_url = data.get('gas_url') or ''
         agent_name = AGENT_REGISTRY.get(agent_id, {}).get('name', '未知')
-        log(f"📨 收到來自 [{agent_name}] 的請求{' (看板執行器)' if origin == 'kanban_poller' else ''}")
+        stream = bool(data.get('stream', False))
+        log(f"📨 收到來自 [{agent_name}] 的請求{' (看板執行器)' if origin == 'kanban_poller' else ''}{' (串流)' if stream else ''}")
+        if not WARMUP.is_ready:
+            log(f"🔥 [Warmup] 以降級模式處理請求 ({WARMUP.mode()})，首次呼叫可能承擔模型載入延遲")
 
         if user_input.startswith("dispatch:"):
             try:
                 _, role, payload = user_input.split(":", 2)
                 task_id = f"task_{int(time.time())}"
                 result = Dispatcher.dispatch(task_id, role.strip(), payload.strip())
-                return jsonify({"choices": [{"message": {"content": f"👮 [Dispatcher Result]\n{result}"}}]})
+                g.chat_path = "dispatch"
+                return _chat_reply(f"👮 [Dispatcher Result]\n{result}", stream)
             except ValueError:
-                return jsonify({"choices": [{"message": {"content": "❌ 格式錯誤。請使用: dispatch:role:instruction"}}]})
-
-        cached = cerebellum_semantic_check(user_input)
-        if cached and cached != "OLLAMA_BUSY":
-            return jsonify({"choices": [{"message": {"content": f"[Ariel 智慧快取]\n{cached}"}}]})
+                return _chat_reply("❌ 格式錯誤。請使用: dispatch:role:instruction", stream)
 
-        ollama_busy = (cached == "OLLAMA_BUSY")
-        if ollama_busy:
-            log("⚡ Ollama 忙碌，跳過 FastTrack 直接入列大腦")
+        timings = g.stage_timings = {}
 
+        # ⚡ 1. CPU 脊髓反射最便宜，先做
+        started = time.perf_counter()
         reflex_ans = _spinal_chord_reflex(user_input, agent_id)
+        timings["reflex"] = (time.perf_counter() - started) * 1000
         if reflex_ans:
             log(f"⚡ 脊髓反射命中: {reflex_ans}")
-            return jsonify({"choices": [{"message": {"content": reflex_ans}}]})
+            g.chat_path = "reflex"
+            return _chat_reply(reflex_ans, stream)
 
+        # ⚡ 2. 語意快取與意圖分類同時進行，先得到決定性結果者勝出
+        cached, cache_source, intent = _speculative_front_end(user_input, agent_id, timings)
+        if cached:
+            g.chat_path = cache_source or "semantic_cache"
+            return _chat_reply(f"[Ariel 智慧快取]\n{cached}", stream)
+
+        # 🚀 3. 快取未命中才依分類結果執行搜尋/技能
         intent_type, fast_ans = (None, None)
-        if not ollama_busy:
-            intent_type, fast_ans = _cerebellum_fast_track_check(user_input, agent_id, gas_url=gas_url)
+        if intent is not None:
+            started = time.perf_counter()
+            intent_type, fast_ans = _cerebellum_fast_track_execute(user_input, intent, agent_id, stream=stream, gas_url=gas_url)
+            timings["fast_track"] = (time.perf_counter() - started) * 1000
+        g.chat_path = f"fast_track_{intent_type.lower()}" if intent_type else "brain"
 
         if intent_type == "SIMPLE":
             log(f"⚡ Fast Track [SIMPLE]: {fast_ans[:20]}...")
-            MM.append_chat(agent_id, "user", user_input)
-            MM.append_chat(agent_id, "assistant", fast_ans)
-            threading.Thread(target=MM._compress_old_chats, args=(agent_id,)).start()
-            return jsonify({"choices": [{"message": {"content": fast_ans}}]})
+
+            def _finish_simple(answer):
+                MM.append_chat(agent_id, "user", user_input)
+                MM.append_chat(agent_id, "assistant", answer)
+                threading.Thread(target=MM._compress_old_chats, args=(agent_id,)).start()
+            return _chat_reply(fast_ans, stream, on_complete=_finish_simple)
 
         if intent_type in ("SEARCH", "SKILL"):
             kanban_entry = KM.add_task(
                 title=user_input[:80] + ('...' if len(user_input) > 80 else ''),
                 agent_id=agent_id, status="doing", priority="low"
             )
-            result_snippet = fast_ans[:300] + '...' if len(fast_ans) > 300 else fast_ans
-            KM.update_task(kanban_entry['id'], {"status": "done", "logs": f"[小腦 {intent_type}] {result_snippet}"})
-            log(f"⚡ Fast Track [{intent_type}] 完成: {fast_ans[:20]}...")
-            notify_kanban_clients()
-            MM.append_chat(agent_id, "user", user_input)
-            MM.append_chat(agent_id, "assistant", fast_ans)
-            threading.Thread(target=MM._compress_old_chats, args=(agent_id,)).start()
-            return jsonify({"choices": [{"message": {"content": fast_ans}}]})
+
+            def _finish_fast_track(answer):
+                result_snippet = answer[:300] + '...' if len(answer) > 300 else answer
+                KM.update_task(kanban_entry['id'], {"status": "done", "logs": f"[小腦 {intent_type}] {result_snippet}"})
+                log(f"⚡ Fast Track [{intent_type}] 完成: {answer[:20]}...")
+                notify_kanban_clients()
+                MM.append_chat(agent_id, "user", user_input)
+                MM.append_chat(agent_id, "assistant", answer)
+                threading.Thread(target=MM._compress_old_chats, args=(agent_id,)).start()
+            return _chat_reply(fast_ans, stream, on_complete=_finish_fast_track)
 
         if intent_type is not None:
-            return jsonify({"choices": [{"message": {"content": fast_ans}}]})
+            return _chat_reply(fast_ans, stream)
 
         kanban_task_id = None
         if origin != 'kanban_poller':
             kanban_entry = KM.add_task(
                 title=user_input[:80] + ('...' if len(user_input) > 80 else ''),
-                agent_id=agent_id, status="doing", priority="medium"
+                agent_id=agent_id, status="doing", priority=priority
             )
             kanban_task_id = kanban_entry['id']
             log(f"🗂️ Kanban Job 建立: [{agent_name}] {user_input[:30]}...")
             notify_kanban_clients()
 
         tid = str(uuid.uuid4())
-        task_queue.put({'id': tid, 'content': user_input, 'agent_id': agent_id, 'kanban_task_id': kanban_task_id})
+        task_queue.put({'id': tid, 'content': user_input, 'agent_id': agent_id, 'kanban_task_id': kanban_task_id,
+                        'priority': priority, 'enqueued_at': time.time()})
         log(f"✅ 任務 {tid} 已入列 (腦部處理中)")
         return jsonify({"task_id": tid, "status": "queued"}), 202
 
@@ -612,6 +827,61 @@ def delete_kanban_task(tid):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/v1/cerebellum/stats', methods=['GET'])
+def get_cerebellum_stats():
+    return jsonify(cerebellum_stats())
+
+@app.route('/v1/brain/queue', methods=['GET'])
+def get_brain_queue():
+    """🧠 大腦任務佇列檢視：深度、執行中任務、各等待任務的優先級 (含老化)、等待秒數與預估順位"""
+    return jsonify(task_queue.snapshot())
+
+@app.route('/v1/cerebellum/latency', methods=['GET'])
+def get_cerebellum_latency():
+    """⏱️ 各 (模型, 呼叫點) 的延遲分佈與目前 deadline；?format=csv 可直接匯入試算表做硬體規劃"""
+    if request.args.get('format') == 'csv':
+        return Response(LATENCY.to_csv(), mimetype="text/csv")
+    return jsonify(LATENCY.stats())
+
+@app.route('/v1/cerebellum/breakers', methods=['GET'])
+def get_cerebellum_breakers():
+    """🔌 各模型斷路器狀態 (closed / open / half_open)"""
+    return jsonify(BREAKERS.stats())
+
+@app.route('/v1/metrics', methods=['GET'])
+def get_metrics():
+    """📊 各對話路徑的請求數、延遲直方圖、快取命中、誤命中與省下秒數；預設 Prometheus 格式，?format=json 供看板"""
+    if request.args.get('format') == 'json':
+        return jsonify(METRICS.snapshot())
+    text = METRICS.to_prometheus(cerebellum=cerebellum_stats(), reflex=REFLEX.stats(), latency=LATENCY.stats())
+    return Response(text, mimetype="text/plain; version=0.0.4")
+
+@app.route('/v1/metrics/false-hit', methods=['POST'])
+def report_false_hit():
+    """🚩 回報某次捷徑答錯 (path 取自回應標頭 X-ArielOS-Path)"""
+    data = request.json or {}
+    path = data.get("path")
+    if not path:
+        return jsonify({"error": "Missing path"}), 400
+    if path not in KNOWN_PATHS:
+        return jsonify({"error": f"Unknown path, expected one of: {', '.join(KNOWN_PATHS)}"}), 400
+    METRICS.report_false_hit(path, data.get("query", ""), data.get("answer", ""), data.get("note", ""))
+    return jsonify({"status": "success"})
+
+@app.route('/v1/reflex/stats', methods=['GET'])
+def get_reflex_stats():
+    """⚡ 脊髓反射命中率、各規則命中次數與比對延遲"""
+    return jsonify(REFLEX.stats())
+
+@app.route('/v1/reflex/reload', methods=['POST'])
+def reload_reflex_rules():
+    """⚡ 立即重新載入 reflex_rules.json (平常修改後幾秒內也會自動生效)"""
+    REFLEX.reload(force=True)
+    stats = REFLEX.stats()
+    if stats["load_error"]:
+        return jsonify({"status": "error", "message": stats["load_error"]}), 400
+    return jsonify({"status": "success", "message": f"Reflex rules reloaded. Total: {stats['rules']}"})
+
 @app.route('/v1/skills', methods=['GET'])
 def list_skills():
     return jsonify({"installed": SM.list_installed(), "catalog": SM.list_catalog()})
@@ -640,6 +910,7 @@ if __name__ == '__main__':
     log(f"🤖 Dispatcher 模型: {DISPATCHER_MODEL}")
     log(f"📦 已載入模組: config, harness, personality, cerebellum, evolution")
     threading.Thread(target=_scheduler_worker, daemon=True).start()
+    WARMUP.start(default_warmup_tasks())  # 背景並行預載模型與編碼器，不阻塞 HTTP 服務啟動
     from waitress import serve
     log("🚀 啟動 Waitress 生產級伺服器 (Port 28888)...")
     serve(app, host='0.0.0.0', port=28888, threads=16)
@@ -12,29 +12,20 @@ import sqlite3
 import datetime
 import json
 import threading
-import requests
 from pathlib import Path
 from functools import lru_cache
 
-# 模型配置 (與 ariel_bridge.py 同步)
-_CEREBELLUM_MODEL = "gemma3:4b-it-q4_K_M"
-_CEREBELLUM_FALLBACK = "gemma3:4b"
-_OLLAMA_API = "http://127.0.0.1:11434/api/generate"
+from modules.cerebellum import cerebellum_call
+from modules.text_normalize import normalize_query, tokenize
 
 
 def _cerebellum_call(prompt: str, temperature: float = 0.1, timeout: int = 120,
-                    num_ctx: int = 3072, num_predict: int = 512) -> str:
-    """🧠 MemoryManager 內醒用小腦介面（含自動模型降級）"""
-    payload = {"prompt": prompt, "stream": False,
-               "options": {"temperature": temperature, "num_ctx": num_ctx, "num_predict": num_predict}}
+                    num_ctx: int = 3072, num_predict: int = 512, agent_id: str = None) -> str:
+    """🧠 MemoryManager 內醒用小腦介面（記憶壓縮屬背景工作，以 background 優先級排程）"""
     try:
-        resp = requests.post(_OLLAMA_API, json={**payload, "model": _CEREBELLUM_MODEL}, timeout=timeout)
-        return resp.json().get('response', '').strip()
-    except Exception:
-        pass  # 降級至備用模型
-    try:
-        resp = requests.post(_OLLAMA_API, json={**payload, "model": _CEREBELLUM_FALLBACK}, timeout=timeout)
-        return resp.json().get('response', '').strip()
+        return cerebellum_call(prompt, temperature=temperature, timeout=timeout, num_ctx=num_ctx,
+                               num_predict=num_predict, priority="background", agent_id=agent_id,
+                               site="memory_compress")
     except Exception as e:
         print(f"⚠️ [MemoryManager] 小腦呼叫很役失敗: {e}")
         return ""
@@ -137,7 +128,7 @@ class MemoryManager:
             conn.close()
             
         # 清除相關快取
-        self.retrieve_relevant.cache_clear()
+        self._retrieve_relevant.cache_clear()
         
         return {
             "id": fact_id,
@@ -148,13 +139,17 @@ class MemoryManager:
             "keywords": keywords or []
         }
 
-    @lru_cache(maxsize=CACHE_SIZE)
     def retrieve_relevant(self, agent_id: str, query: str, top_k: int = 5) -> list[dict]:
         """
         關鍵字檢索：從 SQLite 記憶中找出最相關的內容。
-        利用 LRU Cache 進行效能優化。
+        查詢先經 normalize_query() 正規化，寫法不同 (全半形/繁簡/標點) 的相同提問共用 LRU Cache。
         """
-        query_words = [w.lower() for w in query.split() if len(w) > 1]
+        return self._retrieve_relevant(agent_id, normalize_query(query), top_k)
+
+    @lru_cache(maxsize=CACHE_SIZE)
+    def _retrieve_relevant(self, agent_id: str, query: str, top_k: int = 5) -> list[dict]:
+        """query 為正規化後的提問；以 tokenize() 斷詞 (中文可用)，與正規化後的內容/關鍵字比對"""
+        query_words = [w for w in tokenize(query) if len(w) > 1]
         if not query_words:
             # 若無特定關鍵字，回傳最近的記憶
             return self._get_recent(agent_id, top_k)
@@ -169,12 +164,12 @@ class MemoryManager:
         scored = []
         for row in rows:
             score = 0
-            content = row['content'].lower()
-            keywords = json.loads(row['keywords'])
+            content = normalize_query(row['content'])
+            keywords = [normalize_query(kw) for kw in json.loads(row['keywords'])]
             
             # 關鍵字完全命中：權重最高
             for qw in query_words:
-                if any(qw in kw.lower() for kw in keywords):
+                if any(qw in kw for kw in keywords):
                     score += 5
                 if qw in content:
                     score += 2
@@ -218,7 +213,7 @@ class MemoryManager:
             changed = conn.total_changes > 0
             conn.commit()
             conn.close()
-        self.retrieve_relevant.cache_clear()
+        self._retrieve_relevant.cache_clear()
         return changed
 
     # ── 介面方法 ─────────────────────────────────────────────────────────────
@@ -362,7 +357,8 @@ class MemoryManager:
                 temperature=0.1,
                 timeout=300,
                 num_ctx=3072,
-                num_predict=512
+                num_predict=512,
+                agent_id=agent_id
             )
             
             if new_summary:
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+modules/answer_store.py — ArielOS 答案快取儲存層 (SQLite + 記憶體熱層)
+
+原本的 cache_buffer.json：每則對話都要 json.load 整份檔案、逐筆解析 expires_at；
+update_cache 每次重讀再整份覆寫 (非原子寫入，且只保留最後 50 筆)。
+
+本模組改用 SQLite (WAL)：
+  - answer_cache 資料表以 expires_at 建索引，過期清理與讀取存活記錄都走索引
+  - 寫入在單一交易內完成 (INSERT + 過期清理 + 容量淘汰)，崩潰不會留下半份檔案
+  - 容量上限 ANSWER_STORE_MAX_ENTRIES (預設 5 萬筆)，超過時淘汰最舊的記錄
+  - 提問向量以 float32 BLOB 存入同一列，重啟後免重新編碼
+  - 提問以 normalize_query() 正規化後存放 (「早安！」與「早安」視為同一筆)
+
+記憶體熱層：
+  - 存活記錄的索引 (id, 提問, 到期時間) 第一次使用時載入一次，之後由 put() 直接更新
+  - 最近讀取的答案放在 LRU (ANSWER_STORE_HOT_SIZE 筆)，命中時不碰資料庫
+  - version 每次寫入遞增，讀取端 (modules/semantic_cache) 以此判斷是否要重建索引
+
+首次啟動時若資料表為空且舊的 cache_buffer.json 存在，會自動匯入並改名為 .json.migrated。
+
+包含：AnswerStore, ANSWER_STORE (全域單例)
+"""
+
+import json
+import time
+import sqlite3
+import datetime
+import threading
+from pathlib import Path
+from collections import OrderedDict
+
+from .config import (
+    CACHE_PATH, ANSWER_STORE_PATH, ANSWER_STORE_MAX_ENTRIES, ANSWER_STORE_HOT_SIZE, log
+)
+from .text_normalize import normalize_query
+
+
+class AnswerStore:
+    """小腦蒸餾答案的持久化儲存 (SQLite, TTL 索引 + 容量上限) 與記憶體熱層"""
+
+    def __init__(self, db_path: Path, max_entries: int = ANSWER_STORE_MAX_ENTRIES,
+                 hot_size: int = ANSWER_STORE_HOT_SIZE, legacy_json: Path | None = CACHE_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hot_size = hot_size
+        self._lock = threading.Lock()
+        self._index: dict[int, tuple[str, float]] | None = None   # id -> (提問, 到期時間)
+        self._hot: OrderedDict[int, str] = OrderedDict()           # id -> 答案 (LRU)
+        self.version = 0
+        self._hot_hits = 0
+        self._db_reads = 0
+        self._writes = 0
+        self._evictions = 0
+        self._init_db()
+        if legacy_json is not None:
+            self._migrate_json(Path(legacy_json))
+
+    def _get_conn(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS answer_cache (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    query TEXT UNIQUE,
+                    summary TEXT,
+                    created_at REAL,
+                    expires_at REAL,
+                    embedding BLOB
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_answer_cache_expires ON answer_cache(expires_at)')
+            conn.commit()
+            conn.close()
+
+    def _migrate_json(self, path: Path):
+        """一次性匯入舊的 cache_buffer.json (僅在資料表為空時)"""
+        if not path.exists():
+            return
+        with self._lock:
+            conn = self._get_conn()
+            try:
+                if conn.execute('SELECT COUNT(*) FROM answer_cache').fetchone()[0]:
+                    return
+                with open(path, "r", encoding="utf-8") as f:
+                    records = json.load(f).get("records", [])
+                now = time.time()
+                rows = []
+                for r in records:
+                    try:
+                        expires = datetime.datetime.fromisoformat(r["expires_at"]).timestamp()
+                    except (KeyError, ValueError, TypeError):
+                        continue
+                    if expires > now:
+                        rows.append((normalize_query(r["query"]), r["summary"], now, expires))
+                conn.executemany('''
+                    INSERT OR REPLACE INTO answer_cache (query, summary, created_at, expires_at)
+                    VALUES (?, ?, ?, ?)
+                ''', rows)
+                conn.commit()
+            except Exception as e:
+                log(f"⚠️ [AnswerStore] 舊快取匯入失敗，略過: {e}")
+                return
+            finally:
+                conn.close()
+        path.replace(path.with_suffix(".json.migrated"))
+        log(f"📦 [AnswerStore] 已從 {path.name} 匯入 {len(rows)} 筆快取")
+
+    # ── 寫入 ──────────────────────────────────────────────────────────────────
+
+    def put(self, query: str, summary: str, ttl: int) -> int:
+        """寫入 (或覆寫同一提問) 一筆答案，ttl 單位為秒；回傳記錄 id"""
+        query = normalize_query(query)
+        now = time.time()
+        expires = now + ttl
+        with self._lock:
+            conn = self._get_conn()
+            try:
+                old = conn.execute('SELECT id FROM answer_cache WHERE query = ?', (query,)).fetchone()
+                if old:
+                    conn.execute('DELETE FROM answer_cache WHERE id = ?', (old['id'],))
+                cur = conn.execute('''
+                    INSERT INTO answer_cache (query, summary, created_at, expires_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (query, summary, now, expires))
+                new_id = cur.lastrowid
+                removed = self._evict(conn, now)
+                conn.commit()
+            finally:
+                conn.close()
+
+            self._writes += 1
+            if self._index is not None:
+                if old:
+                    self._index.pop(old['id'], None)
+                for rid in removed:
+                    self._index.pop(rid, None)
+                self._index[new_id] = (query, expires)
+            if old:
+                self._hot.pop(old['id'], None)
+            for rid in removed:
+                self._hot.pop(rid, None)
+            self._remember(new_id, summary)
+            self.version += 1
+            return new_id
+
+    def _evict(self, conn, now: float) -> list[int]:
+        """刪除過期記錄，超過容量上限時再淘汰最舊的記錄；回傳被刪除的 id"""
+        removed = [row['id'] for row in conn.execute('SELECT id FROM answer_cache WHERE expires_at <= ?', (now,))]
+        overflow = conn.execute('SELECT COUNT(*) FROM answer_cache').fetchone()[0] - len(removed) - self.max_entries
+        if overflow > 0:
+            removed += [row['id'] for row in conn.execute(
+                'SELECT id FROM answer_cache WHERE expires_at > ? ORDER BY id ASC LIMIT ?', (now, overflow))]
+        conn.executemany('DELETE FROM answer_cache WHERE id = ?', [(rid,) for rid in removed])
+        self._evictions += len(removed)
+        return removed
+
+    def set_embeddings(self, vectors: dict[int, bytes]):
+        """保存提問向量 (float32 bytes)，重啟後免重新編碼"""
+        if not vectors:
+            return
+        with self._lock:
+            conn = self._get_conn()
+            try:
+                conn.executemany('UPDATE answer_cache SET embedding = ? WHERE id = ?',
+                                 [(blob, rid) for rid, blob in vectors.items()])
+                conn.commit()
+            finally:
+                conn.close()
+
+    def clear(self):
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute('DELETE FROM answer_cache')
+            conn.commit()
+            conn.close()
+            self._index = {}
+            self._hot.clear()
+            self.version += 1
+
+    # ── 讀取 ──────────────────────────────────────────────────────────────────
+
+    def live_entries(self) -> tuple[int, list[tuple[int, str, float]]]:
+        """回傳 (version, [(id, 提問, 到期時間), ...])；只讀記憶體索引，第一次呼叫時才查資料庫"""
+        now = time.time()
+        with self._lock:
+            if self._index is None:
+                conn = self._get_conn()
+                try:
+                    rows = conn.execute('SELECT id, query, expires_at FROM answer_cache WHERE expires_at > ? '
+                                        'ORDER BY id', (now,)).fetchall()
+                finally:
+                    conn.close()
+                self._index = {row['id']: (row['query'], row['expires_at']) for row in rows}
+            return self.version, [(rid, q, exp) for rid, (q, exp) in self._index.items() if exp > now]
+
+    def get(self, entry_id: int) -> str | None:
+        """依 id 取得未過期的答案 (熱層優先)"""
+        with self._lock:
+            entry = self._index.get(entry_id) if self._index is not None else None
+            if entry is not None and entry[1] <= time.time():
+                return None
+            summary = self._hot.get(entry_id)
+            if summary is not None:
+                self._hot.move_to_end(entry_id)
+                self._hot_hits += 1
+                return summary
+            conn = self._get_conn()
+            try:
+                row = conn.execute('SELECT summary FROM answer_cache WHERE id = ? AND expires_at > ?',
+                                   (entry_id, time.time())).fetchone()
+            finally:
+                conn.close()
+            self._db_reads += 1
+            if row is None:
+                return None
+            self._remember(entry_id, row['summary'])
+            return row['summary']
+
+    def embeddings(self, ids: list[int]) -> dict[int, bytes]:
+        """批次讀取已保存的提問向量"""
+        if not ids:
+            return {}
+        found = {}
+        with self._lock:
+            conn = self._get_conn()
+            try:
+                for start in range(0, len(ids), 500):
+                    chunk = ids[start:start + 500]
+                    marks = ",".join("?" * len(chunk))
+                    for row in conn.execute(f'SELECT id, embedding FROM answer_cache WHERE id IN ({marks}) '
+                                            f'AND embedding IS NOT NULL', chunk):
+                        found[row['id']] = row['embedding']
+            finally:
+                conn.close()
+        return found
+
+    def _remember(self, entry_id: int, summary: str):
+        self._hot[entry_id] = summary
+        self._hot.move_to_end(entry_id)
+        while len(self._hot) > self.hot_size:
+            self._hot.popitem(last=False)
+
+    # ── 統計 ──────────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._get_conn()
+            count = conn.execute('SELECT COUNT(*) FROM answer_cache WHERE expires_at > ?', (time.time(),)).fetchone()[0]
+            conn.close()
+            return {
+                "entries": count,
+                "max_entries": self.max_entries,
+                "hot_entries": len(self._hot),
+                "hot_hits": self._hot_hits,
+                "db_reads": self._db_reads,
+                "writes": self._writes,
+                "evictions": self._evictions,
+                "version": self.version,
+            }
+
+
+# 全域單例
+ANSWER_STORE = AnswerStore(ANSWER_STORE_PATH)
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+modules/async_cerebellum.py — ArielOS 小腦 asyncio 介面 (aiohttp)
+
+同步版 cerebellum_call 每個等待中的 LLM 呼叫都佔住一條 Waitress 執行緒 (共 16 條)。
+本模組提供 asyncio 原生版本，讓 Bridge 與技能可以在同一個任務內 fan-out
+多個彼此獨立的 LLM / HTTP 呼叫，而不必每個呼叫綁一條 OS 執行緒：
+
+    async def main():
+        intent, keywords = await asyncio.gather(
+            acerebellum_call(p1, temperature=0, site="intent"),
+            acerebellum_call(p2, temperature=0, site="keywords"),
+        )
+
+同步程式碼 (Flask 路由、brain_worker) 可用 run_async(coro) 交給共用事件迴圈執行；
+快車道的 SEARCH 即經由 asearch_web：先成功的 AI 摘要探針直接回傳，不必等較慢的探針結束。
+排程 (LLM_SCHEDULER)、斷路器、常駐規劃、決定性快取、自適應逾時與同步版共用同一份狀態。
+
+包含：agenerate, acerebellum_call, acerebellum_style_transfer, asearch_web, adispatch_skill, run_async
+"""
+
+import re
+import json
+import time
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+
+import aiohttp
+
+from .config import CEREBELLUM_MODEL, CEREBELLUM_FALLBACK_MODEL, OLLAMA_POOL_MAXSIZE, LLM_CACHE_ENABLED, log
+from .ollama_client import OLLAMA
+from .circuit_breaker import BREAKERS
+from .model_residency import RESIDENCY
+from .llm_cache import LLM_CACHE
+from .llm_scheduler import LLM_SCHEDULER
+from .token_budget import TOKEN_BUDGET
+from .keyword_matcher import KEYWORDS
+
+# ── 共用事件迴圈 ──────────────────────────────────────────────────────────────
+_LOOP = None
+_LOOP_LOCK = threading.Lock()
+_SESSION = None
+
+
+def _shared_loop() -> asyncio.AbstractEventLoop:
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            _LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_LOOP.run_forever, daemon=True, name="cerebellum-async").start()
+        return _LOOP
+
+
+def run_async(coro, timeout: float | None = None):
+    """在共用事件迴圈上執行 coroutine 並阻塞等待結果 (供同步程式碼 fan-out 使用)"""
+    return asyncio.run_coroutine_threadsafe(coro, _shared_loop()).result(timeout)
+
+
+@asynccontextmanager
+async def _session():
+    """共用事件迴圈上重用同一個 keep-alive Session；其他事件迴圈 (例如技能自己的 asyncio.run) 用臨時 Session"""
+    global _SESSION
+    if _LOOP is not None and asyncio.get_running_loop() is _LOOP:
+        if _SESSION is None or _SESSION.closed:
+            _SESSION = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=OLLAMA_POOL_MAXSIZE))
+        yield _SESSION
+    else:
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=OLLAMA_POOL_MAXSIZE)) as session:
+            yield session
+
+
+# ── 並發合併 (asyncio 版 SingleFlight) ───────────────────────────────────────
+_AINFLIGHT: dict = {}
+
+
+def _forget(flight_key, task: asyncio.Task):
+    if _AINFLIGHT.get(flight_key) is task:
+        del _AINFLIGHT[flight_key]
+    if not task.cancelled():
+        task.exception()  # 標記已讀取，沒有等待者時不會出現 "never retrieved" 警告
+
+
+async def _single_flight(key, factory):
+    """相同 key 同時進行中時，後到者等待第一個呼叫的結果 (依事件迴圈區分)
+
+    實際呼叫在獨立的 Task 中執行，所有呼叫端 (包含第一個) 都透過 asyncio.shield 等待：
+    任何一個呼叫端被取消 (例如前端推測管線放棄分類) 只會取消它自己的等待，
+    共用的呼叫照常完成，其他等待者仍拿到結果。
+    """
+    loop = asyncio.get_running_loop()
+    flight_key = (id(loop), key)
+    task = _AINFLIGHT.get(flight_key)
+    if task is None:
+        task = loop.create_task(factory())
+        _AINFLIGHT[flight_key] = task
+        task.add_done_callback(lambda t: _forget(flight_key, t))
+    return await asyncio.shield(task)
+
+
+# ── Ollama 呼叫 ───────────────────────────────────────────────────────────────
+
+async def agenerate(prompt: str, model: str | None = None, options: dict | None = None,
+                    timeout: float = 180, fallback_model: str | None = CEREBELLUM_FALLBACK_MODEL,
+                    output_format: dict | str | None = None, site: str | None = None) -> tuple[str, str]:
+    """OllamaClient.generate 的 asyncio 版本 (同一套斷路器、keep_alive、冷啟動放寬、延遲記錄與模型降級規則)
+
+    回傳 (完整文字, 實際回答的模型)。
+    """
+    payload = {"prompt": prompt, "stream": False, "options": options or {}}
+    if output_format:
+        payload["format"] = output_format
+    candidates = OLLAMA._routable_models(model, fallback_model)
+    last_error = None
+    async with _session() as session:
+        for i, target in enumerate(candidates):
+            deadline = OLLAMA._deadline_for(target, timeout, site)
+            cold = not RESIDENCY.is_resident(target)
+            started = time.monotonic()
+            target_timeout = OLLAMA._timeout_for(target, deadline)
+            client_timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=target_timeout)
+            try:
+                async with session.post(OLLAMA.generate_url, json=OLLAMA._model_payload(payload, target),
+                                        timeout=client_timeout) as resp:
+                    resp.raise_for_status()
+                    data = await resp.json(content_type=None)
+                BREAKERS.get(target).record_success()
+                OLLAMA._record_latency(target, site, cold, time.monotonic() - started)
+                return data.get('response', '').strip(), target
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # aiohttp 逾時的訊息是空字串，統一成與 requests 相同的 "timed out" 描述
+                err = TimeoutError(f"Read timed out. (read timeout={target_timeout})") \
+                    if isinstance(e, asyncio.TimeoutError) else e
+                BREAKERS.get(target).record_failure(err)
+                OLLAMA._record_latency(target, site, cold, deadline, err)
+                last_error = err
+                if i + 1 < len(candidates):
+                    log(f"⚠️ [{target}] 失敗，降級至 {candidates[i + 1]}: {err}")
+    raise last_error
+
+
+async def acerebellum_call(prompt: str, temperature: float = 0.3, timeout: int = 180,
+                           num_ctx: int = 2048, num_predict: int = 256, model: str = None,
+                           cache: bool = True, priority: str = "interactive", agent_id: str = None,
+                           site: str = "general", output_format: dict | str = None) -> str:
+    """🧠 cerebellum_call 的 asyncio 版本 (參數與行為相同)
+
+    排隊等待名額時借用執行緒池；取得名額後等待 Ollama 回應的期間不佔任何執行緒。
+    """
+    target_model = model if model else CEREBELLUM_MODEL
+    num_ctx = TOKEN_BUDGET.fit(prompt, num_ctx, num_predict, site, model=target_model)
+    options = {"temperature": temperature, "num_ctx": num_ctx, "num_predict": num_predict}
+    key_options = {k: v for k, v in options.items() if k != "num_ctx"}
+    if output_format:
+        key_options["format"] = json.dumps(output_format, sort_keys=True)
+
+    cache_key = None
+    if cache and LLM_CACHE_ENABLED and temperature == 0:
+        cache_key = LLM_CACHE.make_key(target_model, prompt, key_options)
+        cached = await asyncio.to_thread(LLM_CACHE.get, cache_key)
+        if cached is not None:
+            return cached
+
+    async def _call():
+        async with LLM_SCHEDULER.aslot(target_model, priority=priority, agent_id=agent_id):
+            result, answered_by = await agenerate(prompt, model=target_model, options=options,
+                                                  timeout=timeout, fallback_model=CEREBELLUM_FALLBACK_MODEL,
+                                                  output_format=output_format, site=site)
+        if cache_key and result and answered_by == target_model:
+            await asyncio.to_thread(LLM_CACHE.put, cache_key, target_model, result)
+        return result
+
+    return await _single_flight((target_model, prompt, tuple(sorted(key_options.items()))), _call)
+
+
+# ── 風格轉移 / 搜尋 / 技能 ────────────────────────────────────────────────────
+
+async def acerebellum_style_transfer(raw_answer: str, agent_id: str, agent_registry: dict, pe,
+                                     priority: str = "interactive") -> str:
+    """🚀 cerebellum_style_transfer 的 asyncio 版本 (規則相同)"""
+    from .cerebellum import _style_transfer_prompt
+    from .personality import _sanitize_persona
+
+    soul = pe.load_soul(agent_id)
+    agent_name = agent_registry.get(agent_id, {}).get("name", "Agent")
+    if not soul:
+        return _sanitize_persona(raw_answer, agent_name)
+    if KEYWORDS.match(raw_answer, groups=("style_error",)):
+        return f"[{agent_name} 系統回報]\n{raw_answer}"
+
+    if len(raw_answer) > 3000:
+        try:
+            intro = await acerebellum_call(
+                prompt=(f"你是 {agent_name}。請用你獨特的說話風格，只寫一句話向老闆報告以下任務已完成。"
+                        f"任務摘要（前200字）：{raw_answer[:200]}"),
+                temperature=0.4, timeout=120, num_ctx=1024, num_predict=60,
+                priority=priority, agent_id=agent_id, site="style_intro"
+            )
+            if intro:
+                return f"{_sanitize_persona(intro, agent_name)}\n\n{_sanitize_persona(raw_answer, agent_name)}"
+        except Exception as e:
+            log(f"⚠️ 大輸出前言生成失敗: {e}")
+        return _sanitize_persona(raw_answer, agent_name)
+
+    try:
+        styled = await acerebellum_call(prompt=_style_transfer_prompt(raw_answer, agent_name, soul),
+                                        temperature=0.7, timeout=120, num_ctx=4096, num_predict=600,
+                                        priority=priority, agent_id=agent_id, site="style_transfer")
+        if styled:
+            styled = re.sub(r"^```\w*\n?|\n?```$", "", styled.strip(), flags=re.MULTILINE)
+            return _sanitize_persona(styled, agent_name)
+    except Exception as e:
+        log(f"⚠️ 風格轉移失敗: {e}")
+    return _sanitize_persona(raw_answer, agent_name)
+
+
+async def asearch_web(query: str) -> str:
+    """🔍 search_web_worker 的 asyncio 版本：兩個 AI 摘要探針並行，先成功者勝出，全部失敗才走 DDGS"""
+    from .cerebellum import google_ai_search_worker, perplexity_search_worker, ddgs_filtered_search
+    log(f"🔍 [Async Search] 啟動共識搜尋: {query[:50]}...")
+
+    # Playwright 同步 API 無法中途取消：探針在執行緒中跑完，但不再阻擋回應
+    probes = {
+        asyncio.ensure_future(asyncio.to_thread(google_ai_search_worker, query)): "Google AI",
+        asyncio.ensure_future(asyncio.to_thread(perplexity_search_worker, query)): "Perplexity AI",
+    }
+    pending = set(probes)
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            try:
+                res = task.result()
+            except Exception as e:
+                log(f"⚠️ [Async Search] {probes[task]} 支線故障: {e}")
+                continue
+            if res:
+                log(f"🎯 [Async Search] {probes[task]} 搶先擊中！")
+                return res
+
+    log("🔍 [Async Search] 所有 AI 搜尋均失效，執行 DDGS + CPU 程式化過濾...")
+    return await asyncio.to_thread(ddgs_filtered_search, query)
+
+
+async def adispatch_skill(query: str, skill_desc: str, agent_id: str, sm, agent_registry: dict, pe,
+                          **kwargs) -> str:
+    """🔧 技能路由 asyncio 版：比對/安裝/執行 (subprocess、MCP) 交給執行緒，風格轉移走 acerebellum_call"""
+    from .cerebellum import cerebellum_skill_handler, SKILL_ROUTING_FAILED
+
+    result = await asyncio.to_thread(cerebellum_skill_handler, query, skill_desc, agent_id,
+                                     sm, agent_registry, pe, raw=True, **kwargs)
+    if result == SKILL_ROUTING_FAILED:
+        return result
+    return await acerebellum_style_transfer(result, agent_id, agent_registry, pe)
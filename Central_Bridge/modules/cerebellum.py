@@ -8,9 +8,6 @@ modules/cerebellum.py — ArielOS 小腦核心模組
 
 import re
 import json
-import time
-import datetime
-import threading as _threading
 import subprocess
 import uuid
 import sys
@@ -18,38 +15,55 @@ from pathlib import Path
 from ddgs import DDGS
 
 from .config import (
-    OLLAMA_API, CEREBELLUM_MODEL, CEREBELLUM_FALLBACK_MODEL, INTENT_MODEL,
-    CACHE_PATH, DATA_SANDBOX_PATH, log, ollama_post
+    CEREBELLUM_MODEL, CEREBELLUM_FALLBACK_MODEL, INTENT_MODEL,
+    DATA_SANDBOX_PATH, LLM_CACHE_ENABLED, SIMPLE_CACHE_TTL, SIMPLE_CACHE_MAX_ENTRIES, log
 )
+from .ollama_client import OLLAMA
+from .singleflight import SingleFlight
+from .llm_cache import LLM_CACHE
+from .llm_scheduler import LLM_SCHEDULER
+from .model_residency import RESIDENCY
+from .circuit_breaker import BREAKERS
+from .latency_tracker import LATENCY
+from .intent_batcher import INTENT_BATCHER
+from .token_budget import TOKEN_BUDGET
+from .intent_classifier import INTENT_CLF
+from .keyword_matcher import KEYWORDS
+from .ttl_cache import TTLCache
+from .text_normalize import normalize_query
+from .answer_store import ANSWER_STORE
+from .semantic_cache import SEMANTIC_CACHE
+from .routine_warmer import ROUTINE_WARMER
+from .fact_cache import FACT_CACHE
+from .async_cerebellum import asearch_web, run_async
 
 # ── 並發保護 ──────────────────────────────────────────────────────────────────
-_CEREBELLUM_SEMAPHORE = _threading.Semaphore(2)
+# 名額分配交由 LLM_SCHEDULER (優先級 + 代理人公平性)；
+# 相同 (model, prompt, options) 的並發呼叫只送一次 Ollama，其餘等待共用結果 (不佔名額)
+_INFLIGHT = SingleFlight()
 
 # ── SIMPLE 問題快取 ───────────────────────────────────────────────────────────
-_SIMPLE_CACHE: dict = {}
-_SIMPLE_CACHE_TTL = 300  # 5 分鐘
+_SIMPLE_CACHE = TTLCache(SIMPLE_CACHE_MAX_ENTRIES, SIMPLE_CACHE_TTL)
 
 
 def _cached_cerebellum_simple(cache_key: str):
-    entry = _SIMPLE_CACHE.get(cache_key)
-    if entry and time.time() < entry[1]:
+    answer = _SIMPLE_CACHE.get(cache_key)
+    if answer is not None:
         log(f"⚡ [SimpleCache] 命中快取: {cache_key[:30]}")
-        return entry[0]
-    return None
+    return answer
 
 
 def _set_cerebellum_simple_cache(cache_key: str, answer: str):
-    _SIMPLE_CACHE[cache_key] = (answer, time.time() + _SIMPLE_CACHE_TTL)
-    expired = [k for k, (_, ts) in _SIMPLE_CACHE.items() if time.time() >= ts]
-    for k in expired:
-        _SIMPLE_CACHE.pop(k, None)
+    _SIMPLE_CACHE.set(cache_key, answer)
 
 
 # ── 統一呼叫介面 ──────────────────────────────────────────────────────────────
 
 def cerebellum_call(prompt: str, temperature: float = 0.3, timeout: int = 180,
-                    num_ctx: int = 2048, num_predict: int = 256, model: str = None) -> str:
-    """🧠 小腦統一呼叫介面（含 Semaphore 保護、精簡 Context 設定、自動模型降級）
+                    num_ctx: int = 2048, num_predict: int = 256, model: str = None,
+                    cache: bool = True, priority: str = "interactive", agent_id: str = None,
+                    site: str = "general", output_format: dict | str = None) -> str:
+    """🧠 小腦統一呼叫介面（含優先級排程、精簡 Context 設定、自動模型降級）
 
     各場景建議設定：
     - 意圖分類:   num_ctx=2048, num_predict=80
@@ -58,21 +72,81 @@ def cerebellum_call(prompt: str, temperature: float = 0.3, timeout: int = 180,
     - 風格轉移:   num_ctx=4096, num_predict=600
 
     自動降級：若指定 model (或 CEREBELLUM_MODEL) 超時或不存在，自動改用 CEREBELLUM_FALLBACK_MODEL。
+    連線經由 modules/ollama_client 的共用 keep-alive 連線池。
+    並發合併：相同 Prompt 同時進行中時，後到的呼叫直接等待並共用第一個呼叫的結果。
+    決定性快取：temperature=0 的結果會寫入 modules/llm_cache (cache=False 可略過；降級回答不快取)。
+    優先級：priority = "interactive" (預設) / "brain" / "background"，agent_id 用於同級公平輪替。
+    自適應逾時：site 標示呼叫點；累積足夠樣本後以 (候選模型, site) 的實測 p99 推算各自的 deadline，
+    timeout 只作為樣本不足時的預設值 (見 modules/latency_tracker)；目標模型未常駐時逾時另加載入時間。
+    結構化輸出：output_format 傳 "json" 或 JSON Schema，Ollama 會限制回應格式 (見 modules/intent_batcher)。
+    Token 預算：num_ctx 會依 Prompt 長度改用足夠的級距，且每個模型只升不降 (見 modules/token_budget)。
+    """
+    target_model = model if model else CEREBELLUM_MODEL
+    num_ctx = TOKEN_BUDGET.fit(prompt, num_ctx, num_predict, site, model=target_model)
+    options = {"temperature": temperature, "num_ctx": num_ctx, "num_predict": num_predict}
+    # 格式限制會改變輸出，需納入快取與並發合併的 key；num_ctx 只要放得下 Prompt 就不影響輸出，
+    # 且會隨模型黏住的級距變動，不納入 key
+    key_options = {k: v for k, v in options.items() if k != "num_ctx"}
+    if output_format:
+        key_options["format"] = json.dumps(output_format, sort_keys=True)
+
+    cache_key = None
+    if cache and LLM_CACHE_ENABLED and temperature == 0:
+        cache_key = LLM_CACHE.make_key(target_model, prompt, key_options)
+        cached = LLM_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+
+    def _call():
+        with LLM_SCHEDULER.slot(target_model, priority=priority, agent_id=agent_id):
+            # 每個候選模型的 deadline 與延遲樣本 (含主要模型逾時後降級) 由 OLLAMA.generate 依 site 處理
+            result, answered_by = OLLAMA.generate(prompt, model=target_model, options=options,
+                                                  timeout=timeout, fallback_model=CEREBELLUM_FALLBACK_MODEL,
+                                                  output_format=output_format, site=site)
+        # 備用模型的回答不寫入主要模型的快取 key，主要模型恢復後才會重新產生並快取
+        if cache_key and result and answered_by == target_model:
+            LLM_CACHE.put(cache_key, target_model, result)
+        return result
+
+    flight_key = (target_model, prompt, tuple(sorted(key_options.items())))
+    return _INFLIGHT.do(flight_key, _call)
+
+
+def cerebellum_call_stream(prompt: str, temperature: float = 0.3, timeout: int = 180,
+                           num_ctx: int = 2048, num_predict: int = 256, model: str = None,
+                           priority: str = "interactive", agent_id: str = None, site: str = "general"):
+    """🌊 cerebellum_call 的串流版本：逐段 yield 文字片段，降低首字延遲 (TTFT)
+
+    參數與降級規則同 cerebellum_call；排程名額會持有到串流結束或呼叫端關閉 generator。
     """
     target_model = model if model else CEREBELLUM_MODEL
-    payload = {
-        "prompt": prompt,
-        "stream": False,
-        "options": {"temperature": temperature, "num_ctx": num_ctx, "num_predict": num_predict}
+    num_ctx = TOKEN_BUDGET.fit(prompt, num_ctx, num_predict, site, model=target_model)
+    options = {"temperature": temperature, "num_ctx": num_ctx, "num_predict": num_predict}
+    with LLM_SCHEDULER.slot(target_model, priority=priority, agent_id=agent_id):
+        yield from OLLAMA.generate_stream(prompt, model=target_model, options=options,
+                                          timeout=timeout, fallback_model=CEREBELLUM_FALLBACK_MODEL)
+
+
+def cerebellum_stats() -> dict:
+    """📊 小腦呼叫層統計 (快取命中率、並發合併、排程排隊時間、模型換出、斷路器、延遲分佈、意圖微批次、num_ctx 選級、CPU 意圖分類器、關鍵字命中、語意快取)"""
+    RESIDENCY.sync(OLLAMA)  # 以 /api/ps 校正常駐清單 (Ollama 未啟動時略過)
+    return {
+        "llm_cache": LLM_CACHE.stats(),
+        "single_flight": _INFLIGHT.stats(),
+        "scheduler": LLM_SCHEDULER.stats(),
+        "residency": RESIDENCY.stats(),
+        "breakers": BREAKERS.stats(),
+        "latency": LATENCY.stats(),
+        "intent_batch": INTENT_BATCHER.stats(),
+        "token_budget": TOKEN_BUDGET.stats(),
+        "intent_classifier": INTENT_CLF.stats(),
+        "keywords": KEYWORDS.stats(),
+        "simple_cache": _SIMPLE_CACHE.stats(),
+        "semantic_cache": SEMANTIC_CACHE.stats(),
+        "answer_store": ANSWER_STORE.stats(),
+        "routine_warmer": ROUTINE_WARMER.stats(),
+        "fact_cache": FACT_CACHE.stats(),
     }
-    with _CEREBELLUM_SEMAPHORE:
-        try:
-            resp = ollama_post(OLLAMA_API, json={**payload, "model": target_model}, timeout=timeout)
-            return resp.json().get('response', '').strip()
-        except Exception as e:
-            log(f"⚠️ [{target_model}] 失敗，降級至 {CEREBELLUM_FALLBACK_MODEL}: {e}")
-        resp = ollama_post(OLLAMA_API, json={**payload, "model": CEREBELLUM_FALLBACK_MODEL}, timeout=timeout)
-        return resp.json().get('response', '').strip()
 
 
 # ── 搜尋 ──────────────────────────────────────────────────────────────────────
@@ -90,7 +164,7 @@ def extract_search_keywords(query: str) -> str:
                 f"將以下自然語言問句轉換成精確的搜尋引擎關鍵字（2~5個詞），只輸出關鍵字，用空格分隔，不要解釋。\n"
                 f"問句：『{query}』\n關鍵字："
             ),
-            temperature=0, timeout=12, num_ctx=1024, num_predict=30
+            temperature=0, timeout=12, num_ctx=1024, num_predict=30, site="keywords"
         )
         keywords = keywords.split('\n')[0].strip().strip('"').strip("'").strip('`')
         if keywords and len(keywords) > 1:
@@ -278,6 +352,11 @@ def search_web_worker(query: str) -> str:
 
     # 3. 備位方案: DDGS + CPU 程式化過濾 (所有 AI 都失敗時)
     log("🔍 [Search Worker] 所有 AI 搜尋均失效，執行 DDGS + CPU 程式化過濾...")
+    return ddgs_filtered_search(query)
+
+
+def ddgs_filtered_search(query: str) -> str:
+    """🧪 DDGS 搜尋 + 小腦撰寫過濾腳本於沙盒執行 (AI 摘要搜尋全部失敗時的備位方案)"""
     try:
         search_keywords = extract_search_keywords(query)
         results = DDGS().text(search_keywords, max_results=10)
@@ -298,7 +377,8 @@ def search_web_worker(query: str) -> str:
             "2. **讀取 JSON 或任何檔案時，務必使用 `open(..., encoding='utf-8')` 解碼。**\n"
             "3. 只 print 最精華的繁體中文結果，不要 print 原始陣列。"
         )
-        script_code = cerebellum_call(prompt=prompt, temperature=0.1, timeout=180, num_ctx=2048, num_predict=1024)
+        script_code = cerebellum_call(prompt=prompt, temperature=0.1, timeout=180, num_ctx=2048, num_predict=1024,
+                                      site="search_script")
         # 🛡️ 嘗試精準提取 markdown 內的程式碼，避免 LLM 的開場白導致執行失敗
         code_match = re.search(r"```(?:python)?\n(.*?)\n```", script_code, re.DOTALL | re.IGNORECASE)
         if code_match:
@@ -337,7 +417,7 @@ def search_web_worker(query: str) -> str:
         return f"Error performing search: {e}"
 
 
-def programmatic_data_worker(query: str) -> str:
+def programmatic_data_worker(query: str, priority: str = "interactive") -> str:
     """🚀 Phase 8: CPU-Driven Programmatic Tool Calling (Sandbox Filtering)"""
     log(f"💻 [Programmatic Worker] 啟動程式化沙盒處理: {query[:50]}...")
     try:
@@ -351,7 +431,8 @@ def programmatic_data_worker(query: str) -> str:
             "4. 在程式碼最後，使用 print() 輸出『最簡潔的精華結論』，這個 print 的結果將會直接交給使用者。\n"
             "5. 確保程式碼沒有無窮迴圈，並且能快速執行完畢。"
         )
-        script_code = cerebellum_call(prompt=instruction, temperature=0.1, timeout=180, num_ctx=2048, num_predict=1024)
+        script_code = cerebellum_call(prompt=instruction, temperature=0.1, timeout=180, num_ctx=2048, num_predict=1024,
+                                      priority=priority, site="programmatic_script")
         
         # 🛡️ 嘗試精準提取 markdown 內的程式碼，避免 LLM 的開場白導致執行失敗
         code_match = re.search(r"```(?:python)?\n(.*?)\n```", script_code, re.DOTALL | re.IGNORECASE)
@@ -397,85 +478,64 @@ def programmatic_data_worker(query: str) -> str:
 
 # ── 快取語意檢查 ──────────────────────────────────────────────────────────────
 
-def cerebellum_semantic_check(query: str):
-    """🚀 小腦門衛：由 Ollama 判定語意意圖 (邏輯增強版)"""
+def cerebellum_semantic_lookup(query: str) -> tuple[str | None, str | None]:
+    """🚀 小腦門衛：SIMPLE 快取 → 向量語意快取 (不呼叫 LLM，見 modules/semantic_cache)
+
+    回傳 (答案, 命中途徑)：途徑為 simple_cache / semantic_cache / cpu_ultra_hit，未命中為 (None, None)。
+    """
     cached = _cached_cerebellum_simple(query)
     if cached:
-        return cached
-
-    if not CACHE_PATH.exists():
-        return None
+        return cached, "simple_cache"
     try:
-        with open(CACHE_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            records = data.get("records", [])
-            if not records:
-                return None
-            now = datetime.datetime.now()
-            valid_records = [r for r in records if now < datetime.datetime.fromisoformat(r['expires_at'])]
-            target_pool = valid_records[-10:]
-            if not target_pool:
-                return None
-
-            # 關鍵字重疊預篩選：只抓出有字元重疊的快取項目
-            query_chars = set(query.replace(" ", ""))
-            overlapping_records = []
-            for i, r in enumerate(target_pool):
-                r_chars = set(r['query'].replace(" ", ""))
-                overlap_ratio = len(query_chars & r_chars) / max(len(query_chars | r_chars), 1)
-                
-                # ⚡ [CPU Ultra Hit] 相似度極高 (>85%)，直接命中，跳過 LLM 判定
-                if overlap_ratio >= 0.85:
-                    log(f"⚡ [CPU Ultra Hit] 相似度高達 {overlap_ratio:.2f}，直接命中 ID:{i}")
-                    return r['summary']
-                
-                if overlap_ratio >= 0.35:
-                    overlapping_records.append((i, r))
-
-            if not overlapping_records:
-                log("🛡️ [SemanticCache] 無足夠重疊，跳過 LLM 判定")
-                return None
-
-            cache_context = "\n".join([f"ID:{i} | 問題:{r['query']}" for i, r in overlapping_records])
-            instruction = (
-                f"你現在是 ArielOS 的超嚴格語意門衛。快取清單如下：\n{cache_context}\n\n"
-                f"現在老闆問了：『{query}』\n"
-                "【判斷標準 — 必須三項全部相同才可命中】\n"
-                "  1. 主題/領域 完全相同（如：天氣 ≠ 法律，技能 ≠ 進度）\n"
-                "  2. 地點/對象 完全相同\n"
-                "  3. 行動/意圖 完全相同（如：學習技能 ≠ 查詢進度）\n\n"
-                "【終極指令】\n"
-                "絕對不允許任何解釋或廢話。\n"
-                "如果上述清單中有完全吻合的項目，請你嚴格按照以下格式輸出：\n"
-                "[MATCH_ID:數字]\n"
-                "如果沒有任何一個項目符合，或是你不確定，請嚴格按照以下格式輸出：\n"
-                "[NO]\n"
-            )
-            judgment = cerebellum_call(prompt=instruction, temperature=0, timeout=25, num_ctx=1024, num_predict=20)
-            
-            if "[NO]" in judgment.upper():
-                return None
-                
-            match = re.search(r'\[MATCH_ID:(\d+)\]', judgment, re.IGNORECASE)
-            if match:
-                idx = int(match.group(1))
-                if 0 <= idx < len(target_pool):
-                    log(f"⚡ 小腦確認語意命中 ID:{idx}")
-                    return target_pool[idx]['summary']
-            
-            log(f"⚠️ [SemanticCache] LLM 回傳格式錯誤或無命中: {judgment[:20]}")
-            return None
+        answer, tier = SEMANTIC_CACHE.match(query)
+        if answer:
+            return answer, ("cpu_ultra_hit" if tier == "cpu_ultra_hit" else "semantic_cache")
     except Exception as e:
         log(f"⚠️ 小腦門衛異常: {e}")
-        if "timed out" in str(e).lower() or "read timeout" in str(e).lower():
-            return "OLLAMA_BUSY"
-    return None
+    return None, None
+
+
+def cerebellum_semantic_check(query: str):
+    """只回傳答案的簡化版 (未命中為 None)"""
+    return cerebellum_semantic_lookup(query)[0]
 
 
 # ── 風格轉移 ──────────────────────────────────────────────────────────────────
 
-def cerebellum_style_transfer(raw_answer: str, agent_id: str, agent_registry: dict, pe) -> str:
-    """🚀 小腦風格轉移：將大腦的純邏輯答案轉化為代理人人格"""
+_STYLE_ERROR_SIGNATURES = [
+    "Error performing search:",
+    "Error filtering search:",
+    "Error executing programmatic data analysis:",
+    "Error in programmatic worker:",
+    "Timeout error:",
+    "程式碼執行完畢，但未",
+    "Unable to find relevant information",
+    "Traceback ("
+]
+KEYWORDS.register("style_error", _STYLE_ERROR_SIGNATURES)
+
+
+def _style_transfer_prompt(raw_answer: str, agent_name: str, soul: str) -> str:
+    # 避免複誦角色設定與幻覺
+    return (
+        f"你現在扮演『{agent_name}』。你的個性如下：\n"
+        f"【角色特質】\n{soul[:300]}\n\n"
+        f"【任務：文字潤飾】\n"
+        f"請使用你的口吻與第一人稱『我』，將下方【待潤飾的原文】重新改寫，讓它聽起來像是你說的話。\n"
+        f"【強制規則】\n"
+        f"1. 嚴禁在回答中提到「這是我的靈魂設定」、「我是XXX」等自我介紹的廢話。\n"
+        f"2. 嚴禁加上「好的」、「以下是」等前言。\n"
+        f"3. 嚴禁修改原文中的程式碼或關鍵數值資料。\n"
+        f"4. 將原文的 'Ariel' 或 'ArielOS' 改為『{agent_name}』。\n"
+        f"5. **必須使用繁體中文 (Traditional Chinese) 回答**，即便原文是簡體或英文也必須翻譯潤飾。\n"
+        f"6. 直接輸出你改寫後的結果，絕對不要包含任何 Markdown 標記，也不要輸出 JSON。\n\n"
+        f"【待潤飾的原文】\n{raw_answer}"
+    )
+
+
+def cerebellum_style_transfer(raw_answer: str, agent_id: str, agent_registry: dict, pe,
+                              priority: str = "interactive") -> str:
+    """🚀 小腦風格轉移：將大腦的純邏輯答案轉化為代理人人格 (大腦任務收尾時以 priority="brain" 呼叫)"""
     from .personality import _sanitize_persona
     soul = pe.load_soul(agent_id)
     agent_name = agent_registry.get(agent_id, {}).get("name", "Agent")
@@ -483,17 +543,7 @@ def cerebellum_style_transfer(raw_answer: str, agent_id: str, agent_registry: di
         return _sanitize_persona(raw_answer, agent_name)
 
     # 🛡️ 如果是系統錯誤訊息或完全找不到資料，直接放行，避免 AI 套用語氣產生幻覺
-    error_signatures = [
-        "Error performing search:",
-        "Error filtering search:",
-        "Error executing programmatic data analysis:",
-        "Error in programmatic worker:",
-        "Timeout error:",
-        "程式碼執行完畢，但未",
-        "Unable to find relevant information",
-        "Traceback ("
-    ]
-    if any(sig in raw_answer for sig in error_signatures):
+    if KEYWORDS.match(raw_answer, groups=("style_error",)):
         return f"[{agent_name} 系統回報]\n{raw_answer}"
 
     if len(raw_answer) > 3000:
@@ -501,7 +551,8 @@ def cerebellum_style_transfer(raw_answer: str, agent_id: str, agent_registry: di
             intro = cerebellum_call(
                 prompt=(f"你是 {agent_name}。請用你獨特的說話風格，只寫一句話向老闆報告以下任務已完成。"
                         f"任務摘要（前200字）：{raw_answer[:200]}"),
-                temperature=0.4, timeout=120, num_ctx=1024, num_predict=60
+                temperature=0.4, timeout=120, num_ctx=1024, num_predict=60,
+                priority=priority, agent_id=agent_id, site="style_intro"
             )
             if intro:
                 return f"{_sanitize_persona(intro, agent_name)}\n\n{_sanitize_persona(raw_answer, agent_name)}"
@@ -509,26 +560,12 @@ def cerebellum_style_transfer(raw_answer: str, agent_id: str, agent_registry: di
             log(f"⚠️ 大輸出前言生成失敗: {e}")
         return _sanitize_persona(raw_answer, agent_name)
 
-    # 避免複誦角色設定與幻覺
-    instruction = (
-        f"你現在扮演『{agent_name}』。你的個性如下：\n"
-        f"【角色特質】\n{soul[:300]}\n\n"
-        f"【任務：文字潤飾】\n"
-        f"請使用你的口吻與第一人稱『我』，將下方【待潤飾的原文】重新改寫，讓它聽起來像是你說的話。\n"
-        f"【強制規則】\n"
-        f"1. 嚴禁在回答中提到「這是我的靈魂設定」、「我是XXX」等自我介紹的廢話。\n"
-        f"2. 嚴禁加上「好的」、「以下是」等前言。\n"
-        f"3. 嚴禁修改原文中的程式碼或關鍵數值資料。\n"
-        f"4. 將原文的 'Ariel' 或 'ArielOS' 改為『{agent_name}』。\n"
-        f"5. **必須使用繁體中文 (Traditional Chinese) 回答**，即便原文是簡體或英文也必須翻譯潤飾。\n"
-        f"6. 直接輸出你改寫後的結果，絕對不要包含任何 Markdown 標記，也不要輸出 JSON。\n\n"
-        f"【待潤飾的原文】\n{raw_answer}"
-    )
+    instruction = _style_transfer_prompt(raw_answer, agent_name, soul)
     try:
-        styled = cerebellum_call(prompt=instruction, temperature=0.7, timeout=120, num_ctx=4096, num_predict=600)
+        styled = cerebellum_call(prompt=instruction, temperature=0.7, timeout=120, num_ctx=4096, num_predict=600,
+                                 priority=priority, agent_id=agent_id, site="style_transfer")
         if styled:
             # 清理 Gemma 可能會產生的 ``` 標記
-            import re
             styled = re.sub(r"^```\w*\n?|\n?```$", "", styled.strip(), flags=re.MULTILINE)
             return _sanitize_persona(styled, agent_name)
     except Exception as e:
@@ -536,19 +573,108 @@ def cerebellum_style_transfer(raw_answer: str, agent_id: str, agent_registry: di
     return _sanitize_persona(raw_answer, agent_name)
 
 
+def _sanitize_stream(chunks, agent_name: str):
+    """🌊 串流版的輸出清理：移除 ``` 標記並替換 Ariel 自稱
+
+    片段尾端若是英數字或反引號，可能是被切斷的 'Ariel' / '```'，先保留到下一段再處理。
+    """
+    from .personality import _sanitize_persona
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        cut = len(pending)
+        while cut > 0 and (pending[cut - 1] == "`" or (pending[cut - 1].isascii() and pending[cut - 1].isalnum())):
+            cut -= 1
+        if cut:
+            ready = re.sub(r"```\w*\n?", "", pending[:cut])
+            pending = pending[cut:]
+            if ready:
+                yield _sanitize_persona(ready, agent_name)
+    tail = re.sub(r"```\w*\n?", "", pending)
+    if tail:
+        yield _sanitize_persona(tail, agent_name)
+
+
+def cerebellum_style_transfer_stream(raw_answer: str, agent_id: str, agent_registry: dict, pe,
+                                     priority: str = "interactive"):
+    """🌊 串流版風格轉移：規則同 cerebellum_style_transfer，但逐段 yield 潤飾結果"""
+    from .personality import _sanitize_persona
+    soul = pe.load_soul(agent_id)
+    agent_name = agent_registry.get(agent_id, {}).get("name", "Agent")
+    # 不需 LLM 潤飾的情況 (無靈魂、錯誤訊息、超長輸出) 直接沿用非串流版本
+    if not soul or len(raw_answer) > 3000 or KEYWORDS.match(raw_answer, groups=("style_error",)):
+        yield cerebellum_style_transfer(raw_answer, agent_id, agent_registry, pe, priority=priority)
+        return
+
+    instruction = _style_transfer_prompt(raw_answer, agent_name, soul)
+    emitted = False
+    try:
+        stream = cerebellum_call_stream(prompt=instruction, temperature=0.7, timeout=120, num_ctx=4096, num_predict=600,
+                                        priority=priority, agent_id=agent_id, site="style_transfer")
+        for piece in _sanitize_stream(stream, agent_name):
+            emitted = True
+            yield piece
+    except Exception as e:
+        log(f"⚠️ 串流風格轉移失敗: {e}")
+    if not emitted:
+        yield _sanitize_persona(raw_answer, agent_name)
+
+
+def _fact_cacheable(raw_fact) -> bool:
+    """錯誤訊息/查無資料的結果不進跨代理人事實快取"""
+    return bool(raw_fact) and not KEYWORDS.match(raw_fact, groups=("cache_error", "style_error"))
+
+
+def _style_shared_fact(raw_fact: str, agent_id: str, agent_registry: dict, pe, stream: bool = False,
+                       priority: str = "interactive"):
+    """♻️ 共用的原始事實只重跑 (或取用已快取的) 此代理人的人格潤飾"""
+    style = cerebellum_style_transfer_stream if stream else cerebellum_style_transfer
+    return FACT_CACHE.styled(agent_id, raw_fact, lambda r: style(r, agent_id, agent_registry, pe, priority=priority),
+                             stream=stream, cacheable=_fact_cacheable(raw_fact))
+
+
 # ── 技能路由 ──────────────────────────────────────────────────────────────────
 
-def cerebellum_skill_handler(query: str, skill_desc: str, agent_id: str, sm, agent_registry: dict, pe, **kwargs) -> str | None:
-    """🔧 Phase 13: 小腦技能路由"""
+SKILL_ROUTING_FAILED = "報告老闆，我剛才試著運算或尋找此項技能，但遭遇了連線問題或是硬體核心超時。建議您稍後重試，或是確認本機的 MCP 環境是否正常。"
+
+
+def cerebellum_skill_handler(query: str, skill_desc: str, agent_id: str, sm, agent_registry: dict, pe,
+                             stream: bool = False, raw: bool = False, priority: str = "interactive", **kwargs):
+    """🔧 Phase 13: 小腦技能路由
+
+    stream=True 時，成功結果改為風格轉移的片段 generator (見 cerebellum_style_transfer_stream)。
+    priority 沿用到風格轉移的小腦呼叫 (例行任務預熱以 "background" 呼叫)。
+    raw=True 時略過風格轉移、直接回傳技能原始輸出 (供 async_cerebellum.adispatch_skill 自行潤飾)。
+    技能在 registry 標記 "shareable": true 且沒有代理人專屬參數 (如 gas_url) 時，
+    原始輸出經 FACT_CACHE 跨代理人共用，只重跑各代理人的潤飾。
+    """
+    if raw:
+        style = lambda result, *_, **__: result
+    else:
+        style = cerebellum_style_transfer_stream if stream else cerebellum_style_transfer
+
+    def _run(skill):
+        shared = bool(skill.get("shareable")) and not any(kwargs.values())
+        if shared:
+            result, _ = FACT_CACHE.fetch(f"SKILL:{skill['name']}", query,
+                                         lambda: sm.execute_skill(skill, query), cacheable=_fact_cacheable)
+        else:
+            result = sm.execute_skill(skill, query, **kwargs)
+        if not result:
+            return None
+        if shared and not raw:
+            return _style_shared_fact(result, agent_id, agent_registry, pe, stream=stream, priority=priority)
+        return style(result, agent_id, agent_registry, pe, priority=priority)
+
     matched = sm.find_matching_skill(skill_desc)
     if matched:
         log(f"🔧 技能命中 (關鍵字): {matched['name']}")
         installed_names = [s['name'] for s in sm.list_installed()]
         if matched['name'] not in installed_names:
             sm.install_skill(matched)
-        result = sm.execute_skill(matched, query, **kwargs)
-        if result:
-            return cerebellum_style_transfer(result, agent_id, agent_registry, pe)
+        answer = _run(matched)
+        if answer:
+            return answer
 
     if not matched:
         matched = sm.find_skill_by_llm(skill_desc)
@@ -557,9 +683,9 @@ def cerebellum_skill_handler(query: str, skill_desc: str, agent_id: str, sm, age
             installed_names = [s['name'] for s in sm.list_installed()]
             if matched['name'] not in installed_names:
                 sm.install_skill(matched)
-            result = sm.execute_skill(matched, query, **kwargs)
-            if result:
-                return cerebellum_style_transfer(result, agent_id, agent_registry, pe)
+            answer = _run(matched)
+            if answer:
+                return answer
 
     log(f"🌐 線上搜尋技能: {skill_desc}")
     candidates = sm.search_skill_online(skill_desc)
@@ -567,18 +693,51 @@ def cerebellum_skill_handler(query: str, skill_desc: str, agent_id: str, sm, age
         best = candidates[0]
         log(f"📦 嘗試安裝線上技能: {best['name']}")
         if sm.install_skill(best):
-            result = sm.execute_skill(best, query, **kwargs)
-            if result:
-                return cerebellum_style_transfer(result, agent_id, agent_registry, pe)
+            answer = _run(best)
+            if answer:
+                return answer
 
     log(f"⚠️ 技能路由完全失敗: {query[:40]}...")
-    return f"報告老闆，我剛才試著運算或尋找此項技能，但遭遇了連線問題或是硬體核心超時。建議您稍後重試，或是確認本機的 MCP 環境是否正常。"
+    return SKILL_ROUTING_FAILED
 
 
 # ── Fast Track ────────────────────────────────────────────────────────────────
 
-def cerebellum_fast_track_check(query: str, agent_id: str, agent_registry: dict, pe, sm, **kwargs):
-    """🚀 小腦快車道：判斷是否為簡單對話或搜尋"""
+# ⚡ 快車道關鍵字前哨 (編譯進 modules/keyword_matcher 的共用自動機；關鍵字與提問皆經 normalize_query)
+FASTTRACK_INFO_QUERIES = [
+    "有哪些技能", "有什麼技能", "會什麼技能", "擁有哪些技能", "擁有什麼技能", "具備什麼技能",
+    "什麼功能", "有哪些功能", "技能列表", "可用技能", "那些技能", "什麼技能"
+]
+SKILL_TRIGGERS = [
+    "技能", "學習", "安裝套件", "法律", "會計", "財務", "稅務",
+    "醫療", "工程", "程式庫", "install", "learn", "skill", "tool",
+    "plugin", "模組", "套件", "功能模組", "排程", "定時任務",
+    "行程", "預約", "安排", "開會", "行事曆", "信件", "信箱", "email",
+    "schedule", "趨勢", "分析", "研究", "發展"
+]
+KEYWORDS.register("fasttrack_info", [normalize_query(kw) for kw in FASTTRACK_INFO_QUERIES])
+KEYWORDS.register("skill_triggers", [normalize_query(kw) for kw in SKILL_TRIGGERS])
+
+
+def _strip_system_context(query: str) -> str:
+    """✂️ 移除由 Agent 偷偷注入的系統背景字串 (如行事曆、GAS 資料)，避免干擾意圖判斷"""
+    pure_query = re.sub(r"\[系統資訊.*?\][\s\S]*?\[結束系統資訊\]\n*", "", query).strip()
+    return pure_query or query
+
+
+def cerebellum_classify_intent(query: str, agent_id: str, agent_registry: dict, pe, sm, llm_gate=None,
+                               priority: str = "interactive") -> tuple:
+    """🤔 小腦快車道第一階段：只判斷意圖，不執行搜尋/技能 (可與語意快取並行，結果可直接捨棄)
+
+    回傳 (intent_tag, content, source)：
+    - intent_tag：SIMPLE / SEARCH / PROGRAMMATIC / SKILL / COMPLEX；無法判斷時為 None
+    - content：SIMPLE 為完整答案，SKILL 為技能描述，其餘為模型的一句話描述
+    - source：info (技能清單) / keyword (關鍵字前哨) / clf (CPU 分類器) / llm (INTENT_MODEL) / error / cancelled
+
+    llm_gate：CPU 階段都無法決定、準備呼叫 INTENT_MODEL 前呼叫；回傳 False 時放棄分類 (不佔排程名額)，
+    前端管線以此在語意快取命中時取消仍在執行的分類。
+    priority：INTENT_MODEL 呼叫的排程優先級；非 interactive 時不加入合併批次 (批次以 interactive 執行)。
+    """
     from .personality import _get_time_context
 
     persona_context = ""
@@ -587,13 +746,15 @@ def cerebellum_fast_track_check(query: str, agent_id: str, agent_registry: dict,
         if soul:
             agent_name = agent_registry.get(agent_id, {}).get("name", "Agent")
             persona_context = f"你現在是 {agent_name}，擁有以下特質：\n{soul}\n"
+            # 路由 Prompt 只需人格摘要；整份 SOUL.md 會撐大 num_ctx 甚至被截斷
+            if len(persona_context) > 500:
+                log(f"✂️ [FastTrack] 人格設定 {len(persona_context)} 字，路由 Prompt 僅保留前 500 字")
+                persona_context = persona_context[:500] + "...\n"
 
-    # ✂️ 移除由 Agent 偷偷注入的系統背景字串 (如行事曆、GAS 資料)，避免干擾意圖判斷
-    pure_query = re.sub(r"\[系統資訊.*?\][\s\S]*?\[結束系統資訊\]\n*", "", query).strip()
-    if not pure_query:
-        pure_query = query
+    pure_query = _strip_system_context(query)
 
-    time_context = _get_time_context()
+    # 只帶日期 (不含時分秒)，讓同一天內相同提問的分類 Prompt 完全一致，可命中決定性快取
+    time_context = _get_time_context(date_only=True)
     instruction = (
         "你是一個嚴格的『意圖分類路由器』，負責標籤使用者的提問。\n"
         "你可以參考以下上下文：\n"
@@ -613,88 +774,126 @@ def cerebellum_fast_track_check(query: str, agent_id: str, agent_registry: dict,
     )
 
     # ⚡ 關鍵字前哨 (使用純淨的 User Query 避免被 Context 洗掉)
-    q_lower = pure_query.lower().replace(" ", "")
+    q_norm = normalize_query(pure_query)
     
+    hits = KEYWORDS.match(q_norm, groups=("fasttrack_info", "skill_triggers"))
+
     # 攔截資訊型詢問 (不要把「妳有哪些技能」當作執行技能的意圖)
-    info_queries = [
-        "有哪些技能", "有什麼技能", "會什麼技能", "擁有哪些技能", "擁有什麼技能", "具備什麼技能", 
-        "什麼功能", "有哪些功能", "技能列表", "可用技能", "那些技能", "什麼技能"
-    ]
-    if any(q in q_lower for q in info_queries) and (len(q_lower) < 20):
+    if "fasttrack_info" in hits and (len(q_norm) < 20):
         installed = [s['name'] for s in sm.list_installed()]
         if not installed:
             ans = "報告老闆，我目前尚無安裝額外的特殊技能。您可以隨時要求我學習或幫自己寫一個新程式來擴充能力！"
         else:
             ans = "報告老闆，我目前具備以下技能工具：\n" + "\n".join([f"- {n}" for n in installed]) + "\n\n若上述沒有您需要的，您可以隨時命令我自動開發或上網學習新技能！"
         # ⚠️ 直接回傳，不經過風格轉移，避免 LLM 把陣列轉成奇怪的格式 (如 ['Agent', 'Agent'])
-        return ("SIMPLE", ans)
-
-    SKILL_TRIGGERS = [
-        "技能", "學習", "安裝套件", "法律", "會計", "財務", "稅務",
-        "醫療", "工程", "程式庫", "install", "learn", "skill", "tool",
-        "plugin", "模組", "套件", "功能模組", "排程", "定時任務",
-        "行程", "預約", "安排", "開會", "行事曆", "信件", "信箱", "email",
-        "schedule", "趨勢", "分析", "研究", "發展"
-    ]
-    if any(kw in q_lower for kw in SKILL_TRIGGERS):
+        return ("SIMPLE", ans, "info")
+
+    if "skill_triggers" in hits:
         log(f"⚡ [FastTrack] 關鍵字前哨命中 → [SKILL]: '{pure_query[:40]}'")
-        skill_result = cerebellum_skill_handler(pure_query, pure_query, agent_id, sm, agent_registry, pe, **kwargs)
-        if skill_result:
-            return ("SKILL", skill_result)
-        log(f"⚠️ [FastTrack] 技能路由失敗，降級至大腦")
-        return (None, None)
+        return ("SKILL", pure_query, "keyword")
 
     try:
         log(f"🤔 [FastTrack] 正在進行意圖分類...")
-        if persona_context and len(persona_context) > 500:
-            persona_context = persona_context[:500] + "...\n"
-        # 🛡️ 調低 Temperature 並嚴格化回傳格式，優先使用 INTENT_MODEL (加速意圖分類)
-        result = cerebellum_call(prompt=instruction, temperature=0, timeout=120, num_ctx=2048, num_predict=80, model=INTENT_MODEL)
+        # 🧮 CPU 分類器高信心時直接決定路由 (技能描述沿用原提問)，不呼叫 INTENT_MODEL
+        learned = INTENT_CLF.predict(pure_query)
+        if learned:
+            log(f"🧮 [FastTrack] CPU 分類器判定 [{learned[0]}] (信心 {learned[1]:.2f})")
+            return (learned[0], pure_query, "clf")
+
+        if llm_gate is not None and not llm_gate():
+            log("⏭️ [FastTrack] 已由快取回答，略過 LLM 意圖分類")
+            return (None, "", "cancelled")
+
+        # 📦 尖峰時段與同時到達的其他請求合併分類；未開啟、只有單題或解析失敗時回傳 None
+        agent_name = agent_registry.get(agent_id, {}).get("name", "") if agent_id else ""
+        result = INTENT_BATCHER.classify(pure_query, agent_name) if priority == "interactive" else None
+        if result is None:
+            # 🛡️ 調低 Temperature 並嚴格化回傳格式，優先使用 INTENT_MODEL (加速意圖分類)
+            result = cerebellum_call(prompt=instruction, temperature=0, timeout=120, num_ctx=2048, num_predict=80,
+                                     model=INTENT_MODEL, priority=priority, agent_id=agent_id, site="intent")
         log(f"🎯 [FastTrack] 分類結果: {result[:50]}")
 
         # 🚀 使用 Regex 進行更強健的解析，防止 LLM 多話
         intent_match = re.search(r"\[(SIMPLE|SEARCH|PROGRAMMATIC|SKILL|COMPLEX)\]", result)
         if not intent_match:
             log(f"⚠️ [FastTrack] 解析失敗，模型回傳非法格式: {result[:40]}")
-            return (None, None)
-        
+            return (None, "", "llm")
+
         intent_tag = intent_match.group(1)
-        raw_content = re.sub(r"\[.*?\]", "", result, count=1).strip()
+        INTENT_CLF.record_label(pure_query, intent_tag)  # LLM 分類結果作為 CPU 分類器的訓練標籤
+        return (intent_tag, re.sub(r"\[.*?\]", "", result, count=1).strip(), "llm")
+    except Exception as e:
+        log(f"⚠️ 小腦快車道異常: {e}")
+        return (None, "", "error")
+
 
+def cerebellum_fast_track_execute(query: str, intent: tuple, agent_id: str, agent_registry: dict, pe, sm,
+                                  stream: bool = False, priority: str = "interactive", **kwargs):
+    """🚀 小腦快車道第二階段：依 cerebellum_classify_intent 的結果執行搜尋/程式化分析/技能
+
+    stream=True 時，SEARCH / PROGRAMMATIC / SKILL 的答案改為片段 generator，
+    由 /v1/chat/completions 以 SSE 逐段送出；SIMPLE 仍回傳字串 (分類時已產生完整答案)。
+    priority 沿用到程式化分析、技能路由與風格轉移的小腦呼叫。
+    回傳 (intent_type, answer)；(None, None) 代表交給大腦。
+    """
+    style = cerebellum_style_transfer_stream if stream else cerebellum_style_transfer
+    from .personality import _get_time_context
+    intent_tag, content, source = intent
+
+    try:
         if intent_tag == "SIMPLE":
-            answer = raw_content
-            _set_cerebellum_simple_cache(query, answer)
-            return ("SIMPLE", answer)
+            if source == "llm":
+                _set_cerebellum_simple_cache(query, content)
+            return ("SIMPLE", content)
+
+        if intent_tag == "SKILL" and source == "keyword":
+            pure_query = _strip_system_context(query)
+            skill_result = cerebellum_skill_handler(pure_query, pure_query, agent_id, sm, agent_registry, pe, stream=stream,
+                                                    priority=priority, **kwargs)
+            if skill_result:
+                return ("SKILL", skill_result)
+            log(f"⚠️ [FastTrack] 技能路由失敗，降級至大腦")
+            return (None, None)
 
         if intent_tag == "SEARCH":
+            # ♻️ 搜尋結果與代理人無關：同一提問在 FACT_CACHE_TTL 內只搜尋一次，各代理人只重跑人格潤飾
+            # 快取 key 與實際搜尋都用去掉系統背景 (行事曆、GAS 資料等代理人專屬內容) 的提問
+            # 搜尋走 asyncio 版：先成功的 AI 摘要探針直接回傳，不必等較慢的探針 (Playwright) 結束
             time_hint = _get_time_context().strip()
-            raw_fact = search_web_worker(f"{time_hint}\n{query}")
-            return ("SEARCH", cerebellum_style_transfer(raw_fact, agent_id, agent_registry, pe))
+            pure_query = _strip_system_context(query)
+            raw_fact, _ = FACT_CACHE.fetch("SEARCH", pure_query,
+                                           lambda: run_async(asearch_web(f"{time_hint}\n{pure_query}")),
+                                           cacheable=_fact_cacheable)
+            return ("SEARCH", _style_shared_fact(raw_fact, agent_id, agent_registry, pe, stream=stream, priority=priority))
 
         if intent_tag == "PROGRAMMATIC":
-            raw_fact = programmatic_data_worker(query)
-            return ("PROGRAMMATIC", cerebellum_style_transfer(raw_fact, agent_id, agent_registry, pe))
+            raw_fact = programmatic_data_worker(query, priority=priority)
+            return ("PROGRAMMATIC", style(raw_fact, agent_id, agent_registry, pe, priority=priority))
 
         if intent_tag == "SKILL":
-            skill_desc = raw_content
+            skill_desc = content
             log(f"🔧 偵測到技能需求: {skill_desc}")
-            skill_result = cerebellum_skill_handler(query, skill_desc, agent_id, sm, agent_registry, pe, **kwargs)
+            skill_result = cerebellum_skill_handler(query, skill_desc, agent_id, sm, agent_registry, pe, stream=stream,
+                                                    priority=priority, **kwargs)
             if skill_result:
                 return ("SKILL", skill_result)
             return (None, None)
-        
-        if intent_tag == "COMPLEX":
-            return (None, None)
 
     except Exception as e:
         log(f"⚠️ 小腦快車道異常: {e}")
     return (None, None)
 
 
+def cerebellum_fast_track_check(query: str, agent_id: str, agent_registry: dict, pe, sm, stream: bool = False, **kwargs):
+    """🚀 小腦快車道：判斷是否為簡單對話或搜尋 (分類 + 執行；回傳格式見 cerebellum_fast_track_execute)"""
+    intent = cerebellum_classify_intent(query, agent_id, agent_registry, pe, sm)
+    return cerebellum_fast_track_execute(query, intent, agent_id, agent_registry, pe, sm, stream=stream, **kwargs)
+
+
 # ── 上下文蒸餾 ────────────────────────────────────────────────────────────────
 
-def cerebellum_distill_context(raw_context: str, task_query: str) -> str:
-    """🧪 上下文蒸餾器 (Context Distillation)"""
+def cerebellum_distill_context(raw_context: str, task_query: str, agent_id: str = None) -> str:
+    """🧪 上下文蒸餾器 (Context Distillation，於大腦任務內執行，排程優先級為 brain)"""
     if not raw_context or len(raw_context.strip()) < 100:
         return raw_context
     prompt = (
@@ -708,7 +907,8 @@ def cerebellum_distill_context(raw_context: str, task_query: str) -> str:
         f"【原始對話記錄】\n{raw_context[:1500]}"
     )
     try:
-        distilled = cerebellum_call(prompt=prompt, temperature=0.1, timeout=120, num_ctx=3072, num_predict=300)
+        distilled = cerebellum_call(prompt=prompt, temperature=0.1, timeout=120, num_ctx=3072, num_predict=300,
+                                    priority="brain", agent_id=agent_id, site="distill")
         if distilled and len(distilled) > 20:
             log(f"🧪 [蒸餾] 上下文壓縮 {len(raw_context)} → {len(distilled)} 字元")
             return f"[蒸餾技術狀態]\n{distilled}\n"
@@ -727,7 +927,8 @@ def analyze_task_intent(title: str) -> dict:
         "- 'priority': 'high' (Urgent/Fix/Error), 'medium', or 'low'\nOutput JSON only."
     )
     try:
-        raw = cerebellum_call(prompt=instruction, temperature=0.2, timeout=120, num_ctx=1024, num_predict=100)
+        raw = cerebellum_call(prompt=instruction, temperature=0, timeout=120, num_ctx=1024, num_predict=100,
+                              site="task_intent")
         json_str = re.search(r"\{.*\}", raw, re.DOTALL).group(0)
         return json.loads(json_str)
     except:
@@ -736,11 +937,16 @@ def analyze_task_intent(title: str) -> dict:
 
 # ── 快取更新 ──────────────────────────────────────────────────────────────────
 
+_CACHE_ERROR_KEYWORDS = ["Gateway Agent 失敗", "Rate limit", "Error", "Exception", "Traceback",
+                         "429 Too Many Requests", "500 Internal Server Error"]
+_SHORT_TTL_KEYWORDS = ["天氣", "路況", "氣溫", "現在"]   # 時效性高的提問只快取 30 分鐘
+KEYWORDS.register("cache_error", _CACHE_ERROR_KEYWORDS)
+KEYWORDS.register("short_ttl", _SHORT_TTL_KEYWORDS)
+
+
 def update_cache(query: str, raw_answer: str):
     """🚀 背景任務：小腦蒸餾與快取寫入"""
-    error_keywords = ["Gateway Agent 失敗", "Rate limit", "Error", "Exception", "Traceback",
-                      "429 Too Many Requests", "500 Internal Server Error"]
-    if any(k in raw_answer for k in error_keywords):
+    if KEYWORDS.match(raw_answer, groups=("cache_error",)):
         log(f"⚠️ 偵測到錯誤訊息，跳過快取寫入: {raw_answer[:50]}...")
         return
 
@@ -750,20 +956,10 @@ def update_cache(query: str, raw_answer: str):
         f"2. 去除不必要的寒暄，保留核心資訊。\n\n{raw_answer}"
     )
     try:
-        summary = cerebellum_call(prompt=prompt, temperature=0.3, timeout=150, num_ctx=4096, num_predict=512)
-        ttl = 30 if any(k in query for k in ["天氣", "路況", "氣溫", "現在"]) else 480
-        expires = (datetime.datetime.now() + datetime.timedelta(minutes=ttl)).isoformat()
-
-        data = {"records": []}
-        if CACHE_PATH.exists():
-            with open(CACHE_PATH, "r", encoding="utf-8") as f:
-                try: data = json.load(f)
-                except: data = {"records": []}
-
-        data['records'].append({"query": query, "summary": summary, "expires_at": expires})
-        data['records'] = data['records'][-50:]
-        with open(CACHE_PATH, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        summary = cerebellum_call(prompt=prompt, temperature=0.3, timeout=150, num_ctx=4096, num_predict=512,
+                                  priority="background", site="cache_summary")
+        ttl = 30 if KEYWORDS.match(query, groups=("short_ttl",)) else 480
+        ANSWER_STORE.put(query, summary, ttl=ttl * 60)
         log("✅ 快取已更新。")
     except Exception as e:
         log(f"❌ 蒸餾失敗: {e}")
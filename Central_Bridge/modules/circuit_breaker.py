@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+modules/circuit_breaker.py — ArielOS 模型斷路器
+
+主要模型未安裝或過載時，原本每個請求都要等滿 timeout (最長 180s) 才降級到備用模型。
+每個模型各有一個斷路器：
+  closed    → 正常呼叫；連續失敗 BREAKER_FAILURE_THRESHOLD 次後斷路
+  open      → 直接略過此模型，請求改走其他健康模型；BREAKER_OPEN_SECONDS 後進入半開
+  half_open → 背景執行探針 (/api/tags + 1 token generate)，成功則恢復 closed，失敗則重新 open
+
+探針在背景執行緒進行，真正的請求永遠不需要等待探針。
+
+包含：CircuitBreaker, ModelBreakers, BREAKERS (全域單例)
+"""
+
+import time
+import threading
+
+from .config import BREAKER_FAILURE_THRESHOLD, BREAKER_OPEN_SECONDS, log
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    """單一模型的斷路器"""
+
+    def __init__(self, model: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 open_seconds: float = BREAKER_OPEN_SECONDS):
+        self.model = model
+        self.failure_threshold = max(1, failure_threshold)
+        self.open_seconds = open_seconds
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self._failures = 0          # 連續失敗次數
+        self._opened_at = 0.0
+        self._last_error = ""
+        self._trips = 0
+        self._probes = 0
+        self._total_failures = 0
+        self._total_successes = 0
+
+    def allow(self, prober) -> bool:
+        """此模型目前可否接受請求；斷路時間已到則啟動背景探針 (prober(model) -> bool)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+                threading.Thread(target=self._probe, args=(prober,), daemon=True).start()
+            return False
+
+    def _probe(self, prober):
+        ok = False
+        try:
+            ok = bool(prober(self.model))
+        except Exception as e:
+            self._last_error = str(e)[:200]
+        with self._lock:
+            self._probes += 1
+            if ok:
+                self.state = CLOSED
+                self._failures = 0
+            else:
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+        if ok:
+            log(f"✅ [Breaker] {self.model} 探針成功，恢復服務")
+        else:
+            log(f"🔌 [Breaker] {self.model} 探針失敗，維持斷路 {self.open_seconds}s")
+
+    def record_success(self):
+        with self._lock:
+            self._total_successes += 1
+            self._failures = 0
+            self.state = CLOSED
+
+    def record_failure(self, error: Exception):
+        with self._lock:
+            self._total_failures += 1
+            self._failures += 1
+            self._last_error = str(error)[:200]
+            failures = self._failures
+            tripped = self.state == CLOSED and failures >= self.failure_threshold
+            if tripped:
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+                self._trips += 1
+        if tripped:
+            log(f"🔌 [Breaker] {self.model} 連續失敗 {failures} 次，斷路 {self.open_seconds}s: {str(error)[:80]}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            retry_in = 0.0
+            if self.state == OPEN:
+                retry_in = max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+            return {
+                "state": self.state,
+                "consecutive_failures": self._failures,
+                "trips": self._trips,
+                "probes": self._probes,
+                "failures": self._total_failures,
+                "successes": self._total_successes,
+                "retry_in_s": round(retry_in, 1),
+                "last_error": self._last_error,
+            }
+
+
+class ModelBreakers:
+    """依模型名稱取得 (或建立) 斷路器"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(model)
+            if breaker is None:
+                breaker = self._breakers[model] = CircuitBreaker(model)
+            return breaker
+
+    def routable(self, candidates: list[str], prober) -> list[str]:
+        """過濾掉斷路中的模型，保留原本的嘗試順序"""
+        return [m for m in candidates if self.get(m).allow(prober)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {b.model: b.stats() for b in breakers}
+
+
+# 全域單例
+BREAKERS = ModelBreakers()
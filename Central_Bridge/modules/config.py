@@ -6,14 +6,13 @@ modules/config.py — ArielOS 集中配置模組
 更換模型或調整路徑只需修改此單一檔案。
 """
 
-import requests
 import datetime
 import time
 from pathlib import Path
 
 # ── 路徑配置 ─────────────────────────────────────────────────────────────────
 BASE_DIR = Path.home() / "Ariel_System"
-CACHE_PATH = BASE_DIR / "Shared_Vault" / "cache_buffer.json"
+CACHE_PATH = BASE_DIR / "Shared_Vault" / "cache_buffer.json"   # 舊版答案快取，僅供 AnswerStore 首次匯入
 CACHE_PATH.parent.mkdir(exist_ok=True, parents=True)
 KANBAN_DB_PATH = BASE_DIR / "Shared_Vault" / "kanban.json"
 AGENTS_CONFIG_PATH = BASE_DIR / "Shared_Vault" / "agents.json"
@@ -22,7 +21,12 @@ DATA_SANDBOX_PATH = BASE_DIR / "Shared_Vault" / "data_sandbox"
 DATA_SANDBOX_PATH.mkdir(exist_ok=True, parents=True)
 
 # ── Ollama API ────────────────────────────────────────────────────────────────
-OLLAMA_API = "http://127.0.0.1:11434/api/generate"
+OLLAMA_HOST = "http://127.0.0.1:11434"
+OLLAMA_API = f"{OLLAMA_HOST}/api/generate"
+
+# 連線池：所有小腦呼叫共用 keep-alive 連線，避免每次請求重新握手
+OLLAMA_POOL_MAXSIZE = 8       # 每個 Ollama 主機最多同時保持的連線數 (超過則排隊等待)
+OLLAMA_CONNECT_RETRIES = 2    # 僅重試連線層級錯誤 (拒絕連線/重置)，讀取逾時直接走模型降級
 
 # ── 模型配置 (集中管理，更換模型只需改此處) ──────────────────────────────────
 # 小腦：使用 instruction-tuned + q4_K_M 量化版，速度比預設版快 ~30%
@@ -39,13 +43,123 @@ CEREBELLUM_FALLBACK_MODEL = "gemma3:4b"
 # Dispatcher 角色扮演任務也用小腦模型即可
 DISPATCHER_MODEL = "gemma3:4b-it-q4_K_M"
 
+# ── 小腦呼叫排程 (優先級：interactive > brain > background) ─────────────────
+LLM_MAX_CONCURRENCY = 2        # 同時送往 Ollama 的小腦呼叫總數
+LLM_MODEL_CONCURRENCY = {}     # 個別模型上限，例如 {"gemma3:4b-it-q4_K_M": 1}；未列出者以總數為上限
+LLM_INTERACTIVE_RESERVED = 1   # 保留給互動請求的名額，brain / background 工作不可佔滿
+
+# ── 大腦執行員池 (多個 brain_worker + 代理人公平排程) ──────────────────────
+BRAIN_WORKERS = 2                   # 同時執行的大腦任務數 (每個任務最長約 280 秒 × 3 次重試)
+BRAIN_AGENT_MAX_CONCURRENCY = 1     # 單一代理人同時佔用的執行員上限，避免一位代理人塞滿整個池
+BRAIN_AGENT_CONCURRENCY = {}        # 個別代理人上限，例如 {"agent1": 2}；未列出者以 BRAIN_AGENT_MAX_CONCURRENCY 為準
+BRAIN_AGENT_WEIGHTS = {}            # 加權公平排程的權重，例如 {"agent1": 2}；未列出者權重為 1
+BRAIN_PRIORITY_AGING_SECONDS = 300  # 優先級老化：每等待這麼多秒提升一級 (low 最多 10 分鐘後與 high 同級)，避免低優先任務餓死
+
+# ── 模型常駐規劃 (低 VRAM 主機：減少 Ollama 反覆卸載/載入權重) ────────────────
+OLLAMA_MAX_LOADED_MODELS = 1       # 與 Ollama 伺服器端的 OLLAMA_MAX_LOADED_MODELS 一致；VRAM 足夠時可設 2 讓意圖/小腦模型同時常駐
+MODEL_KEEP_ALIVE_DEFAULT = 1800    # 秒：主力模型閒置後保留 30 分鐘 (負值 = 永久常駐)
+MODEL_KEEP_ALIVE = {CEREBELLUM_FALLBACK_MODEL: 120}  # 備用模型用完盡快釋放 VRAM，讓主力模型回來
+MODEL_COLD_LOAD_ALLOWANCE = 60     # 秒：目標模型未常駐時額外放寬的逾時 (載入權重不算推論延遲，冷啟動不應觸發斷路)
+LLM_RESIDENCY_MAX_BATCH = 4        # 同一常駐模型最多連續優先幾次，避免其他模型的排隊請求餓死
+
+# ── 模型斷路器 (模型故障時直接改走健康模型，不再每次等滿 timeout) ─────────────
+BREAKER_FAILURE_THRESHOLD = 3      # 連續失敗幾次後斷路 (open)
+BREAKER_OPEN_SECONDS = 30          # 斷路多久後進入半開 (half-open)，由背景探針檢查
+BREAKER_PROBE_TIMEOUT = 20         # 探針 (1 token generate) 逾時秒數
+
+# ── 啟動暖機 (並行預載模型與編碼器，避免第一個請求承擔冷啟動) ───────────────
+WARMUP_TIMEOUT = 300               # 秒：單一模型預載逾時 (低階主機首次從硬碟載入權重可能很慢)
+
+# ── 自適應逾時 (依各模型/呼叫點的實測延遲 p99 推算 deadline) ──────────────────
+ADAPTIVE_TIMEOUT_ENABLED = True
+ADAPTIVE_TIMEOUT_WINDOW = 200          # 每個 (模型, 呼叫點) 保留最近幾筆延遲樣本
+ADAPTIVE_TIMEOUT_MIN_SAMPLES = 20      # 樣本不足前沿用呼叫點原本寫死的 timeout
+ADAPTIVE_TIMEOUT_MULTIPLIER = 2.0      # deadline = p99 × 倍數
+ADAPTIVE_TIMEOUT_FLOOR = 5             # 秒：deadline 下限
+ADAPTIVE_TIMEOUT_CEILING = 300         # 秒：deadline 上限
+ADAPTIVE_TIMEOUT_BOUNDS = {            # 個別呼叫點的 (下限, 上限)，未列出者用上面的預設值
+    "keywords": (5, 30),
+    "semantic_judge": (5, 60),
+    "intent": (5, 120),
+}
+
+# ── Token 預算 (依 Prompt 長度挑選 num_ctx，短 Prompt 不配置過大的 KV Cache) ──────
+TOKEN_BUDGET_ENABLED = True
+NUM_CTX_BUCKETS = (512, 1024, 2048, 4096, 8192)   # 最大級距即為上限，超出則記錄截斷量
+TOKEN_BUDGET_MARGIN = 64           # 估算誤差的安全餘量 (tokens)
+TOKEN_BUDGET_STICKY_DECAY = 1800   # 秒：各模型的 num_ctx 只升不降，這麼久沒用到目前級距才降一級 (num_ctx 改變會讓 Ollama 重新載入 runner)
+
+# ── 意圖分類微批次 (尖峰時段把同時到達的分類請求合併成一次呼叫) ────────────────
+INTENT_BATCH_ENABLED = False       # 預設關閉：單一使用者時只會多等一個收集視窗
+INTENT_BATCH_WINDOW_MS = 30        # 領頭請求等待其他請求加入的時間 (毫秒)
+INTENT_BATCH_MAX = 8               # 單一批次最多幾題 (過多會拉長輸出、降低分類品質)
+
+# ── CPU 意圖分類器 (字元 n-gram 單純貝氏，高信心時跳過 LLM 路由) ─────────────
+INTENT_CLF_ENABLED = True
+INTENT_CLF_THRESHOLD = 0.9         # 後驗機率達此值才直接採用，否則交給 INTENT_MODEL
+INTENT_CLF_MIN_SAMPLES = 200       # 標籤樣本不足時不訓練 (維持全部走 LLM)
+INTENT_CLF_MODEL_PATH = BASE_DIR / "Shared_Vault" / "intent_classifier.json"
+INTENT_LABELS_PATH = BASE_DIR / "Shared_Vault" / "intent_labels.jsonl"
+
+# ── 脊髓反射規則 (資料驅動，修改後自動重新載入) ──────────────────────────────
+REFLEX_RULES_PATH = BASE_DIR / "Shared_Vault" / "reflex_rules.json"
+REFLEX_RELOAD_INTERVAL = 2         # 秒：檢查規則檔 mtime 的間隔
+
+# ── 小腦決定性呼叫快取 (temperature=0 的呼叫結果落地，重啟後仍有效) ─────────
+LLM_CACHE_ENABLED = True
+LLM_CACHE_PATH = BASE_DIR / "Shared_Vault" / "llm_cache.db"
+LLM_CACHE_TTL = 24 * 3600          # 秒：單筆結果有效期限
+LLM_CACHE_MAX_ENTRIES = 5000       # 超過則淘汰最久未使用 (LRU)
+LLM_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# ── SIMPLE 意圖答案快取 (記憶體 LRU + TTL；key 經正規化) ────────────────────
+SIMPLE_CACHE_TTL = 300             # 秒：5 分鐘內相同問題直接命中
+SIMPLE_CACHE_MAX_ENTRIES = 2048    # 超過則淘汰最久未使用 (LRU)
+
+# ── 答案快取儲存層 (取代 cache_buffer.json；SQLite + 記憶體熱層) ─────────────
+ANSWER_STORE_PATH = BASE_DIR / "Shared_Vault" / "answer_cache.db"
+ANSWER_STORE_MAX_ENTRIES = 50000   # 超過則淘汰最舊的記錄
+ANSWER_STORE_HOT_SIZE = 1024       # 記憶體 LRU 保留的答案筆數
+
+# ── 向量語意答案快取 (取代字元重疊 + LLM 判定) ───────────────────────────────
+SEMANTIC_CACHE_THRESHOLD = 0.90            # 餘弦相似度門檻 (校正檔存在時以校正值為準)
+SEMANTIC_CACHE_TARGET_PRECISION = 0.98     # 校正時要求的命中精確率
+SEMANTIC_CACHE_CALIBRATION_PATH = BASE_DIR / "Shared_Vault" / "semantic_cache_calibration.json"
+SEMANTIC_CACHE_ENTITY_GUARD = True         # 數字、英文詞、地點/時間詞必須完全相同才可命中
+SEMANTIC_CACHE_ENTITY_TERMS = [
+    "台北", "臺北", "新北", "桃園", "台中", "臺中", "台南", "臺南", "高雄", "基隆", "新竹", "嘉義",
+    "苗栗", "彰化", "南投", "雲林", "屏東", "宜蘭", "花蓮", "台東", "臺東", "澎湖", "金門", "馬祖",
+    "東京", "大阪", "首爾", "香港", "上海", "北京", "紐約", "倫敦", "美國", "日本", "韓國", "中國", "歐洲",
+    "今天", "明天", "後天", "昨天", "本週", "上週", "下週", "本月", "上個月", "下個月",
+]
+
+# ── 跨代理人事實快取 (搜尋/技能原始結果共用一份，只重跑各自的人格潤飾) ────────
+FACT_CACHE_ENABLED = True
+FACT_CACHE_TTL = 600                  # 原始結果與潤飾版本的存活秒數 (天氣/新聞/匯率時效短)
+FACT_CACHE_MAX_ENTRIES = 512          # 原始結果筆數上限
+FACT_CACHE_STYLED_MAX_ENTRIES = 1024  # 各代理人潤飾版本筆數上限
+
+# ── 對話前端管線 (語意快取與意圖分類並行) ────────────────────────────────────
+FRONTEND_POOL_WORKERS = 32         # 每個對話請求同時佔用 2 條 (快取 + 分類)；Waitress 為 16 條執行緒
+CHAT_DEBUG_HEADERS = True          # 回應附上 Server-Timing (各階段毫秒) 與 X-ArielOS-Path (命中路徑)
+
+# ── 例行任務預熱 (routines.json 到點前先跑搜尋/技能，結果保留到排定時間取用) ─
+ROUTINE_WARM_ENABLED = True
+ROUTINE_WARM_LEAD_MINUTES = 10     # 排定時間前幾分鐘開始預熱
+ROUTINE_WARM_GRACE_MINUTES = 30    # 預熱結果在排定時間後仍保留的分鐘數 (快取 TTL)
+ROUTINE_WARM_IDLE_SECONDS = 120    # 最近這麼多秒內有對話視為忙碌，暫緩預熱
+
+# ── 對話路徑成效指標 (/v1/metrics) ───────────────────────────────────────────
+METRICS_MISS_BASELINE_SECONDS = 8.0   # 尚無完整處理樣本時，估算「未命中要花多久」的預設值
+
 # ── 閒置門檻 ─────────────────────────────────────────────────────────────────
 IDLE_THRESHOLD = 1800  # 秒：30 分鐘無活動則觸發好奇心
 
 # ── 工具函式 ─────────────────────────────────────────────────────────────────
 def ollama_post(url, json, timeout=120):
-    """Thread-safe Ollama post."""
-    return requests.post(url, json=json, timeout=timeout)
+    """Thread-safe Ollama post (經由 modules/ollama_client 的共用連線池)."""
+    from .ollama_client import OLLAMA
+    return OLLAMA.post(url, json=json, timeout=timeout)
 
 
 def log(msg):
@@ -16,6 +16,8 @@ from pathlib import Path
 from .config import BASE_DIR, OLLAMA_API, ROUTINES_PATH, log, ollama_post
 from .cerebellum import cerebellum_call
 from .vector_memory import VM  # 向量記憶層
+from .intent_classifier import INTENT_CLF
+from .routine_warmer import ROUTINE_WARMER, routine_id
 
 
 # ── 生命感知工具 ──────────────────────────────────────────────────────────────
@@ -55,7 +57,10 @@ def generate_evolution_directive(agent_id: str, failed_task: str, error_msg: str
             temperature=0.2,
             timeout=30,
             num_ctx=2048,
-            num_predict=100
+            num_predict=100,
+            priority="background",
+            agent_id=agent_id,
+            site="evolution_directive"
         )
         agent_dir = AGENT_REGISTRY.get(agent_id, {}).get("dir")
         if agent_dir:
@@ -135,7 +140,10 @@ def perform_night_distillation(agent_registry: dict, mm, pe) -> str:
                 temperature=0.3,
                 timeout=120,
                 num_ctx=4096,
-                num_predict=300
+                num_predict=300,
+                priority="background",
+                agent_id=aid,
+                site="night_facts"
             )
         except Exception as e:
             log(f"⚠️ Night Mode 萃取失敗: {e}")
@@ -193,7 +201,8 @@ def perform_night_distillation(agent_registry: dict, mm, pe) -> str:
             try:
                 bio_entry = cerebellum_call(
                     prompt=bio_prompt, temperature=0.75, timeout=180,
-                    num_ctx=2048, num_predict=200
+                    num_ctx=2048, num_predict=200,
+                    priority="background", agent_id=aid, site="biography"
                 )
                 if bio_entry:
                     with open(biography_path, "a", encoding="utf-8") as f:
@@ -225,18 +234,21 @@ def trigger_curiosity_idea(agent_registry: dict, task_queue, last_activity_time_
         "只給出這句指令文本，不要加任何其他廢話或解釋。"
     )
     try:
-        idea = cerebellum_call(prompt=prompt, temperature=0.8, timeout=180, num_ctx=2048, num_predict=150)
+        idea = cerebellum_call(prompt=prompt, temperature=0.8, timeout=180, num_ctx=2048, num_predict=150,
+                               priority="background", agent_id=agent_id, site="curiosity")
         if idea:
             log(f"💡 [Curiosity Idea] {idea}")
             task_id = f"task_idle_{int(time.time())}"
-            task_queue.put({"id": task_id, "agent_id": agent_id, "content": idea, "kanban_task_id": None})
+            task_queue.put({"id": task_id, "agent_id": agent_id, "content": idea, "kanban_task_id": None,
+                            "priority": "low"})
             log(f"📥 Curiosity Task 已加入工作佇列 {task_id}")
     except Exception as e:
         log(f"⚠️ Curiosity 發想異常: {e}")
 
 
-def scheduler_worker(perform_night_fn, trigger_curiosity_fn, km, task_queue, last_activity_time_ref: list):
-    """L3: 自動排程器 - 夜間蒸餾、閒置進化、Watcher 例行任務"""
+def scheduler_worker(perform_night_fn, trigger_curiosity_fn, km, task_queue, last_activity_time_ref: list,
+                     warm_routine_fn=None):
+    """L3: 自動排程器 - 夜間蒸餾、閒置進化、Watcher 例行任務 (warm_routine_fn 提供時，到點前先預熱)"""
     import uuid
     last_run_date = ""
     last_routine_check = ""
@@ -254,25 +266,41 @@ def scheduler_worker(perform_night_fn, trigger_curiosity_fn, km, task_queue, las
                 last_run_date = current_date
             except Exception as e:
                 log(f"🚨 自動排程異常: {e}")
+            try:
+                INTENT_CLF.train()  # 以當日累積的路由標籤重新訓練 CPU 意圖分類器
+            except Exception as e:
+                log(f"⚠️ 意圖分類器重新訓練失敗: {e}")
 
         if time.time() - last_activity_time_ref[0] > IDLE_THRESHOLD:
             trigger_curiosity_fn()
 
+        routines = []
+        if ROUTINES_PATH.exists():
+            try:
+                with open(ROUTINES_PATH, "r", encoding="utf-8") as f:
+                    routines = json.load(f).get("routines", [])
+            except Exception as e:
+                log(f"⚠️ Watcher 例行任務讀取失敗: {e}")
+
         if current_time != last_routine_check:
             last_routine_check = current_time
-            if ROUTINES_PATH.exists():
-                try:
-                    with open(ROUTINES_PATH, "r", encoding="utf-8") as f:
-                        routines = json.load(f)
-                    for routine in routines.get("routines", []):
-                        r_time = routine.get("time")
-                        r_agent = routine.get("agent_id")
-                        r_task = routine.get("task")
-                        if r_time == current_time and r_agent and r_task:
-                            log(f"⏰ [Watcher] 觸發 {r_agent} 的例行任務: {r_task}")
-                            kanban_entry = km.add_task(title=r_task[:80], agent_id=r_agent, status="todo", priority="high")
-                            task_queue.put({"id": str(uuid.uuid4()), "content": r_task, "agent_id": r_agent, "kanban_task_id": kanban_entry["id"]})
-                except Exception as e:
-                    log(f"⚠️ Watcher 例行任務讀取失敗: {e}")
+            for routine in routines:
+                r_time = routine.get("time")
+                r_agent = routine.get("agent_id")
+                r_task = routine.get("task")
+                if r_time == current_time and r_agent and r_task:
+                    log(f"⏰ [Watcher] 觸發 {r_agent} 的例行任務: {r_task}")
+                    kanban_entry = km.add_task(title=r_task[:80], agent_id=r_agent, status="todo", priority="high")
+                    run_at = now.replace(second=0, microsecond=0).isoformat()
+                    task_queue.put({"id": str(uuid.uuid4()), "content": r_task, "agent_id": r_agent,
+                                    "kanban_task_id": kanban_entry["id"], "routine": True, "priority": "high",
+                                    "routine_id": routine_id(routine), "run_at": run_at})
+
+        # 🔥 到點前預熱搜尋/技能結果 (背景執行緒，系統忙碌時暫緩)
+        if warm_routine_fn and routines:
+            try:
+                ROUTINE_WARMER.tick(routines, warm_routine_fn, task_queue, last_activity_time_ref[0])
+            except Exception as e:
+                log(f"⚠️ 例行任務預熱排程異常: {e}")
 
         time.sleep(30)
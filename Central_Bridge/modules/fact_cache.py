@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+modules/fact_cache.py — ArielOS 跨代理人事實快取 (原始結果共用、人格潤飾分開)
+
+Jessie 與 Mandy 常被問到同樣的事實問題 (天氣、新聞、匯率)，
+原本每位代理人各自跑一次完整搜尋 + cerebellum_style_transfer。
+
+本模組把快車道拆成兩層：
+  - 事實層：搜尋/技能的原始結果與代理人無關，以 (類型, 正規化提問) 為 key 只存一份；
+    多位代理人同時問同一件事時以 SingleFlight 合併，只搜尋一次
+  - 潤飾層：以 (代理人, 原始結果雜湊) 為 key 保存各代理人的潤飾版本；
+    同一位代理人再問直接取用，另一位代理人只需重跑自己的人格潤飾
+
+兩層共用 FACT_CACHE_TTL (預設 10 分鐘)；原始結果更新後雜湊改變，舊的潤飾版本自然不會再被取用。
+是否可快取 (錯誤訊息不快取) 由呼叫端判斷；技能需在 skills_registry.json 標記 "shareable": true
+才會共用 (見 cerebellum_skill_handler)。
+
+包含：FactCache, FACT_CACHE (全域單例)
+"""
+
+import hashlib
+import threading
+
+from .config import (
+    FACT_CACHE_ENABLED, FACT_CACHE_TTL, FACT_CACHE_MAX_ENTRIES, FACT_CACHE_STYLED_MAX_ENTRIES, log
+)
+from .ttl_cache import TTLCache
+from .singleflight import SingleFlight
+from .text_normalize import normalize_query
+
+
+def _raw_key(kind: str, query: str) -> str:
+    return f"{kind}\x1f{normalize_query(query)}"
+
+
+def _styled_key(agent_id: str, raw: str) -> str:
+    return f"{agent_id}\x1f{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+
+class FactCache:
+    """代理人無關的原始事實快取 + 各代理人潤飾版本快取"""
+
+    def __init__(self, enabled: bool = FACT_CACHE_ENABLED, ttl: float = FACT_CACHE_TTL,
+                 max_entries: int = FACT_CACHE_MAX_ENTRIES, styled_max_entries: int = FACT_CACHE_STYLED_MAX_ENTRIES):
+        self.enabled = enabled
+        # key 已在 _raw_key / _styled_key 組好 (提問部分已正規化)，不再經過 normalize_query
+        self._facts = TTLCache(max_entries, ttl, normalize=str)
+        self._styled = TTLCache(styled_max_entries, ttl, normalize=str)
+        self._inflight = SingleFlight()
+        self._lock = threading.Lock()
+        self._fetches = 0
+        self._restyles = 0
+
+    # ── 事實層 ────────────────────────────────────────────────────────────────
+
+    def fetch(self, kind: str, query: str, fetch_fn, cacheable=bool):
+        """取得原始結果：快取命中直接回傳，否則執行 fetch_fn() (相同提問並發時只執行一次)
+
+        cacheable(raw) 為 False 時 (例如錯誤訊息) 不寫入快取。回傳 (原始結果, 是否命中快取)。
+        """
+        if not self.enabled:
+            return fetch_fn(), False
+        key = _raw_key(kind, query)
+        raw = self._facts.get(key)
+        if raw is not None:
+            log(f"♻️ [FactCache] 共用既有{kind}結果: {query[:30]}")
+            return raw, True
+
+        def _load():
+            with self._lock:
+                self._fetches += 1
+            result = fetch_fn()
+            if result and cacheable(result):
+                self._facts.set(key, result)
+            return result
+
+        return self._inflight.do(key, _load), False
+
+    # ── 潤飾層 ────────────────────────────────────────────────────────────────
+
+    def styled(self, agent_id: str, raw: str, style_fn, stream: bool = False, cacheable: bool = True):
+        """回傳代理人的潤飾版本：已潤飾過同一份原始結果就直接取用，否則呼叫 style_fn(raw) 並保存
+
+        stream=True 時 style_fn 回傳片段 generator；結果仍為 generator，完整送出後才保存。
+        """
+        if not (self.enabled and cacheable and raw):
+            return style_fn(raw)
+        key = _styled_key(agent_id, raw)
+        cached = self._styled.get(key)
+        if cached is not None:
+            return iter([cached]) if stream else cached
+        with self._lock:
+            self._restyles += 1
+        if stream:
+            return self._tee(key, style_fn(raw))
+        result = style_fn(raw)
+        if result:
+            self._styled.set(key, result)
+        return result
+
+    def _tee(self, key: str, pieces):
+        """邊送出片段邊收集；呼叫端中途關閉 generator 時不保存不完整的版本"""
+        collected = []
+        for piece in pieces:
+            collected.append(piece)
+            yield piece
+        if collected:
+            self._styled.set(key, "".join(collected))
+
+    def clear(self):
+        self._facts.clear()
+        self._styled.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            fetches, restyles = self._fetches, self._restyles
+        return {
+            "enabled": self.enabled,
+            "facts": self._facts.stats(),
+            "styled": self._styled.stats(),
+            "fetches": fetches,
+            "restyles": restyles,
+            "shared_inflight": self._inflight.stats().get("shared", 0),
+        }
+
+
+# 全域單例
+FACT_CACHE = FactCache()
@@ -13,6 +13,7 @@ import datetime
 from pathlib import Path
 
 from .config import log, BASE_DIR
+from .keyword_matcher import KEYWORDS
 
 
 class Shield:
@@ -53,8 +54,7 @@ class Harness:
 
     def needs_checkpoint(self, query):
         """L1: 智慧判斷 - 只有寫入類指令才需要備份工作區"""
-        q_lower = query.lower()
-        return any(kw in q_lower for kw in self.WRITE_KEYWORDS)
+        return bool(KEYWORDS.match(query.lower(), groups=("write",)))
 
     def create_checkpoint(self, task_id):
         """L1: 建立狀態檢查點 (僅程式碼目錄的輕量快照)"""
@@ -121,6 +121,9 @@ class Harness:
         return True, ""
 
 
+KEYWORDS.register("write", Harness.WRITE_KEYWORDS)
+
+
 class AuditLogger:
     """L3/L4: 磁碟即真相 - 稽核日誌管理"""
     def __init__(self, log_path):
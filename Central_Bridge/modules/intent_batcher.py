@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+modules/intent_batcher.py — ArielOS 意圖分類微批次 (Micro-batching)
+
+尖峰時段 (看板例行任務同一分鐘觸發、多個 Discord 頻道同時發言) 每則訊息都送一次
+完整的路由 Prompt，重複送出同一段冗長的分類規則與時間上下文。
+開啟 INTENT_BATCH_ENABLED 後，第一個到達的請求成為「領頭者」，等待
+INTENT_BATCH_WINDOW_MS 收集同時到達的請求，合併成一個多題目 Prompt，
+以 JSON 結構化輸出一次分類，再拆回各請求。
+
+批次只有一題或解析失敗時回傳 None，呼叫端照常走單題分類 (行為與未開啟時相同)。
+
+包含：IntentBatcher, INTENT_BATCHER (全域單例)
+"""
+
+import json
+import threading
+
+from .config import (
+    INTENT_MODEL, INTENT_BATCH_ENABLED, INTENT_BATCH_WINDOW_MS, INTENT_BATCH_MAX, log
+)
+
+INTENT_TAGS = ("SIMPLE", "SEARCH", "PROGRAMMATIC", "SKILL", "COMPLEX")
+
+# Ollama 結構化輸出 (format 參數)：強制模型回傳 {"results": [{"id", "intent", "note"}]}
+_BATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer"},
+                    "intent": {"type": "string", "enum": list(INTENT_TAGS)},
+                    "note": {"type": "string"},
+                },
+                "required": ["id", "intent"],
+            },
+        }
+    },
+    "required": ["results"],
+}
+
+
+class _Item:
+    __slots__ = ("query", "agent_name", "event", "result")
+
+    def __init__(self, query: str, agent_name: str):
+        self.query = query
+        self.agent_name = agent_name
+        self.event = threading.Event()
+        self.result = None
+
+
+class _Batch:
+    __slots__ = ("items", "full")
+
+    def __init__(self):
+        self.items: list[_Item] = []
+        self.full = threading.Event()
+
+
+class IntentBatcher:
+    """收集短時間內同時到達的意圖分類請求，合併成一次小腦呼叫"""
+
+    def __init__(self, enabled: bool = INTENT_BATCH_ENABLED, window_ms: int = INTENT_BATCH_WINDOW_MS,
+                 max_batch: int = INTENT_BATCH_MAX):
+        self.enabled = enabled
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self._lock = threading.Lock()
+        self._open: _Batch | None = None   # 正在收集中的批次
+        self._batches = 0
+        self._batched_items = 0
+        self._fallbacks = 0
+
+    def classify(self, query: str, agent_name: str = "") -> str | None:
+        """回傳與單題分類相同格式的結果 (例如 "[SEARCH] 台北天氣")；None 代表請呼叫端自行單題分類"""
+        if not self.enabled:
+            return None
+        item = _Item(query, agent_name)
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            batch.items.append(item)
+            if len(batch.items) >= self.max_batch:
+                self._open = None   # 已滿：之後到達的請求開新批次
+                batch.full.set()
+
+        if not leader:
+            item.event.wait()
+            return item.result
+
+        batch.full.wait(self.window)
+        with self._lock:
+            if self._open is batch:
+                self._open = None
+        self._run(batch.items)
+        return item.result
+
+    def _run(self, batch: list[_Item]):
+        if len(batch) < 2:
+            for it in batch:
+                it.result = None
+                it.event.set()
+            return
+
+        results = self._classify_batch(batch)
+        with self._lock:
+            self._batches += 1
+            self._batched_items += len(batch)
+            self._fallbacks += sum(1 for r in results if r is None)
+        for it, res in zip(batch, results):
+            it.result = res
+            it.event.set()
+
+    def _classify_batch(self, batch: list[_Item]) -> list:
+        from .cerebellum import cerebellum_call
+        from .personality import _get_time_context
+
+        items_text = "\n".join(
+            f"ID:{i} | 代理人:{it.agent_name or '未知'} | 使用者輸入：『{it.query[:300]}』"
+            for i, it in enumerate(batch)
+        )
+        instruction = (
+            "你是一個嚴格的『意圖分類路由器』，負責為下列每一則使用者提問各自標上一個意圖。\n"
+            f"{_get_time_context(date_only=True)}\n"
+            "意圖定義：\n"
+            "- SIMPLE：打招呼、純聊天、問候、簡單常識。\n"
+            "- SEARCH：單純的資訊查詢（如：天氣、匯率、簡單名詞解釋、食譜）。\n"
+            "- PROGRAMMATIC：針對檔案或資料庫進行大量資料處理、分析。\n"
+            "- SKILL：需要特定軟體工具、外掛或「深度研究分析」（如：執行腳本、操作計畫、分析趨勢、深度報告、時區轉換、整合行事曆與新聞）。\n"
+            "- COMPLEX：程式開發、長篇邏輯推理、系統架構設計。\n\n"
+            f"【待分類提問】\n{items_text}\n\n"
+            "請輸出 JSON：{\"results\": [{\"id\": 題號, \"intent\": 意圖, \"note\": 一句話描述}]}，"
+            "每一題都必須有一筆結果，不可對話。"
+        )
+        try:
+            raw = cerebellum_call(prompt=instruction, temperature=0, timeout=120, num_ctx=4096,
+                                  num_predict=40 * len(batch) + 20, model=INTENT_MODEL,
+                                  site="intent_batch", output_format=_BATCH_SCHEMA)
+            parsed = json.loads(raw).get("results", [])
+        except Exception as e:
+            log(f"⚠️ [IntentBatch] 批次分類失敗，改為逐題分類: {e}")
+            return [None] * len(batch)
+
+        results = [None] * len(batch)
+        for entry in parsed:
+            try:
+                idx = int(entry.get("id"))
+            except (TypeError, ValueError):
+                continue
+            intent = str(entry.get("intent", "")).upper().strip("[] ")
+            if 0 <= idx < len(batch) and intent in INTENT_TAGS:
+                results[idx] = f"[{intent}] {str(entry.get('note', '')).strip()}".strip()
+        log(f"📦 [IntentBatch] 一次分類 {len(batch)} 則 (成功 {sum(r is not None for r in results)} 則)")
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "batches": self._batches,
+                "batched_items": self._batched_items,
+                "avg_batch_size": round(self._batched_items / self._batches, 2) if self._batches else 0.0,
+                "fallbacks": self._fallbacks,
+            }
+
+
+# 全域單例
+INTENT_BATCHER = IntentBatcher()
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+modules/intent_classifier.py — ArielOS CPU 意圖分類器 (字元 n-gram 單純貝氏)
+
+通過反射與語意快取的每則訊息，原本都要呼叫一次 INTENT_MODEL 只為了產生五個標籤之一
+(SIMPLE / SEARCH / PROGRAMMATIC / SKILL / COMPLEX)。本模組在 LLM 路由前放一個
+純 Python 的多項式單純貝氏分類器 (字元 1~3-gram，不需 GPU 或額外套件)：
+  - 信心 ≥ INTENT_CLF_THRESHOLD 時直接回傳標籤 (毫秒以下)
+  - 信心不足、模型未訓練或預測為 SIMPLE 時交回 LLM 路由
+    (SIMPLE 的回答是分類 Prompt 順便產生的，仍需 LLM)
+
+訓練資料：
+  - intent_labels.jsonl：LLM 路由每次成功分類時記錄 (query, intent)，作為老師標籤
+  - audit_log.jsonl：帶有 intent 欄位的紀錄 (可人工補標)
+夜間排程 (03:00) 自動重新訓練；也可手動執行：
+
+    python -m modules.intent_classifier retrain   # 重新訓練並輸出報告
+    python -m modules.intent_classifier report    # 顯示目前模型的準確率/延遲報告
+
+包含：NaiveBayesIntentModel, IntentClassifier, INTENT_CLF (全域單例)
+"""
+
+import json
+import math
+import time
+import hashlib
+import datetime
+import threading
+from collections import Counter
+
+from .config import (
+    BASE_DIR, INTENT_CLF_ENABLED, INTENT_CLF_THRESHOLD, INTENT_CLF_MIN_SAMPLES,
+    INTENT_CLF_MODEL_PATH, INTENT_LABELS_PATH, log
+)
+from .text_normalize import normalize_query
+
+INTENT_TAGS = ("SIMPLE", "SEARCH", "PROGRAMMATIC", "SKILL", "COMPLEX")
+AUDIT_LOG_PATH = BASE_DIR / "Shared_Vault" / "audit_log.jsonl"
+FEATURE_VERSION = 3   # 特徵抽取方式變更時遞增；舊版模型檔不載入，等下次重新訓練
+
+
+def _features(text: str, max_n: int = 3) -> Counter:
+    """字元 1~max_n-gram (經 normalize_query 正規化、去空白)；中文不需斷詞即可取得詞彙特徵"""
+    s = normalize_query(text).replace(" ", "")[:300]
+    grams = Counter()
+    for n in range(1, max_n + 1):
+        for i in range(len(s) - n + 1):
+            grams[s[i:i + n]] += 1
+    return grams
+
+
+class NaiveBayesIntentModel:
+    """多項式單純貝氏 (Laplace 平滑)，參數以 log 機率保存，可序列化成 JSON"""
+
+    def __init__(self, alpha: float = 0.5, max_n: int = 3):
+        self.alpha = alpha
+        self.max_n = max_n
+        self.priors: dict[str, float] = {}
+        self.log_probs: dict[str, dict[str, float]] = {}
+        self.unseen: dict[str, float] = {}
+
+    def fit(self, samples: list[tuple[str, str]]):
+        class_counts = Counter(label for _, label in samples)
+        gram_counts = {label: Counter() for label in class_counts}
+        for text, label in samples:
+            gram_counts[label].update(_features(text, self.max_n))
+        vocab = set()
+        for counts in gram_counts.values():
+            vocab.update(counts)
+        total = sum(class_counts.values())
+        v = len(vocab) or 1
+        self.priors = {label: math.log(c / total) for label, c in class_counts.items()}
+        self.log_probs, self.unseen = {}, {}
+        for label, counts in gram_counts.items():
+            denom = sum(counts.values()) + self.alpha * v
+            self.log_probs[label] = {g: math.log((c + self.alpha) / denom) for g, c in counts.items()}
+            self.unseen[label] = math.log(self.alpha / denom)
+        return self
+
+    def predict_proba(self, text: str) -> dict[str, float]:
+        grams = _features(text, self.max_n)
+        scores = {}
+        for label, prior in self.priors.items():
+            probs, unseen = self.log_probs[label], self.unseen[label]
+            scores[label] = prior + sum(probs.get(g, unseen) * c for g, c in grams.items())
+        top = max(scores.values())
+        exp = {label: math.exp(s - top) for label, s in scores.items()}
+        z = sum(exp.values())
+        return {label: e / z for label, e in exp.items()}
+
+    def predict(self, text: str) -> tuple[str, float]:
+        proba = self.predict_proba(text)
+        label = max(proba, key=proba.get)
+        return label, proba[label]
+
+    def to_dict(self) -> dict:
+        return {"alpha": self.alpha, "max_n": self.max_n, "features": FEATURE_VERSION, "priors": self.priors,
+                "log_probs": self.log_probs, "unseen": self.unseen}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "NaiveBayesIntentModel":
+        model = cls(alpha=data["alpha"], max_n=data["max_n"])
+        model.priors = data["priors"]
+        model.log_probs = data["log_probs"]
+        model.unseen = data["unseen"]
+        return model
+
+
+class IntentClassifier:
+    """管理訓練資料、模型檔與線上預測統計"""
+
+    def __init__(self, enabled: bool = INTENT_CLF_ENABLED, threshold: float = INTENT_CLF_THRESHOLD,
+                 min_samples: int = INTENT_CLF_MIN_SAMPLES, model_path=INTENT_CLF_MODEL_PATH,
+                 labels_path=INTENT_LABELS_PATH, audit_path=AUDIT_LOG_PATH):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.model_path = model_path
+        self.labels_path = labels_path
+        self.audit_path = audit_path
+        self._lock = threading.Lock()
+        self._model: NaiveBayesIntentModel | None = None
+        self._report: dict = {}
+        self._loaded = False
+        self._hits = 0
+        self._fallbacks = 0
+        self._predict_seconds = 0.0
+
+    # ── 線上預測 ──────────────────────────────────────────────────────────────
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not self.model_path.exists():
+                return
+            try:
+                with open(self.model_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data["model"].get("features") != FEATURE_VERSION:
+                    log("ℹ️ [IntentCLF] 模型檔的特徵版本過舊，下次重新訓練前全部交給 LLM 路由")
+                    return
+                self._model = NaiveBayesIntentModel.from_dict(data["model"])
+                self._report = data.get("report", {})
+            except Exception as e:
+                log(f"⚠️ [IntentCLF] 模型載入失敗，全部交給 LLM 路由: {e}")
+
+    def predict(self, query: str) -> tuple[str, float] | None:
+        """高信心時回傳 (標籤, 信心)；否則 None (交給 LLM 路由)"""
+        if not self.enabled:
+            return None
+        self._ensure_loaded()
+        model = self._model
+        if model is None:
+            return None
+        started = time.perf_counter()
+        label, confidence = model.predict(query)
+        elapsed = time.perf_counter() - started
+        decisive = confidence >= self.threshold and label != "SIMPLE"
+        with self._lock:
+            self._predict_seconds += elapsed
+            if decisive:
+                self._hits += 1
+            else:
+                self._fallbacks += 1
+        return (label, confidence) if decisive else None
+
+    def record_label(self, query: str, intent: str, source: str = "llm"):
+        """記錄一筆帶標籤的提問 (LLM 路由的分類結果)，供下次訓練使用"""
+        if not self.enabled or intent not in INTENT_TAGS or not query.strip():
+            return
+        entry = {"timestamp": datetime.datetime.now().isoformat(), "query": query[:500],
+                 "intent": intent, "source": source}
+        try:
+            with self._lock, open(self.labels_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except Exception as e:
+            log(f"⚠️ [IntentCLF] 標籤寫入失敗: {e}")
+
+    # ── 訓練與報告 ────────────────────────────────────────────────────────────
+
+    def _load_samples(self) -> list[tuple[str, str]]:
+        """合併兩個來源；同一提問以最後一筆標籤為準"""
+        latest: dict[str, str] = {}
+        for path in (self.audit_path, self.labels_path):
+            if not path.exists():
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    query, intent = entry.get("query"), entry.get("intent")
+                    if query and intent in INTENT_TAGS:
+                        latest[query.strip()] = intent
+        return list(latest.items())
+
+    def _evaluate(self, model: NaiveBayesIntentModel, test: list[tuple[str, str]]) -> dict:
+        correct = confident = confident_correct = 0
+        latencies = []
+        per_class = {tag: {"support": 0, "correct": 0} for tag in INTENT_TAGS}
+        for text, label in test:
+            started = time.perf_counter()
+            pred, conf = model.predict(text)
+            latencies.append(time.perf_counter() - started)
+            per_class[label]["support"] += 1
+            if pred == label:
+                correct += 1
+                per_class[label]["correct"] += 1
+            if conf >= self.threshold and pred != "SIMPLE":
+                confident += 1
+                confident_correct += pred == label
+        latencies.sort()
+        n = len(test) or 1
+        return {
+            "test_samples": len(test),
+            "accuracy": round(correct / n, 4),
+            "coverage": round(confident / n, 4),               # 可跳過 LLM 的比例
+            "confident_accuracy": round(confident_correct / confident, 4) if confident else None,
+            "latency_p50_ms": round(latencies[len(latencies) // 2] * 1000, 3) if latencies else None,
+            "latency_p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3)
+                              if latencies else None,
+            "per_class": {tag: dict(v, accuracy=round(v["correct"] / v["support"], 4) if v["support"] else None)
+                          for tag, v in per_class.items()},
+        }
+
+    def train(self) -> dict:
+        """重新訓練：以 query 雜湊切出 20% 驗證集產生報告，再用全部資料訓練正式模型"""
+        samples = self._load_samples()
+        if len(samples) < self.min_samples:
+            msg = f"樣本不足 ({len(samples)}/{self.min_samples})，維持 LLM 路由"
+            log(f"🧮 [IntentCLF] {msg}")
+            return {"trained": False, "samples": len(samples), "reason": msg}
+
+        def _is_test(text: str) -> bool:
+            return int(hashlib.md5(text.encode("utf-8")).hexdigest(), 16) % 5 == 0
+
+        train_set = [s for s in samples if not _is_test(s[0])]
+        test_set = [s for s in samples if _is_test(s[0])]
+        report = self._evaluate(NaiveBayesIntentModel().fit(train_set), test_set)
+        model = NaiveBayesIntentModel().fit(samples)
+        report.update({
+            "trained": True,
+            "trained_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "samples": len(samples),
+            "label_counts": dict(Counter(label for _, label in samples)),
+            "threshold": self.threshold,
+        })
+
+        tmp = self.model_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"model": model.to_dict(), "report": report}, f, ensure_ascii=False)
+        tmp.replace(self.model_path)
+        with self._lock:
+            self._model, self._report, self._loaded = model, report, True
+        log(f"🧮 [IntentCLF] 重新訓練完成：{len(samples)} 筆，驗證準確率 {report['accuracy']:.1%}，"
+            f"高信心覆蓋率 {report['coverage']:.1%}")
+        return report
+
+    def report(self) -> dict:
+        self._ensure_loaded()
+        with self._lock:
+            return dict(self._report)
+
+    def stats(self) -> dict:
+        self._ensure_loaded()
+        with self._lock:
+            predictions = self._hits + self._fallbacks
+            return {
+                "enabled": self.enabled,
+                "trained": self._model is not None,
+                "threshold": self.threshold,
+                "hits": self._hits,
+                "fallbacks": self._fallbacks,
+                "hit_rate": round(self._hits / predictions, 4) if predictions else 0.0,
+                "avg_predict_ms": round(self._predict_seconds / predictions * 1000, 3) if predictions else 0.0,
+                "validation_accuracy": self._report.get("accuracy"),
+            }
+
+
+# 全域單例
+INTENT_CLF = IntentClassifier()
+
+
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "report"
+    if command == "retrain":
+        result = INTENT_CLF.train()
+    elif command == "report":
+        result = INTENT_CLF.report() or {"trained": False, "reason": "尚未訓練，請執行 retrain"}
+    else:
+        sys.exit("用法: python -m modules.intent_classifier [retrain|report]")
+    print(json.dumps(result, ensure_ascii=False, indent=2))
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+modules/keyword_matcher.py — ArielOS 多組關鍵字比對 (Aho-Corasick)
+
+熱路徑上原本有一連串 any(kw in q for kw in ...)：快車道的 SKILL_TRIGGERS / info_queries、
+脊髓反射的各組關鍵字、Harness.WRITE_KEYWORDS、快取 TTL 關鍵字、風格轉移錯誤特徵……
+每個關鍵字各做一次子字串搜尋。
+
+本模組把所有關鍵字組編譯成同一個 Aho-Corasick 自動機 (第一次比對時建置，註冊新組別後重建)，
+每段文字只掃描一次，回傳命中的組別與關鍵字；每個關鍵字的命中次數可由 stats() 查詢，
+方便調整清單 (找出從未命中或誤觸發的關鍵字)。
+
+比對區分大小寫，與原本的 `kw in text` 相同；需要忽略大小寫的呼叫端自行傳入 lower() 後的文字。
+
+    KEYWORDS.register("write", ["修改", "edit", ...])
+    hits = KEYWORDS.match(q_lower, groups=("write",))   # {"write": {"edit"}}
+    if "write" in hits: ...
+
+包含：KeywordMatcher, KEYWORDS (全域單例)
+"""
+
+import threading
+from collections import Counter, deque
+
+
+class _Automaton:
+    """Aho-Corasick 自動機：goto 表 + failure link，輸出在建置時沿 failure link 合併"""
+
+    def __init__(self, patterns: list[tuple[str, str]]):
+        self.goto: list[dict] = [{}]
+        self.fail: list[int] = [0]
+        self.out: list[list] = [[]]
+        for group, kw in patterns:
+            state = 0
+            for ch in kw:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append((group, kw))
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def search(self, text: str) -> set:
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        found = set()
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+class KeywordMatcher:
+    """所有關鍵字組共用的編譯式比對器"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._groups: dict[str, tuple] = {}
+        self._automaton: _Automaton | None = None
+        self._scans = Counter()      # group -> 掃描次數
+        self._hits = Counter()       # (group, keyword) -> 命中次數
+
+    def register(self, group: str, keywords):
+        """註冊 (或覆寫) 一組關鍵字；下次比對時重建自動機"""
+        with self._lock:
+            self._groups[group] = tuple(dict.fromkeys(k for k in keywords if k))
+            self._automaton = None
+
+    def unregister(self, group: str):
+        """移除一組關鍵字 (規則重新載入時清掉舊組別)"""
+        with self._lock:
+            if self._groups.pop(group, None) is not None:
+                self._automaton = None
+            for key in [k for k in self._hits if k[0] == group]:
+                del self._hits[key]
+            self._scans.pop(group, None)
+
+    def keywords(self, group: str) -> tuple:
+        return self._groups.get(group, ())
+
+    def _compiled(self) -> _Automaton:
+        automaton = self._automaton
+        if automaton is None:
+            with self._lock:
+                if self._automaton is None:
+                    self._automaton = _Automaton([(g, kw) for g, kws in self._groups.items() for kw in kws])
+                automaton = self._automaton
+        return automaton
+
+    def match(self, text: str, groups=None) -> dict[str, set]:
+        """單次掃描 text，回傳 {組別: 命中的關鍵字集合}；groups 限定只回報 (與統計) 這些組別"""
+        found = self._compiled().search(text) if text else set()
+        wanted = set(groups) if groups is not None else None
+        hits: dict[str, set] = {}
+        for group, kw in found:
+            if wanted is None or group in wanted:
+                hits.setdefault(group, set()).add(kw)
+        with self._lock:
+            self._scans.update(list(wanted if wanted is not None else self._groups))
+            for group, kws in hits.items():
+                self._hits.update((group, kw) for kw in kws)
+        return hits
+
+    def stats(self) -> dict:
+        """每組的掃描次數、命中次數與各關鍵字命中數 (含從未命中的關鍵字，便於清理清單)"""
+        with self._lock:
+            return {
+                group: {
+                    "scans": self._scans[group],
+                    "hits": {kw: self._hits[(group, kw)] for kw in kws},
+                    "never_hit": [kw for kw in kws if not self._hits[(group, kw)]],
+                }
+                for group, kws in self._groups.items()
+            }
+
+
+# 全域單例
+KEYWORDS = KeywordMatcher()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+modules/latency_tracker.py — ArielOS 自適應逾時
+
+各呼叫點原本寫死 timeout (關鍵字 12s、語意判定 25s、意圖 120s、風格轉移 180s、壓縮 300s)，
+不是太長 (失敗得很慢) 就是高負載時太短 (誤判 OLLAMA_BUSY)。
+本模組依 (模型, 呼叫點) 記錄最近的實際延遲，以 p99 × 倍數推算 deadline，
+並限制在 floor ~ ceiling 之間；樣本不足時沿用呼叫點原本的 timeout。
+
+逾時的呼叫以「timeout 秒數」計入樣本，負載升高時 deadline 會自動放寬；
+樣本由 ollama_client 逐一候選模型記錄，主要模型逾時後降級成功時，主要模型仍會留下逾時紀錄。
+deadline 只涵蓋推論時間：目標模型未常駐時，載入權重的時間由 ollama_client 另加
+MODEL_COLD_LOAD_ALLOWANCE，這類冷啟動呼叫也不計入樣本。
+統計資料由 /v1/cerebellum/latency 匯出 (JSON 或 CSV)，可用於硬體規劃。
+
+包含：LatencyTracker, LATENCY (全域單例)
+"""
+
+import threading
+from collections import deque
+
+from .config import (
+    ADAPTIVE_TIMEOUT_ENABLED, ADAPTIVE_TIMEOUT_WINDOW, ADAPTIVE_TIMEOUT_MIN_SAMPLES,
+    ADAPTIVE_TIMEOUT_MULTIPLIER, ADAPTIVE_TIMEOUT_FLOOR, ADAPTIVE_TIMEOUT_CEILING, ADAPTIVE_TIMEOUT_BOUNDS
+)
+
+
+def _percentile(samples: list, pct: float) -> float:
+    """samples 需已排序"""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+class _Series:
+    __slots__ = ("samples", "count", "timeouts")
+
+    def __init__(self, window: int):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.timeouts = 0
+
+
+class LatencyTracker:
+    """依 (model, site) 追蹤延遲分佈並推算自適應 deadline"""
+
+    def __init__(self, enabled: bool = ADAPTIVE_TIMEOUT_ENABLED, window: int = ADAPTIVE_TIMEOUT_WINDOW,
+                 min_samples: int = ADAPTIVE_TIMEOUT_MIN_SAMPLES, multiplier: float = ADAPTIVE_TIMEOUT_MULTIPLIER,
+                 floor: float = ADAPTIVE_TIMEOUT_FLOOR, ceiling: float = ADAPTIVE_TIMEOUT_CEILING,
+                 bounds: dict | None = None):
+        self.enabled = enabled
+        self.window = window
+        self.min_samples = min_samples
+        self.multiplier = multiplier
+        self.floor = floor
+        self.ceiling = ceiling
+        self.bounds = dict(bounds or {})   # site -> (floor, ceiling)
+        self._lock = threading.Lock()
+        self._series: dict[tuple, _Series] = {}
+
+    def _bounds(self, site: str) -> tuple:
+        return self.bounds.get(site, (self.floor, self.ceiling))
+
+    def record(self, model: str, site: str, seconds: float, timed_out: bool = False):
+        with self._lock:
+            series = self._series.get((model, site))
+            if series is None:
+                series = self._series[(model, site)] = _Series(self.window)
+            series.samples.append(seconds)
+            series.count += 1
+            if timed_out:
+                series.timeouts += 1
+
+    def deadline(self, model: str, site: str, default: float) -> float:
+        """此呼叫應使用的逾時秒數；樣本不足或停用時回傳 default"""
+        if not self.enabled:
+            return default
+        with self._lock:
+            series = self._series.get((model, site))
+            if series is None or len(series.samples) < self.min_samples:
+                return default
+            p99 = _percentile(sorted(series.samples), 0.99)
+        floor, ceiling = self._bounds(site)
+        return round(min(max(p99 * self.multiplier, floor), ceiling), 1)
+
+    # ── 匯出 ──────────────────────────────────────────────────────────────────
+
+    def stats(self) -> list[dict]:
+        with self._lock:
+            snapshot = [(model, site, sorted(s.samples), s.count, s.timeouts)
+                        for (model, site), s in self._series.items()]
+        rows = []
+        for model, site, samples, count, timeouts in sorted(snapshot):
+            floor, ceiling = self._bounds(site)
+            p99 = _percentile(samples, 0.99)
+            rows.append({
+                "model": model,
+                "site": site,
+                "count": count,
+                "timeouts": timeouts,
+                "window": len(samples),
+                "p50_s": round(_percentile(samples, 0.50), 3),
+                "p95_s": round(_percentile(samples, 0.95), 3),
+                "p99_s": round(p99, 3),
+                "max_s": round(samples[-1], 3) if samples else 0.0,
+                "deadline_s": round(min(max(p99 * self.multiplier, floor), ceiling), 1)
+                              if len(samples) >= self.min_samples else None,
+            })
+        return rows
+
+    def to_csv(self) -> str:
+        columns = ["model", "site", "count", "timeouts", "window", "p50_s", "p95_s", "p99_s", "max_s", "deadline_s"]
+        lines = [",".join(columns)]
+        for row in self.stats():
+            lines.append(",".join("" if row[c] is None else str(row[c]) for c in columns))
+        return "\n".join(lines) + "\n"
+
+
+# 全域單例
+LATENCY = LatencyTracker(bounds=ADAPTIVE_TIMEOUT_BOUNDS)
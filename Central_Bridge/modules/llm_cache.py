@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+modules/llm_cache.py — ArielOS 小腦決定性呼叫快取
+
+temperature=0 的小腦呼叫 (意圖分類、關鍵字萃取、技能匹配、快取判定…)
+相同輸入必定得到相同輸出，因此以 (model, prompt, options) 的雜湊為 key，
+將結果存入 SQLite，重啟 Bridge 後仍然有效。
+
+淘汰策略：TTL 到期 + 超過筆數/容量上限時淘汰最久未使用 (LRU)。
+
+包含：LLMResultCache, LLM_CACHE (全域單例)
+"""
+
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+
+from .config import (
+    LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_MAX_BYTES, log
+)
+
+
+class LLMResultCache:
+    """小腦呼叫結果快取 (SQLite, LRU + TTL)"""
+
+    def __init__(self, db_path: Path, ttl: int = LLM_CACHE_TTL,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._evictions = 0
+        self._init_db()
+
+    def _get_conn(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    response TEXT,
+                    size INTEGER,
+                    created_at REAL,
+                    expires_at REAL,
+                    last_access REAL,
+                    hits INTEGER DEFAULT 0
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_expires ON llm_cache(expires_at)')
+            conn.commit()
+            conn.close()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, options: dict) -> str:
+        """內容定址 key：sha256(model, prompt, options)"""
+        raw = json.dumps({"model": model, "prompt": prompt, "options": options},
+                         ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # ── 讀寫 ──────────────────────────────────────────────────────────────────
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            try:
+                row = conn.execute('SELECT response, expires_at FROM llm_cache WHERE key = ?', (key,)).fetchone()
+                if row and row['expires_at'] > now:
+                    conn.execute('UPDATE llm_cache SET last_access = ?, hits = hits + 1 WHERE key = ?', (now, key))
+                    conn.commit()
+                    self._hits += 1
+                    return row['response']
+                if row:
+                    conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                    conn.commit()
+                self._misses += 1
+                return None
+            finally:
+                conn.close()
+
+    def put(self, key: str, model: str, response: str, ttl: int | None = None):
+        now = time.time()
+        expires = now + (ttl if ttl is not None else self.ttl)
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            conn = self._get_conn()
+            try:
+                conn.execute('''
+                    INSERT OR REPLACE INTO llm_cache (key, model, response, size, created_at, expires_at, last_access, hits)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+                ''', (key, model, response, size, now, expires, now))
+                self._writes += 1
+                self._evict(conn, now)
+                conn.commit()
+            finally:
+                conn.close()
+
+    def _evict(self, conn, now: float):
+        """刪除過期項目，再依 LRU 淘汰直到符合筆數與容量上限"""
+        self._evictions += conn.execute('DELETE FROM llm_cache WHERE expires_at <= ?', (now,)).rowcount
+        count, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache').fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        victims = []
+        for row in conn.execute('SELECT key, size FROM llm_cache ORDER BY last_access ASC'):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((row['key'],))
+            count -= 1
+            total -= row['size'] or 0
+        conn.executemany('DELETE FROM llm_cache WHERE key = ?', victims)
+        self._evictions += len(victims)
+
+    def clear(self):
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute('DELETE FROM llm_cache')
+            conn.commit()
+            conn.close()
+
+    # ── 統計 ──────────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._get_conn()
+            count, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache').fetchone()
+            conn.close()
+            lookups = self._hits + self._misses
+            return {
+                "entries": count,
+                "bytes": total,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "writes": self._writes,
+                "evictions": self._evictions,
+            }
+
+
+# 全域單例
+LLM_CACHE = LLMResultCache(LLM_CACHE_PATH)
+log(f"📦 [LLMCache] 決定性呼叫快取已就緒 ({LLM_CACHE.stats()['entries']} 筆)")
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+modules/llm_scheduler.py — ArielOS 小腦呼叫排程器
+
+取代原本固定的 _CEREBELLUM_SEMAPHORE(2)：
+  1. 優先級：interactive (使用者正在等) > brain (大腦任務內的小腦呼叫) > background (蒸餾/壓縮/傳記)
+  2. 保留名額：background / brain 不可佔滿所有名額，打招呼永遠不用排在 512 token 的快取摘要後面
+  3. 代理人公平性：同一優先級內以 round-robin 輪流服務各代理人
+  4. 每模型並發上限：可個別限制大模型的同時呼叫數
+  5. 排隊時間統計：各優先級的等待次數、平均/p50/p95/最大等待秒數
+  6. 模型常駐分組：brain / background 請求優先執行「模型已載入」者，減少 Ollama 換模型
+     (同一模型最多連續優先 LLM_RESIDENCY_MAX_BATCH 次，避免其他模型餓死)
+
+包含：LLMScheduler, LLM_SCHEDULER (全域單例)
+"""
+
+import time
+import asyncio
+import itertools
+import threading
+from collections import Counter, deque
+from contextlib import asynccontextmanager, contextmanager
+
+from .config import (
+    LLM_MAX_CONCURRENCY, LLM_MODEL_CONCURRENCY, LLM_INTERACTIVE_RESERVED, LLM_RESIDENCY_MAX_BATCH
+)
+from .model_residency import RESIDENCY
+
+PRIORITY_CLASSES = {"interactive": 0, "brain": 1, "background": 2}
+
+
+class _Ticket:
+    __slots__ = ("seq", "priority", "rank", "agent_id", "model", "enqueued_at")
+
+    def __init__(self, seq, priority, agent_id, model):
+        self.seq = seq
+        self.priority = priority
+        self.rank = PRIORITY_CLASSES[priority]
+        self.agent_id = agent_id or "system"
+        self.model = model
+        self.enqueued_at = time.monotonic()
+
+
+class LLMScheduler:
+    """優先級 + 公平性的小腦呼叫名額分配器"""
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, model_limits: dict | None = None,
+                 interactive_reserved: int = LLM_INTERACTIVE_RESERVED,
+                 residency=RESIDENCY, max_batch: int = LLM_RESIDENCY_MAX_BATCH):
+        self.max_concurrency = max(1, max_concurrency)
+        self.model_limits = dict(model_limits or {})
+        # 保留名額最多 max_concurrency - 1，確保 brain / background 仍至少有一個名額可用
+        self.interactive_reserved = min(interactive_reserved, self.max_concurrency - 1)
+        self.residency = residency
+        self.max_batch = max(1, max_batch)
+        self._streak_model = None     # 最近連續取得名額的模型與次數 (常駐分組的插隊上限)
+        self._streak = 0
+        self._residency_grants = 0
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._waiting: list[_Ticket] = []
+        self._running = 0
+        self._running_by_model = Counter()
+        self._last_grant: dict = {}   # (priority, agent_id) -> 最後一次取得名額的序號 (round-robin 用)
+        self._grants = itertools.count()
+        self._wait_samples = {p: deque(maxlen=500) for p in PRIORITY_CLASSES}
+        self._wait_totals = {p: [0, 0.0, 0.0] for p in PRIORITY_CLASSES}  # [次數, 總等待, 最大等待]
+
+    # ── 名額分配 ──────────────────────────────────────────────────────────────
+
+    def _model_limit(self, model: str) -> int:
+        return self.model_limits.get(model, self.max_concurrency)
+
+    def _eligible(self, ticket: _Ticket) -> bool:
+        if self._running_by_model[ticket.model] >= self._model_limit(ticket.model):
+            return False
+        limit = self.max_concurrency
+        if ticket.rank > PRIORITY_CLASSES["interactive"]:
+            limit -= self.interactive_reserved
+        return self._running < limit
+
+    def _prefers(self, ticket: _Ticket, resident: set) -> bool:
+        """非互動請求的模型已常駐且尚未超過連續上限 → 可優先 (互動請求不重排，維持最低延遲)"""
+        if ticket.rank == PRIORITY_CLASSES["interactive"] or ticket.model not in resident:
+            return False
+        return not (ticket.model == self._streak_model and self._streak >= self.max_batch)
+
+    def _pick(self) -> _Ticket | None:
+        """選出下一個可執行的請求：優先級 → 模型已常駐 → 最久未被服務的代理人 → 先到先服務"""
+        best, best_key = None, None
+        resident = set(self.residency.resident_models()) if self.residency else set()
+        for t in self._waiting:
+            if not self._eligible(t):
+                continue
+            key = (t.rank, not self._prefers(t, resident),
+                   self._last_grant.get((t.priority, t.agent_id), -1), t.seq)
+            if best_key is None or key < best_key:
+                best, best_key = t, key
+        return best
+
+    def _note_grant(self, ticket: _Ticket):
+        if self.residency and ticket.rank > PRIORITY_CLASSES["interactive"] \
+                and self.residency.is_resident(ticket.model):
+            self._residency_grants += 1
+        if ticket.model == self._streak_model:
+            self._streak += 1
+        else:
+            self._streak_model, self._streak = ticket.model, 1
+
+    def _record_wait(self, priority: str, waited: float):
+        self._wait_samples[priority].append(waited)
+        totals = self._wait_totals[priority]
+        totals[0] += 1
+        totals[1] += waited
+        totals[2] = max(totals[2], waited)
+
+    def acquire(self, model: str, priority: str = "interactive", agent_id: str | None = None):
+        """阻塞直到取得名額；必須搭配 release(model) (一般請用 slot / aslot)"""
+        if priority not in PRIORITY_CLASSES:
+            priority = "interactive"
+        with self._cond:
+            ticket = _Ticket(next(self._seq), priority, agent_id, model)
+            self._waiting.append(ticket)
+            while self._pick() is not ticket:
+                self._cond.wait()
+            self._waiting.remove(ticket)
+            self._note_grant(ticket)
+            self._running += 1
+            self._running_by_model[model] += 1
+            self._last_grant[(priority, ticket.agent_id)] = next(self._grants)
+            self._record_wait(priority, time.monotonic() - ticket.enqueued_at)
+            # 可能還有空位：讓其他等待者重新評估
+            self._cond.notify_all()
+
+    def release(self, model: str):
+        with self._cond:
+            self._running -= 1
+            self._running_by_model[model] -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, model: str, priority: str = "interactive", agent_id: str | None = None):
+        """取得一個呼叫名額 (with 區塊結束時自動釋放)"""
+        self.acquire(model, priority, agent_id)
+        try:
+            yield
+        finally:
+            self.release(model)
+
+    @asynccontextmanager
+    async def aslot(self, model: str, priority: str = "interactive", agent_id: str | None = None):
+        """slot 的 asyncio 版本：排隊等待交給執行緒池，取得名額後的 HTTP 等待不佔任何執行緒"""
+        loop = asyncio.get_running_loop()
+        waiter = loop.run_in_executor(None, self.acquire, model, priority, agent_id)
+        try:
+            await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            # 呼叫端已取消：名額取得後立刻歸還，避免名額外洩
+            waiter.add_done_callback(lambda f: f.exception() is None and self.release(model))
+            raise
+        try:
+            yield
+        finally:
+            self.release(model)
+
+    # ── 統計 ──────────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        with self._cond:
+            queue_time = {}
+            for p in PRIORITY_CLASSES:
+                samples = sorted(self._wait_samples[p])
+                count, total, longest = self._wait_totals[p]
+                queue_time[p] = {
+                    "count": count,
+                    "avg_s": round(total / count, 3) if count else 0.0,
+                    "p50_s": round(samples[len(samples) // 2], 3) if samples else 0.0,
+                    "p95_s": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3) if samples else 0.0,
+                    "max_s": round(longest, 3),
+                }
+            return {
+                "max_concurrency": self.max_concurrency,
+                "interactive_reserved": self.interactive_reserved,
+                "running": self._running,
+                "running_by_model": {m: n for m, n in self._running_by_model.items() if n},
+                "waiting": dict(Counter(t.priority for t in self._waiting)),
+                "queue_time": queue_time,
+                "resident_model_grants": self._residency_grants,
+            }
+
+
+# 全域單例
+LLM_SCHEDULER = LLMScheduler(model_limits=LLM_MODEL_CONCURRENCY)
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+modules/metrics.py — ArielOS 對話路徑成效指標 (Prometheus / JSON)
+
+各條捷徑 (脊髓反射、SIMPLE 快取、向量語意快取、CPU Ultra Hit、快車道) 到底省下多少時間，
+原本只能從日誌猜。本模組記錄每條對話路徑的：
+  - 請求數與延遲直方圖 (Prometheus 固定級距)
+  - 誤命中回報數 (POST /v1/metrics/false-hit，明細寫入 false_hits.jsonl 供門檻校正)
+  - 估計省下的秒數：命中次數 × (未命中路徑的平均延遲 − 此路徑的平均延遲)
+    未命中基準 = 快車道 SEARCH/SKILL/PROGRAMMATIC 與大腦任務 (入列到完成) 的加權平均；
+    尚無樣本時以 METRICS_MISS_BASELINE_SECONDS 估算
+
+快取命中/未命中、LLM 呼叫次數沿用各模組自己的統計 (cerebellum_stats / LATENCY)，
+由 /v1/metrics 匯出時一併轉成 Prometheus 格式。
+
+包含：RouteMetrics, METRICS (全域單例)
+"""
+
+import json
+import datetime
+import threading
+
+from .config import BASE_DIR, METRICS_MISS_BASELINE_SECONDS, log
+
+FALSE_HITS_PATH = BASE_DIR / "Shared_Vault" / "false_hits.jsonl"
+
+# 延遲直方圖級距 (秒)：涵蓋微秒級的反射到數分鐘的大腦任務
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# 捷徑路徑 (命中即省下一次完整處理) 與作為基準的完整處理路徑
+SHORTCUT_PATHS = ("reflex", "simple_cache", "semantic_cache", "cpu_ultra_hit", "fast_track_simple")
+BASELINE_PATHS = ("fast_track_search", "fast_track_skill", "fast_track_programmatic", "brain")
+# 可回報誤命中的路徑 (X-ArielOS-Path 的所有可能值)；其餘一律拒絕，避免 Prometheus 標籤無限增長
+KNOWN_PATHS = SHORTCUT_PATHS + BASELINE_PATHS + ("dispatch",)
+
+
+class _Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.sum += seconds
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+    def cumulative(self) -> list[int]:
+        total, out = 0, []
+        for n in self.buckets:
+            total += n
+            out.append(total)
+        return out
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+class RouteMetrics:
+    """每條對話路徑的請求數、延遲直方圖、誤命中回報與省下時間估算"""
+
+    def __init__(self, miss_baseline: float = METRICS_MISS_BASELINE_SECONDS, false_hits_path=FALSE_HITS_PATH):
+        self.miss_baseline = miss_baseline
+        self.false_hits_path = false_hits_path
+        self._lock = threading.Lock()
+        self._paths: dict[str, _Histogram] = {}
+        self._false_hits: dict[str, int] = {}
+
+    def observe(self, path: str, seconds: float):
+        with self._lock:
+            self._paths.setdefault(path, _Histogram()).observe(seconds)
+
+    def report_false_hit(self, path: str, query: str = "", answer: str = "", note: str = ""):
+        """使用者/看板回報某次捷徑答錯；計數並寫入明細 (之後可用來校正語意快取門檻)
+
+        path 不在 KNOWN_PATHS 時拋出 ValueError (路徑名稱會成為 Prometheus 標籤與看板內容)。
+        """
+        if path not in KNOWN_PATHS:
+            raise ValueError(f"Unknown path: {path}")
+        with self._lock:
+            self._false_hits[path] = self._false_hits.get(path, 0) + 1
+        entry = {"timestamp": datetime.datetime.now().isoformat(), "path": path,
+                 "query": query[:500], "answer": answer[:1000], "note": note[:500]}
+        try:
+            with open(self.false_hits_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except Exception as e:
+            log(f"⚠️ [Metrics] 誤命中明細寫入失敗: {e}")
+
+    def _baseline(self) -> float:
+        hists = [self._paths[p] for p in BASELINE_PATHS if p in self._paths]
+        count = sum(h.count for h in hists)
+        return sum(h.sum for h in hists) / count if count else self.miss_baseline
+
+    def snapshot(self) -> dict:
+        """JSON 版指標 (供看板戰情室)"""
+        with self._lock:
+            baseline = self._baseline()
+            paths = {}
+            for name, h in sorted(self._paths.items()):
+                saved = max(baseline - h.mean, 0.0) * h.count if name in SHORTCUT_PATHS else 0.0
+                paths[name] = {
+                    "requests": h.count,
+                    "avg_ms": round(h.mean * 1000, 2),
+                    "false_hits": self._false_hits.get(name, 0),
+                    "seconds_saved": round(saved, 1),
+                    "buckets": dict(zip([str(b) for b in LATENCY_BUCKETS], h.cumulative())),
+                }
+            for name, n in self._false_hits.items():
+                paths.setdefault(name, {"requests": 0, "avg_ms": 0.0, "false_hits": n, "seconds_saved": 0.0,
+                                        "buckets": {}})
+            total = sum(h.count for h in self._paths.values())
+            shortcuts = sum(h.count for n, h in self._paths.items() if n in SHORTCUT_PATHS)
+            return {
+                "miss_baseline_s": round(baseline, 3),
+                "requests": total,
+                "shortcut_rate": round(shortcuts / total, 4) if total else 0.0,
+                "seconds_saved": round(sum(p["seconds_saved"] for p in paths.values()), 1),
+                "paths": paths,
+            }
+
+    def to_prometheus(self, cerebellum: dict | None = None, reflex: dict | None = None,
+                      latency: list[dict] | None = None) -> str:
+        """Prometheus 文字格式；cerebellum / reflex / latency 為各模組 stats() 的輸出"""
+        snap = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_str = ",".join(f'{k}="{_label(v)}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+
+        metric("arielos_chat_requests_total", "counter", "Chat requests answered per path",
+               [({"path": p}, v["requests"]) for p, v in snap["paths"].items()])
+
+        lines.append("# HELP arielos_chat_latency_seconds Chat latency per path (brain: enqueue to completion)")
+        lines.append("# TYPE arielos_chat_latency_seconds histogram")
+        with self._lock:
+            hists = sorted((name, h.cumulative(), h.sum, h.count) for name, h in self._paths.items())
+        for name, cumulative, total, count in hists:
+            for bound, n in zip(LATENCY_BUCKETS, cumulative):
+                lines.append(f'arielos_chat_latency_seconds_bucket{{path="{_label(name)}",le="{bound}"}} {n}')
+            lines.append(f'arielos_chat_latency_seconds_bucket{{path="{_label(name)}",le="+Inf"}} {count}')
+            lines.append(f'arielos_chat_latency_seconds_sum{{path="{_label(name)}"}} {total:.6f}')
+            lines.append(f'arielos_chat_latency_seconds_count{{path="{_label(name)}"}} {count}')
+
+        metric("arielos_false_hits_total", "counter", "Reported wrong answers per path",
+               [({"path": p}, v["false_hits"]) for p, v in snap["paths"].items()])
+        metric("arielos_seconds_saved", "gauge", "Estimated seconds saved by shortcut paths",
+               [({"path": p}, v["seconds_saved"]) for p, v in snap["paths"].items() if p in SHORTCUT_PATHS])
+        metric("arielos_miss_baseline_seconds", "gauge", "Average latency of a full (non-shortcut) answer",
+               [({}, snap["miss_baseline_s"])])
+
+        if cerebellum:
+            caches = []
+            simple = cerebellum.get("simple_cache", {})
+            if simple:
+                caches.append(("simple_cache", simple.get("hits", 0), simple.get("misses", 0)))
+            semantic = cerebellum.get("semantic_cache", {})
+            if semantic:
+                caches.append(("semantic_cache", semantic.get("hits", 0),
+                               semantic.get("lookups", 0) - semantic.get("hits", 0)))
+            facts = cerebellum.get("fact_cache", {}).get("facts", {})
+            if facts:
+                caches.append(("fact_cache", facts.get("hits", 0), facts.get("misses", 0)))
+            llm = cerebellum.get("llm_cache", {})
+            if llm:
+                caches.append(("llm_cache", llm.get("hits", 0), llm.get("misses", 0)))
+            metric("arielos_cache_hits_total", "counter", "Cache hits",
+                   [({"cache": c}, h) for c, h, _ in caches])
+            metric("arielos_cache_misses_total", "counter", "Cache misses",
+                   [({"cache": c}, m) for c, _, m in caches])
+            if semantic:
+                metric("arielos_semantic_cache_guard_rejects_total", "counter",
+                       "Semantic cache candidates rejected by the entity guard",
+                       [({}, semantic.get("guard_rejects", 0))])
+                metric("arielos_semantic_cache_fallback_hits_total", "counter",
+                       "Semantic cache hits served by the CPU char-overlap fallback",
+                       [({}, semantic.get("fallback_hits", 0))])
+            clf = cerebellum.get("intent_classifier", {})
+            if clf:
+                metric("arielos_intent_classifier_total", "counter", "CPU intent classifier outcomes",
+                       [({"outcome": "hit"}, clf.get("hits", 0)), ({"outcome": "fallback"}, clf.get("fallbacks", 0))])
+
+        if reflex:
+            metric("arielos_reflex_checks_total", "counter", "Spinal reflex checks",
+                   [({}, reflex.get("calls", 0))])
+            metric("arielos_reflex_hits_total", "counter", "Spinal reflex hits",
+                   [({}, reflex.get("hits", 0))])
+
+        if latency:
+            metric("arielos_llm_calls_total", "counter", "Cerebellum LLM calls per model and call site",
+                   [({"model": r["model"], "site": r["site"]}, r["count"]) for r in latency])
+            metric("arielos_llm_timeouts_total", "counter", "Cerebellum LLM timeouts per model and call site",
+                   [({"model": r["model"], "site": r["site"]}, r["timeouts"]) for r in latency])
+
+        return "\n".join(lines) + "\n"
+
+
+# 全域單例
+METRICS = RouteMetrics()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+modules/model_residency.py — ArielOS 模型常駐規劃
+
+低 VRAM / CPU 為主的主機上，Ollama 一次只放得下少數模型；每次在
+INTENT_MODEL 與 CEREBELLUM_MODEL 之間切換都要卸載/重新載入權重 (數秒)。
+本模組負責：
+  1. 推算目前哪些模型常駐在 Ollama (依請求紀錄 + keep_alive 到期時間，可用 /api/ps 校正)
+  2. 依模型決定 keep_alive：主力模型留久一點，備用模型用完盡快釋放 VRAM
+  3. 提供 LLMScheduler 判斷「此模型是否已常駐」，讓排隊中的非互動呼叫優先跑已載入的模型
+  4. 統計載入次數、換出 (swap) 次數與常駐命中率
+
+包含：ModelResidency, RESIDENCY (全域單例)
+"""
+
+import time
+import threading
+from collections import Counter, OrderedDict
+
+from .config import (
+    OLLAMA_MAX_LOADED_MODELS, MODEL_KEEP_ALIVE_DEFAULT, MODEL_KEEP_ALIVE, log
+)
+
+
+class ModelResidency:
+    """Ollama 模型常駐狀態追蹤 (LRU，容量 = OLLAMA_MAX_LOADED_MODELS)"""
+
+    def __init__(self, capacity: int = OLLAMA_MAX_LOADED_MODELS,
+                 default_keep_alive: int = MODEL_KEEP_ALIVE_DEFAULT, keep_alive: dict | None = None):
+        self.capacity = max(1, capacity)
+        self.default_keep_alive = default_keep_alive
+        self.keep_alive_overrides = dict(keep_alive or {})
+        self._lock = threading.Lock()
+        self._resident: OrderedDict = OrderedDict()  # model -> 預估卸載時間 (monotonic)；最近使用者在尾端
+        self._requests = 0
+        self._resident_hits = 0
+        self._swaps = 0
+        self._loads = Counter()
+        self._evictions = Counter()
+
+    def keep_alive(self, model: str) -> int:
+        """送給 Ollama 的 keep_alive (秒)；負值代表永久常駐"""
+        return self.keep_alive_overrides.get(model, self.default_keep_alive)
+
+    def _expiry(self, model: str, now: float) -> float:
+        ka = self.keep_alive(model)
+        return float("inf") if ka < 0 else now + ka
+
+    def _expire(self, now: float):
+        for model in [m for m, until in self._resident.items() if until <= now]:
+            del self._resident[model]
+
+    # ── 查詢 ──────────────────────────────────────────────────────────────────
+
+    def is_resident(self, model: str) -> bool:
+        with self._lock:
+            self._expire(time.monotonic())
+            return model in self._resident
+
+    def resident_models(self) -> list[str]:
+        with self._lock:
+            self._expire(time.monotonic())
+            return list(self._resident)
+
+    # ── 記錄 ──────────────────────────────────────────────────────────────────
+
+    def note_request(self, model: str):
+        """記錄一次送往 Ollama 的請求，推算是否觸發模型載入與換出"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            self._requests += 1
+            if model in self._resident:
+                self._resident_hits += 1
+                self._resident.move_to_end(model)
+            else:
+                self._loads[model] += 1
+                if len(self._resident) >= self.capacity:
+                    victim, _ = self._resident.popitem(last=False)
+                    self._evictions[victim] += 1
+                    self._swaps += 1
+                    log(f"🔁 [Residency] 模型換出 {victim} → 載入 {model} (累計 {self._swaps} 次)")
+            self._resident[model] = self._expiry(model, now)
+
+    def sync(self, client) -> bool:
+        """以 Ollama /api/ps 校正常駐清單 (Ollama 重啟、手動 ollama run 等情況)"""
+        try:
+            resp = client.get("/api/ps", timeout=2)
+            resp.raise_for_status()
+            loaded = [m.get("name") or m.get("model") for m in resp.json().get("models", [])]
+        except Exception:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            synced = OrderedDict()
+            for model in loaded:
+                if model:
+                    synced[model] = self._resident.get(model, self._expiry(model, now))
+            self._resident = synced
+        return True
+
+    # ── 統計 ──────────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._expire(time.monotonic())
+            return {
+                "capacity": self.capacity,
+                "resident": list(self._resident),
+                "requests": self._requests,
+                "resident_hit_rate": round(self._resident_hits / self._requests, 3) if self._requests else 0.0,
+                "swaps": self._swaps,
+                "loads": dict(self._loads),
+                "evictions": dict(self._evictions),
+            }
+
+
+# 全域單例
+RESIDENCY = ModelResidency(keep_alive=MODEL_KEEP_ALIVE)
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+modules/ollama_client.py — ArielOS Ollama 共用連線模組
+
+cerebellum.py、memory_manager.py、skill_manager.py 的所有小腦呼叫都經由此處，
+共用同一組 keep-alive 連線池與同一套模型降級策略；
+每次請求都會帶上 modules/model_residency 決定的 keep_alive 並記錄模型常駐狀態；
+目標模型未常駐時逾時再放寬 MODEL_COLD_LOAD_ALLOWANCE 秒，載入權重不會被判定為逾時而觸發斷路；
+斷路中的模型 (modules/circuit_breaker) 直接略過，不再等滿 timeout；
+指定 site 時每個候選模型各自依 modules/latency_tracker 的實測延遲決定 deadline 並記錄樣本。
+
+包含：OllamaClient, OLLAMA (全域單例)
+"""
+
+import json
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .config import (
+    OLLAMA_HOST, CEREBELLUM_MODEL, CEREBELLUM_FALLBACK_MODEL,
+    OLLAMA_POOL_MAXSIZE, OLLAMA_CONNECT_RETRIES, BREAKER_PROBE_TIMEOUT, MODEL_COLD_LOAD_ALLOWANCE, log
+)
+from .model_residency import RESIDENCY
+from .circuit_breaker import BREAKERS
+from .latency_tracker import LATENCY
+
+
+class OllamaClient:
+    """Ollama HTTP 用戶端 (連線池 + 統一降級策略)"""
+
+    def __init__(self, host: str = OLLAMA_HOST, pool_maxsize: int = OLLAMA_POOL_MAXSIZE,
+                 connect_retries: int = OLLAMA_CONNECT_RETRIES):
+        self.host = host.rstrip("/")
+        self.generate_url = f"{self.host}/api/generate"
+        self._session = self._build_session(pool_maxsize, connect_retries)
+
+    @staticmethod
+    def _build_session(pool_maxsize: int, connect_retries: int) -> requests.Session:
+        """建立共用 Session：每個主機最多 pool_maxsize 條連線，滿了就排隊 (pool_block)"""
+        # 只重試連線層級錯誤 (例如 Ollama 正在重啟)；讀取逾時不重試，交給模型降級處理
+        retry = Retry(total=connect_retries, connect=connect_retries, read=0, status=0,
+                      backoff_factor=0.3, allowed_methods=None)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize,
+                              pool_block=True, max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    # ── 低階 HTTP ─────────────────────────────────────────────────────────────
+
+    def post(self, url: str, json: dict, timeout: float = 120, stream: bool = False):
+        return self._session.post(url, json=json, timeout=timeout, stream=stream)
+
+    def get(self, path: str, timeout: float = 5):
+        return self._session.get(f"{self.host}{path}", timeout=timeout)
+
+    # ── 模型呼叫 ──────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def candidate_models(model: str | None, fallback_model: str | None = CEREBELLUM_FALLBACK_MODEL) -> list[str]:
+        """依嘗試順序列出模型：指定模型 (或 CEREBELLUM_MODEL) → 備用模型"""
+        primary = model or CEREBELLUM_MODEL
+        candidates = [primary]
+        if fallback_model and fallback_model != primary:
+            candidates.append(fallback_model)
+        return candidates
+
+    @staticmethod
+    def _model_payload(payload: dict, target: str) -> dict:
+        """補上 model 與 keep_alive，並記錄到常駐規劃 (推算模型載入/換出)"""
+        RESIDENCY.note_request(target)
+        return {**payload, "model": target, "keep_alive": RESIDENCY.keep_alive(target)}
+
+    @staticmethod
+    def _timeout_for(target: str, timeout: float) -> float:
+        """目標模型未常駐時加上載入權重的時間 (需在 _model_payload 記錄請求之前呼叫)"""
+        return timeout if RESIDENCY.is_resident(target) else timeout + MODEL_COLD_LOAD_ALLOWANCE
+
+    @staticmethod
+    def _deadline_for(target: str, timeout: float, site: str | None) -> float:
+        """此候選模型的推論 deadline：指定 site 時依該模型的實測 p99 推算，否則沿用 timeout"""
+        return LATENCY.deadline(target, site, timeout) if site else timeout
+
+    @staticmethod
+    def _record_latency(target: str, site: str | None, cold: bool, seconds: float, e: Exception | None = None):
+        """記錄單一候選模型的延遲樣本；冷啟動包含載入權重、非逾時的失敗沒有意義，皆不計入"""
+        if not site or cold:
+            return
+        if e is None:
+            LATENCY.record(target, site, seconds)
+        elif "timed out" in str(e).lower():
+            LATENCY.record(target, site, seconds, timed_out=True)
+
+    def _routable_models(self, model: str | None, fallback_model: str | None) -> list[str]:
+        """候選模型中略過斷路中的模型；全部斷路時立即失敗，不佔用 timeout"""
+        candidates = self.candidate_models(model, fallback_model)
+        routable = BREAKERS.routable(candidates, self.probe_model)
+        if not routable:
+            raise RuntimeError(f"所有候選模型皆處於斷路狀態: {', '.join(candidates)}")
+        if routable[0] != candidates[0]:
+            log(f"🔌 [Breaker] {candidates[0]} 斷路中，直接改用 {routable[0]}")
+        return routable
+
+    def probe_model(self, model: str) -> bool:
+        """斷路器半開探針：/api/tags 確認模型存在，再送 1 token 的 generate 確認能回應"""
+        resp = self.get("/api/tags", timeout=5)
+        resp.raise_for_status()
+        names = set()
+        for m in resp.json().get("models", []):
+            names.update(filter(None, (m.get("name"), m.get("model"))))
+        if model not in names and f"{model}:latest" not in names:
+            return False
+        payload = {"prompt": "ping", "stream": False, "options": {"num_predict": 1}}
+        resp = self.post(self.generate_url, json=self._model_payload(payload, model), timeout=BREAKER_PROBE_TIMEOUT)
+        resp.raise_for_status()
+        return True
+
+    def preload(self, model: str, timeout: float = 300):
+        """預載模型到記憶體 (空 prompt 的 /api/generate 只載入權重、不產生文字)"""
+        resp = self.post(self.generate_url, json=self._model_payload({"prompt": "", "stream": False}, model),
+                         timeout=timeout)
+        resp.raise_for_status()
+
+    def generate(self, prompt: str, model: str | None = None, options: dict | None = None,
+                 timeout: float = 180, fallback_model: str | None = CEREBELLUM_FALLBACK_MODEL,
+                 output_format: dict | str | None = None, site: str | None = None) -> tuple[str, str]:
+        """呼叫 /api/generate，回傳 (完整文字, 實際回答的模型)。
+
+        主要模型逾時、不存在 (HTTP 404) 或回傳錯誤時自動降級至 fallback_model；
+        斷路中的模型直接略過；未常駐的模型逾時另加 MODEL_COLD_LOAD_ALLOWANCE。
+        全部失敗則拋出最後一次的例外，由呼叫端決定如何處理。
+        output_format：Ollama 結構化輸出 ("json" 或 JSON Schema dict)，對應 payload 的 format 欄位。
+        回答的模型與 model 不同代表已降級，呼叫端據此決定是否快取 (見 cerebellum_call)。
+        site：指定時 timeout 視為預設值，每個候選模型改用 LATENCY 推算的 deadline，
+        並在回應或 deadline 到期的當下記錄該模型的延遲樣本 (主要模型逾時後降級也會留下逾時紀錄)。
+        """
+        payload = {"prompt": prompt, "stream": False, "options": options or {}}
+        if output_format:
+            payload["format"] = output_format
+        candidates = self._routable_models(model, fallback_model)
+        last_error = None
+        for i, target in enumerate(candidates):
+            deadline = self._deadline_for(target, timeout, site)
+            cold = not RESIDENCY.is_resident(target)
+            started = time.monotonic()
+            try:
+                target_timeout = self._timeout_for(target, deadline)
+                resp = self.post(self.generate_url, json=self._model_payload(payload, target), timeout=target_timeout)
+                resp.raise_for_status()
+                text = resp.json().get('response', '').strip()
+                BREAKERS.get(target).record_success()
+                self._record_latency(target, site, cold, time.monotonic() - started)
+                return text, target
+            except Exception as e:
+                BREAKERS.get(target).record_failure(e)
+                self._record_latency(target, site, cold, deadline, e)
+                last_error = e
+                if i + 1 < len(candidates):
+                    log(f"⚠️ [{target}] 失敗，降級至 {candidates[i + 1]}: {e}")
+        raise last_error
+
+    def generate_stream(self, prompt: str, model: str | None = None, options: dict | None = None,
+                        timeout: float = 180, fallback_model: str | None = CEREBELLUM_FALLBACK_MODEL):
+        """串流版 generate：讀取 Ollama 的 NDJSON 串流，逐段 yield 文字片段。
+
+        只有在尚未輸出任何片段前失敗才會降級至 fallback_model；
+        串流中途斷線則直接拋出例外 (已送出的片段無法收回)。
+        """
+        payload = {"prompt": prompt, "stream": True, "options": options or {}}
+        candidates = self._routable_models(model, fallback_model)
+        last_error = None
+        for i, target in enumerate(candidates):
+            started = False
+            try:
+                target_timeout = self._timeout_for(target, timeout)
+                with self.post(self.generate_url, json=self._model_payload(payload, target),
+                               timeout=target_timeout, stream=True) as resp:
+                    resp.raise_for_status()
+                    for line in resp.iter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get("error"):
+                            raise RuntimeError(chunk["error"])
+                        piece = chunk.get("response", "")
+                        if piece:
+                            started = True
+                            yield piece
+                        if chunk.get("done"):
+                            break
+                BREAKERS.get(target).record_success()
+                return
+            except Exception as e:
+                BREAKERS.get(target).record_failure(e)
+                if started:
+                    raise
+                last_error = e
+                if i + 1 < len(candidates):
+                    log(f"⚠️ [{target}] 串流失敗，降級至 {candidates[i + 1]}: {e}")
+        raise last_error
+
+
+# 全域單例
+OLLAMA = OllamaClient()
@@ -12,6 +12,7 @@ import datetime
 from pathlib import Path
 
 from .config import BASE_DIR, AGENTS_CONFIG_PATH, log
+from .reflex_engine import REFLEX
 
 
 # ── 代理人登錄表 ──────────────────────────────────────────────────────────────
@@ -183,71 +184,18 @@ def _sanitize_persona(text: str, agent_name: str) -> str:
     return text
 
 
-def _get_time_context() -> str:
-    """⏰ 取得目前的系統時間上下文"""
+def _get_time_context(date_only: bool = False) -> str:
+    """⏰ 取得目前的系統時間上下文 (date_only=True 時只含日期)"""
     now = datetime.datetime.now()
     weekday_map = ["一", "二", "三", "四", "五", "六", "日"]
     weekday = weekday_map[now.weekday()]
-    return f"[系統時間：{now.strftime('%Y-%m-%d %H:%M:%S')} (星期{weekday})]\n"
+    stamp = now.strftime('%Y-%m-%d') if date_only else now.strftime('%Y-%m-%d %H:%M:%S')
+    return f"[系統時間：{stamp} (星期{weekday})]\n"
 
 
 def spinal_chord_reflex(query: str, agent_id: str, agent_registry: dict, pe, sm=None) -> str | None:
-    """⚡ 脊髓反射：不經大腦與小腦，直接以規則處理極簡問題 (0.01s)"""
-    q = query.strip().lower().replace(" ", "")
-    agent_name = agent_registry.get(agent_id, {}).get("name", "Ariel Agent")
-    now = datetime.datetime.now()
+    """⚡ 脊髓反射：不經大腦與小腦，直接以規則處理極簡問題 (0.01s)
 
-    # 1. 攔截技能資訊型詢問 (直接由 sm 列出，不進 LLM)
-    info_queries = ["有哪些技能", "有什麼技能", "會什麼", "技術列表", "功能清單", "懂什麼", "能幫我做什麼"]
-    if any(k in q for k in info_queries) and len(q) < 15:
-        if sm:
-            installed = [s['name'] for s in sm.list_installed()]
-            if not installed:
-                return "報告老闆，我目前尚未安裝額外技能。您可以命令我學習新工具或幫您開發 Python 腳本！"
-            return f"報告老闆，我目前具備以下技能工具：\n" + "\n".join([f"- {n}" for n in installed]) + "\n\n若上述沒有您需要的，我也可以隨時現場開發新功能。"
-
-    # 2. 時間日期增強
-    if any(k in q for k in ["今天日期", "現在時間", "幾月幾號", "星期幾", "現在幾點", "today", "now", "time"]):
-        if len(q) < 20 and not any(k in q for k in ["東京", "美國", "票", "天氣", "新聞"]):
-            weekday = ["一", "二", "三", "四", "五", "六", "日"][now.weekday()]
-            return f"今天是 {now.strftime('%Y 年 %m 月 %d 日')}，現在時間 {now.strftime('%H:%M')}，星期{weekday}。"
-
-    if any(k in q for k in ["明天幾號", "明天星期幾", "後天幾號"]):
-        target = now + datetime.timedelta(days=1 if "明天" in q else 2)
-        weekday = ["一", "二", "三", "四", "五", "六", "日"][target.weekday()]
-        day_str = "明天" if "明天" in q else "後天"
-        return f"{day_str}是 {target.strftime('%Y 年 %m 月 %d 日')}，星期{weekday}。"
-
-    # 3. 基本身份與介紹
-    if any(k in q for k in ["你是誰", "妳是誰", "你的名字", "妳的名字", "whoareyou", "自我介紹", "介紹自己"]):
-        dynamic_intro = pe.get_intro(agent_id)
-        fallback_intro = agent_registry.get(agent_id, {}).get("intro", f"我是 {agent_name}，您的 AI 助理。")
-        return dynamic_intro if dynamic_intro else fallback_intro
-
-    # 4. 基礎問候 (包含長度限制與過濾)
-    greetings = ["hi", "hello", "你好", "您好", "早安", "午安", "晚安", "哈囉", "安安"]
-    if q in greetings or (len(q) < 6 and any(k == q for k in greetings)):
-        hour = now.hour
-        greeting = "早安" if 5 <= hour < 12 else "午安" if 12 <= hour < 18 else "晚安"
-        return f"{agent_name} 祝您{greeting}！有什麼我可以幫您的嗎？"
-
-    # 5. 感謝與禮貌
-    if any(k in q for k in ["謝謝", "感謝", "辛苦了", "thanks", "thankyou"]):
-        if len(q) < 10:
-            return "不客氣，這是我的榮幸！"
-
-    # 6. 系統狀態
-    if q in ["系統狀態", "status", "version", "版本", "ping", "檢查系統"]:
-        return f"🟢 ArielOS 運作正常 | Agent: {agent_name} | Pre-check: All Green"
-
-    # 7. 協助工具
-    if any(k == q for k in ["help", "說明", "指令", "功能", "你能做什麼"]):
-        return (
-            f"我是您的 {agent_name} 智能助理，我可以協助您：\n"
-            "1. 🔍 **搜尋資訊**：網路即時搜尋天氣、新聞、股價\n"
-            "2. 🛠️ **執行技能**：讀寫檔案、Git 操作、MCP 工具調用\n"
-            "3. 💻 **程式開發**：Python 腳本生成、資料分析沙盒執行\n"
-            "4. 🧠 **進階記憶**：自動追蹤您的偏好、專案進度與自進化守則\n"
-            "請直接告訴我您需要什麼！"
-        )
-    return None
+    規則定義於 Shared_Vault/reflex_rules.json，由 modules/reflex_engine 編譯並熱重載。
+    """
+    return REFLEX.respond(query, agent_id, agent_registry, pe, sm)
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+modules/reflex_engine.py — ArielOS 資料驅動脊髓反射
+
+原本 spinal_chord_reflex 是手寫的 if 鏈，每次請求都重建關鍵字清單並呼叫 datetime.now()。
+現在反射規則定義在 Shared_Vault/reflex_rules.json (不存在時寫入預設規則)：
+  - 規則依序比對，第一條成立且產生回答的規則勝出
+  - contains / exclude 關鍵字編譯進 modules/keyword_matcher 的共用自動機，每則訊息只掃描一次
+  - equals 為完全相等比對 (集合查詢)；max_len 限制訊息長度
+  - 回答來自 handler (內建動態回答，見 _HANDLERS) 或 template (str.format 樣板)
+  - agent_templates 可為個別代理人覆寫樣板
+  - 規則檔修改後自動重新載入 (每 REFLEX_RELOAD_INTERVAL 秒檢查 mtime)，不需重啟 Bridge
+
+樣板可用變數：{agent_name} {agent_id} {date} {time} {weekday} {greeting}
+
+規則範例：
+    {"name": "thanks", "contains": ["謝謝", "thanks"], "max_len": 10,
+     "template": "不客氣，這是我的榮幸！",
+     "agent_templates": {"agent2": "不用客氣～"}}
+
+包含：ReflexEngine, REFLEX (全域單例), DEFAULT_REFLEX_RULES
+"""
+
+import json
+import time
+import datetime
+import threading
+
+from .config import REFLEX_RULES_PATH, REFLEX_RELOAD_INTERVAL, log
+from .keyword_matcher import KEYWORDS
+
+_WEEKDAYS = ["一", "二", "三", "四", "五", "六", "日"]
+
+DEFAULT_REFLEX_RULES = {
+    "rules": [
+        {"name": "skill_list", "handler": "skill_list", "max_len": 14,
+         "contains": ["有哪些技能", "有什麼技能", "會什麼", "技術列表", "功能清單", "懂什麼", "能幫我做什麼"]},
+        {"name": "time_now", "handler": "time_now", "max_len": 19,
+         "contains": ["今天日期", "現在時間", "幾月幾號", "星期幾", "現在幾點", "today", "now", "time"],
+         "exclude": ["東京", "美國", "票", "天氣", "新聞"]},
+        {"name": "date_ahead", "handler": "date_ahead",
+         "contains": ["明天幾號", "明天星期幾", "後天幾號"]},
+        {"name": "identity", "handler": "identity",
+         "contains": ["你是誰", "妳是誰", "你的名字", "妳的名字", "whoareyou", "自我介紹", "介紹自己"]},
+        {"name": "greeting", "template": "{agent_name} 祝您{greeting}！有什麼我可以幫您的嗎？",
+         "equals": ["hi", "hello", "你好", "您好", "早安", "午安", "晚安", "哈囉", "安安"]},
+        {"name": "thanks", "template": "不客氣，這是我的榮幸！", "max_len": 9,
+         "contains": ["謝謝", "感謝", "辛苦了", "thanks", "thankyou"]},
+        {"name": "status", "template": "🟢 ArielOS 運作正常 | Agent: {agent_name} | Pre-check: All Green",
+         "equals": ["系統狀態", "status", "version", "版本", "ping", "檢查系統"]},
+        {"name": "help", "equals": ["help", "說明", "指令", "功能", "你能做什麼"],
+         "template": ("我是您的 {agent_name} 智能助理，我可以協助您：\n"
+                      "1. 🔍 **搜尋資訊**：網路即時搜尋天氣、新聞、股價\n"
+                      "2. 🛠️ **執行技能**：讀寫檔案、Git 操作、MCP 工具調用\n"
+                      "3. 💻 **程式開發**：Python 腳本生成、資料分析沙盒執行\n"
+                      "4. 🧠 **進階記憶**：自動追蹤您的偏好、專案進度與自進化守則\n"
+                      "請直接告訴我您需要什麼！")},
+    ]
+}
+
+
+class _Context:
+    """規則命中後才計算的回答上下文 (未命中的請求不呼叫 datetime.now())"""
+
+    def __init__(self, query: str, agent_id: str, agent_registry: dict, pe, sm):
+        self.query = query
+        self.agent_id = agent_id
+        self.agent_registry = agent_registry
+        self.pe = pe
+        self.sm = sm
+        self.agent_name = agent_registry.get(agent_id, {}).get("name", "Ariel Agent")
+        self._now = None
+
+    @property
+    def now(self) -> datetime.datetime:
+        if self._now is None:
+            self._now = datetime.datetime.now()
+        return self._now
+
+    def variables(self) -> dict:
+        now = self.now
+        return {
+            "agent_name": self.agent_name,
+            "agent_id": self.agent_id,
+            "date": now.strftime('%Y 年 %m 月 %d 日'),
+            "time": now.strftime('%H:%M'),
+            "weekday": _WEEKDAYS[now.weekday()],
+            "greeting": "早安" if 5 <= now.hour < 12 else "午安" if 12 <= now.hour < 18 else "晚安",
+        }
+
+
+# ── 內建 handler (需要程式邏輯的反射；回傳 None 代表交給下一條規則) ─────────────
+
+def _skill_list(ctx: _Context) -> str | None:
+    if not ctx.sm:
+        return None
+    installed = [s['name'] for s in ctx.sm.list_installed()]
+    if not installed:
+        return "報告老闆，我目前尚未安裝額外技能。您可以命令我學習新工具或幫您開發 Python 腳本！"
+    return f"報告老闆，我目前具備以下技能工具：\n" + "\n".join([f"- {n}" for n in installed]) + "\n\n若上述沒有您需要的，我也可以隨時現場開發新功能。"
+
+
+def _time_now(ctx: _Context) -> str:
+    v = ctx.variables()
+    return f"今天是 {v['date']}，現在時間 {v['time']}，星期{v['weekday']}。"
+
+
+def _date_ahead(ctx: _Context) -> str:
+    days = 1 if "明天" in ctx.query else 2
+    target = ctx.now + datetime.timedelta(days=days)
+    day_str = "明天" if days == 1 else "後天"
+    return f"{day_str}是 {target.strftime('%Y 年 %m 月 %d 日')}，星期{_WEEKDAYS[target.weekday()]}。"
+
+
+def _identity(ctx: _Context) -> str:
+    dynamic_intro = ctx.pe.get_intro(ctx.agent_id)
+    fallback_intro = ctx.agent_registry.get(ctx.agent_id, {}).get("intro", f"我是 {ctx.agent_name}，您的 AI 助理。")
+    return dynamic_intro if dynamic_intro else fallback_intro
+
+
+_HANDLERS = {
+    "skill_list": _skill_list,
+    "time_now": _time_now,
+    "date_ahead": _date_ahead,
+    "identity": _identity,
+}
+
+
+class _Rule:
+    __slots__ = ("name", "group", "exclude_group", "equals", "max_len", "handler", "template", "agent_templates")
+
+    def __init__(self, spec: dict):
+        self.name = spec["name"]
+        self.group = f"reflex:{self.name}" if spec.get("contains") else None
+        self.exclude_group = f"reflex:{self.name}:exclude" if spec.get("exclude") else None
+        self.equals = frozenset(spec.get("equals", ()))
+        self.max_len = spec.get("max_len")
+        self.handler = _HANDLERS.get(spec["handler"]) if spec.get("handler") else None
+        self.template = spec.get("template")
+        self.agent_templates = spec.get("agent_templates", {})
+        if spec.get("handler") and self.handler is None:
+            raise ValueError(f"規則 {self.name} 使用未知 handler: {spec['handler']}")
+        if not (self.group or self.equals):
+            raise ValueError(f"規則 {self.name} 需要 contains 或 equals")
+        if self.handler is None and self.template is None and not self.agent_templates:
+            raise ValueError(f"規則 {self.name} 需要 handler 或 template")
+
+    def matches(self, q: str, hits: dict) -> bool:
+        if self.max_len is not None and len(q) > self.max_len:
+            return False
+        if not ((self.group and self.group in hits) or q in self.equals):
+            return False
+        return not (self.exclude_group and self.exclude_group in hits)
+
+    def respond(self, ctx: _Context) -> str | None:
+        template = self.agent_templates.get(ctx.agent_id, self.template)
+        if template is not None:
+            return template.format(**ctx.variables())
+        return self.handler(ctx)
+
+
+class ReflexEngine:
+    """編譯規則檔為依序比對的分派表，並統計命中次數與延遲"""
+
+    def __init__(self, path=REFLEX_RULES_PATH, reload_interval: float = REFLEX_RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._rules: list[_Rule] = []
+        self._groups: tuple = ()
+        self._mtime = None
+        self._last_check = 0.0
+        self._calls = 0
+        self._misses = 0
+        self._seconds = 0.0
+        self._max_seconds = 0.0
+        self._rule_hits: dict[str, int] = {}
+        self._reloads = 0
+        self._load_error = ""
+
+    # ── 規則載入 ──────────────────────────────────────────────────────────────
+
+    def _compile(self, spec: dict):
+        rules = [_Rule(r) for r in spec.get("rules", [])]
+        with self._lock:
+            for group in self._groups:
+                KEYWORDS.unregister(group)
+            groups = []
+            for raw, rule in zip(spec.get("rules", []), rules):
+                if rule.group:
+                    KEYWORDS.register(rule.group, [k.lower().replace(" ", "") for k in raw["contains"]])
+                    groups.append(rule.group)
+                if rule.exclude_group:
+                    KEYWORDS.register(rule.exclude_group, [k.lower().replace(" ", "") for k in raw["exclude"]])
+                    groups.append(rule.exclude_group)
+            self._rules = rules
+            self._groups = tuple(groups)
+            self._rule_hits = {r.name: self._rule_hits.get(r.name, 0) for r in rules}
+
+    def reload(self, force: bool = False) -> bool:
+        """規則檔有變動 (或 force) 時重新編譯；格式錯誤時保留舊規則並記錄錯誤"""
+        with self._reload_lock:
+            return self._reload(force)
+
+    def _reload(self, force: bool) -> bool:
+        mtime = None
+        try:
+            if not self.path.exists():
+                with open(self.path, "w", encoding="utf-8") as f:
+                    json.dump(DEFAULT_REFLEX_RULES, f, ensure_ascii=False, indent=2)
+                log(f"⚡ [Reflex] 已建立預設反射規則檔: {self.path}")
+            mtime = self.path.stat().st_mtime
+            if not force and mtime == self._mtime:
+                return False
+            with open(self.path, "r", encoding="utf-8") as f:
+                spec = json.load(f)
+            self._compile(spec)
+            self._mtime = mtime
+            self._reloads += 1
+            self._load_error = ""
+            log(f"⚡ [Reflex] 載入 {len(self._rules)} 條反射規則")
+            return True
+        except Exception as e:
+            self._mtime = mtime   # 同一個壞檔不重複解析，等下次修改再試
+            self._load_error = str(e)
+            log(f"⚠️ [Reflex] 規則檔載入失敗，沿用目前規則: {e}")
+            if not self._rules:
+                self._compile(DEFAULT_REFLEX_RULES)
+            return False
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if self._rules and now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+        self.reload()
+
+    # ── 比對 ──────────────────────────────────────────────────────────────────
+
+    def respond(self, query: str, agent_id: str, agent_registry: dict, pe, sm=None) -> str | None:
+        self._maybe_reload()
+        started = time.perf_counter()
+        q = query.strip().lower().replace(" ", "")
+        hits = KEYWORDS.match(q, groups=self._groups)
+        answer, matched = None, None
+        ctx = None
+        for rule in self._rules:
+            if not rule.matches(q, hits):
+                continue
+            ctx = ctx or _Context(q, agent_id, agent_registry, pe, sm)
+            answer = rule.respond(ctx)
+            if answer:
+                matched = rule.name
+                break
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._calls += 1
+            self._seconds += elapsed
+            self._max_seconds = max(self._max_seconds, elapsed)
+            if matched:
+                self._rule_hits[matched] = self._rule_hits.get(matched, 0) + 1
+            else:
+                self._misses += 1
+        return answer
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self._calls - self._misses
+            return {
+                "rules_path": str(self.path),
+                "rules": len(self._rules),
+                "reloads": self._reloads,
+                "load_error": self._load_error,
+                "calls": self._calls,
+                "hits": hits,
+                "hit_rate": round(hits / self._calls, 4) if self._calls else 0.0,
+                "avg_ms": round(self._seconds / self._calls * 1000, 3) if self._calls else 0.0,
+                "max_ms": round(self._max_seconds * 1000, 3),
+                "rule_hits": dict(self._rule_hits),
+            }
+
+
+# 全域單例
+REFLEX = ReflexEngine()
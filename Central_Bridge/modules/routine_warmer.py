@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+modules/routine_warmer.py — ArielOS 例行任務預熱
+
+scheduler_worker 在 routines.json 指定的 HH:MM 才把任務丟進大腦佇列，
+所有搜尋/技能工作都剛好卡在使用者等結果的那一刻。
+
+預熱模式：在排定時間前 ROUTINE_WARM_LEAD_MINUTES 分鐘，於背景執行緒先跑一次例行任務的
+搜尋/技能部分 (意圖分類 → 快車道執行)，結果只存在本模組的預熱區，
+key 為 (代理人, 例行任務 id, 排定時間)，保留到排定時間後 ROUTINE_WARM_GRACE_MINUTES 為止。
+到點時 brain_worker 以同一組 key 取出 (取出即刪除) 並直接完成看板任務。
+
+預熱結果不寫入 AnswerStore / 語意快取：一般對話不會命中預熱答案，
+例行任務也不會拿到一般對話留下的舊摘要或其他代理人的預熱結果。
+
+  - 只預熱 SEARCH；SKILL 可能有副作用 (寄信、下單…)，須在例行任務加上 "warm": true 才會預跑
+  - "warm": false 可停用單一例行任務的預熱
+  - 系統忙碌 (大腦佇列有任務、小腦有請求排隊、最近 ROUTINE_WARM_IDLE_SECONDS 秒內有對話) 時跳過，
+    下一輪 (30 秒後) 仍在提前時間內會再試
+  - 同一時間只預熱一個例行任務，避免搶走互動請求的 Ollama 名額
+
+包含：RoutineWarmer, ROUTINE_WARMER (全域單例), routine_id
+"""
+
+import time
+import datetime
+import threading
+
+from .config import (
+    ROUTINE_WARM_ENABLED, ROUTINE_WARM_LEAD_MINUTES, ROUTINE_WARM_GRACE_MINUTES, ROUTINE_WARM_IDLE_SECONDS, log
+)
+from .llm_scheduler import LLM_SCHEDULER
+
+
+def routine_id(routine: dict) -> str:
+    """例行任務識別碼：routines.json 有 "id" 時使用，否則以 時間|任務 組成"""
+    return str(routine.get("id") or f"{routine.get('time')}|{routine.get('task')}")
+
+
+def _next_run(r_time: str, now: datetime.datetime) -> datetime.datetime | None:
+    """例行任務 HH:MM 的下一次執行時間 (今天已過則為明天)"""
+    try:
+        hh, mm = (int(x) for x in r_time.split(":"))
+        run_at = now.replace(hour=hh, minute=mm, second=0, microsecond=0)
+    except (AttributeError, ValueError):
+        return None
+    if run_at <= now:
+        run_at += datetime.timedelta(days=1)
+    return run_at
+
+
+class RoutineWarmer:
+    """在排定時間前預跑例行任務的搜尋/技能部分，結果依 (代理人, 例行任務, 排定時間) 保存到點取用"""
+
+    def __init__(self, enabled: bool = ROUTINE_WARM_ENABLED, lead_minutes: float = ROUTINE_WARM_LEAD_MINUTES,
+                 grace_minutes: float = ROUTINE_WARM_GRACE_MINUTES, idle_seconds: float = ROUTINE_WARM_IDLE_SECONDS):
+        self.enabled = enabled
+        self.lead = datetime.timedelta(minutes=lead_minutes)
+        self.grace = datetime.timedelta(minutes=grace_minutes)
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._results: dict = {}         # (agent_id, routine_id, run_at ISO) -> (答案, 到期時間)
+        self._done: set = set()          # (run_at, agent_id, routine_id, task) 已處理 (預熱成功、不需預熱或失敗不重試)
+        self._deferred: set = set()      # 因忙碌暫緩過的 key (只記一次日誌)
+        self._running = False
+        self._warmed = 0
+        self._skipped_busy = 0
+        self._not_warmable = 0
+        self._failed = 0
+        self._served = 0
+
+    # ── 排程端 (scheduler_worker 每輪呼叫) ────────────────────────────────────
+
+    def busy_reason(self, task_queue, last_activity: float) -> str | None:
+        if task_queue is not None and task_queue.qsize() > 0:
+            return "大腦佇列有任務"
+        if sum(LLM_SCHEDULER.stats()["waiting"].values()):
+            return "小腦有請求排隊"
+        if time.time() - last_activity < self.idle_seconds:
+            return "最近有對話"
+        return None
+
+    def tick(self, routines: list[dict], warm_fn, task_queue=None, last_activity: float = 0.0):
+        """挑出進入提前時間的例行任務，在背景執行緒預熱一個
+
+        warm_fn(task, agent_id, allow_skill) -> 答案或 None (由 Bridge 提供：意圖分類 + 快車道執行)
+        """
+        if not self.enabled:
+            return
+        now = datetime.datetime.now()
+        with self._lock:
+            if self._running:
+                return
+            self._done = {k for k in self._done if k[0] + self.grace > now}
+            self._deferred = {k for k in self._deferred if k[0] > now}
+            self._results = {k: v for k, v in self._results.items() if v[1] > now}
+            candidate = None
+            for routine in routines:
+                r_agent, r_task = routine.get("agent_id"), routine.get("task")
+                warm = routine.get("warm")
+                run_at = _next_run(routine.get("time"), now)
+                if not (r_agent and r_task and run_at) or warm is False:
+                    continue
+                key = (run_at, r_agent, routine_id(routine), r_task)
+                if key not in self._done and now < run_at <= now + self.lead:
+                    candidate = (key, warm is True)
+                    break
+            if candidate is None:
+                return
+            reason = self.busy_reason(task_queue, last_activity)
+            if reason:
+                self._skipped_busy += 1
+                if candidate[0] not in self._deferred:
+                    self._deferred.add(candidate[0])
+                    log(f"⏳ [RoutineWarm] 系統忙碌 ({reason})，暫緩預熱: {candidate[0][3][:30]}")
+                return
+            self._running = True
+        threading.Thread(target=self._warm, args=(candidate[0], candidate[1], warm_fn), daemon=True).start()
+
+    def _warm(self, key: tuple, allow_skill: bool, warm_fn):
+        run_at, agent_id, r_id, task = key
+        started = time.perf_counter()
+        outcome = "failed"
+        try:
+            answer = warm_fn(task, agent_id, allow_skill)
+            if answer:
+                with self._lock:
+                    self._results[(agent_id, r_id, run_at.isoformat())] = (answer, run_at + self.grace)
+                outcome = "warmed"
+                log(f"🔥 [RoutineWarm] 已預熱 {run_at:%H:%M} 的例行任務 ({time.perf_counter() - started:.1f}s): {task[:30]}")
+            else:
+                outcome = "not_warmable"
+                log(f"ℹ️ [RoutineWarm] 例行任務不含可預熱的搜尋/技能部分，到點交給大腦: {task[:30]}")
+        except Exception as e:
+            log(f"⚠️ [RoutineWarm] 預熱失敗，到點交給大腦: {e}")
+        finally:
+            with self._lock:
+                self._running = False
+                self._done.add(key)       # 失敗也不重試，避免在提前時間內反覆打 Ollama
+                if outcome == "warmed":
+                    self._warmed += 1
+                elif outcome == "not_warmable":
+                    self._not_warmable += 1
+                else:
+                    self._failed += 1
+
+    # ── 大腦端 (brain_worker 取用預熱結果) ────────────────────────────────────
+
+    def take(self, agent_id: str, r_id: str | None, run_at: str | None) -> str | None:
+        """例行任務到點時取回 (並刪除) 該代理人、該次排程的預熱結果；未預熱或已過期回傳 None"""
+        if not (self.enabled and r_id and run_at):
+            return None
+        with self._lock:
+            entry = self._results.pop((agent_id, r_id, run_at), None)
+            if entry is None or entry[1] <= datetime.datetime.now():
+                return None
+            self._served += 1
+            return entry[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "lead_minutes": self.lead.total_seconds() / 60,
+                "running": self._running,
+                "pending_results": len(self._results),
+                "warmed": self._warmed,
+                "served_from_cache": self._served,
+                "skipped_busy": self._skipped_busy,
+                "not_warmable": self._not_warmable,
+                "failed": self._failed,
+            }
+
+
+# 全域單例
+ROUTINE_WARMER = RoutineWarmer()
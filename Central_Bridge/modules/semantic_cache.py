@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+"""
+modules/semantic_cache.py — ArielOS 向量語意答案快取
+
+原本 cerebellum_semantic_check 只看最後 10 筆未過期記錄，先以字元集合 Jaccard 預篩，
+再請 LLM 輸出 [MATCH_ID] 判定：每次快取查詢都要一次 Ollama 往返，還有 25 秒逾時風險。
+
+本模組把所有有效快取記錄 (modules/answer_store) 的提問向量 (沿用 VectorMemoryManager 的
+Embedding 編碼器，向量存回 AnswerStore) 放進記憶體矩陣，查詢時只做一次編碼 + 一次矩陣內積，
+命中後才依 id 取出答案，不呼叫 LLM：
+  - 索引增量更新：新記錄只編碼自己並附加到矩陣的預留空間，刪除/過期的記錄改為墓碑 (查詢時遮蔽)，
+    墓碑累積過多才壓縮；編碼在鎖外進行，完成後才整批替換，查詢不會卡在別人的編碼上
+  - 相似度 ≥ 門檻才命中；門檻可用標註資料校正 (calibrate)，結果寫入校正檔，重啟後沿用
+  - 實體守門：兩邊的數字、英文詞、地點/時間詞 (SEMANTIC_CACHE_ENTITY_TERMS) 必須完全相同，
+    避免「台北天氣」命中「高雄天氣」
+  - 提問一律先經 normalize_query() (與 AnswerStore 存放的 key 相同)
+  - 編碼器未就緒 (暖機中或停用) 時，退回 CPU 字元重疊 ≥ 0.85 的 Ultra Hit
+    (只比對最近 200 筆，同樣經過實體守門)
+
+校正門檻 (pairs.jsonl 每行 {"a": 提問, "b": 提問, "same": true/false})：
+
+    python -m modules.semantic_cache calibrate pairs.jsonl
+
+包含：SemanticAnswerCache, SEMANTIC_CACHE (全域單例)
+"""
+
+import re
+import json
+import time
+import datetime
+import threading
+
+from .config import (
+    SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_TARGET_PRECISION, SEMANTIC_CACHE_CALIBRATION_PATH,
+    SEMANTIC_CACHE_ENTITY_GUARD, SEMANTIC_CACHE_ENTITY_TERMS, log
+)
+from .answer_store import ANSWER_STORE
+from .keyword_matcher import KEYWORDS
+from .text_normalize import normalize_query
+from .vector_memory import VM
+
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+_LATIN_RE = re.compile(r"[a-z][a-z0-9\-]+")
+_ULTRA_HIT_OVERLAP = 0.85
+_FALLBACK_SCAN = 200       # 字元重疊退路只比對最近的記錄 (O(N) 純 Python)
+_TOMBSTONE_RATIO = 0.25    # 墓碑 (已刪除/過期的列) 超過此比例才壓縮矩陣
+_MIN_CAPACITY = 64         # 矩陣緩衝的最小列數 (不足時以兩倍容量重新配置)
+
+KEYWORDS.register("cache_entity", [normalize_query(t) for t in SEMANTIC_CACHE_ENTITY_TERMS])
+
+
+def extract_entities(query: str) -> frozenset:
+    """實體守門用的特徵：數字、英文詞、地點/時間詞 (比對正規化後的文字，「三天」與「3天」相同)"""
+    q = normalize_query(query)
+    entities = set(_NUMBER_RE.findall(q)) | set(_LATIN_RE.findall(q))
+    entities |= KEYWORDS.match(q, groups=("cache_entity",)).get("cache_entity", set())
+    return frozenset(entities)
+
+
+def _char_overlap(a: str, b: str) -> float:
+    """兩段正規化文字的字元集合 Jaccard"""
+    sa, sb = set(a.replace(" ", "")), set(b.replace(" ", ""))
+    return len(sa & sb) / max(len(sa | sb), 1)
+
+
+class SemanticAnswerCache:
+    """所有有效快取記錄的提問向量索引 (NumPy 矩陣內積)"""
+
+    def __init__(self, store=ANSWER_STORE, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 entity_guard: bool = SEMANTIC_CACHE_ENTITY_GUARD, calibration_path=SEMANTIC_CACHE_CALIBRATION_PATH):
+        self.store = store
+        self.threshold = threshold
+        self.entity_guard = entity_guard
+        self.calibration_path = calibration_path
+        self._lock = threading.Lock()
+        self._entries: list[dict] | None = None   # {"id", "query", "expires", "entities"}；墓碑 expires=0
+        self._matrix = None                 # (N, dim) 正規化向量 (_buffer 的前 N 列)；編碼器未就緒時為 None
+        self._buffer = None                 # 預留空間的向量緩衝，新記錄直接寫在既有列之後
+        self._version = None
+        self._refreshing = False            # 同一時間只有一條執行緒更新索引
+        self._tombstones = 0
+        self._compactions = 0
+        self._lookups = 0
+        self._hits = 0
+        self._guard_rejects = 0
+        self._fallback_lookups = 0
+        self._fallback_hits = 0
+        self._lookup_seconds = 0.0
+        self._load_calibration()
+
+    # ── 校正門檻 ──────────────────────────────────────────────────────────────
+
+    def _load_calibration(self):
+        if not self.calibration_path.exists():
+            return
+        try:
+            with open(self.calibration_path, "r", encoding="utf-8") as f:
+                self.threshold = float(json.load(f)["threshold"])
+            log(f"📐 [SemanticCache] 使用校正門檻 {self.threshold:.3f}")
+        except Exception as e:
+            log(f"⚠️ [SemanticCache] 校正檔讀取失敗，使用預設門檻 {self.threshold}: {e}")
+
+    def calibrate(self, pairs: list[tuple[str, str, bool]],
+                  target_precision: float = SEMANTIC_CACHE_TARGET_PRECISION) -> dict:
+        """以標註的提問對找出「精確率 ≥ target_precision」的最低門檻 (命中最多)，並寫入校正檔
+
+        兩邊提問與 match() 一樣先經 normalize_query，門檻才對應實際查詢時的相似度分佈。
+        """
+        if not VM.is_ready:
+            VM.load()
+        scored = []
+        for a, b, same in pairs:
+            va, vb = VM.encode([normalize_query(a), normalize_query(b)])
+            scored.append((float(va @ vb), bool(same)))
+        scored.sort(reverse=True)
+
+        best, tp, fp = None, 0, 0
+        total_same = sum(1 for _, same in scored if same) or 1
+        for score, same in scored:
+            tp, fp = tp + same, fp + (not same)
+            if tp / (tp + fp) >= target_precision:
+                best = {"threshold": round(score, 4), "precision": round(tp / (tp + fp), 4),
+                        "recall": round(tp / total_same, 4)}
+        if best is None:
+            return {"calibrated": False, "pairs": len(scored), "reason": "沒有任何門檻達到目標精確率"}
+
+        best.update({"calibrated": True, "pairs": len(scored), "target_precision": target_precision,
+                     "calibrated_at": datetime.datetime.now().isoformat(timespec="seconds")})
+        with open(self.calibration_path, "w", encoding="utf-8") as f:
+            json.dump(best, f, ensure_ascii=False, indent=2)
+        self.threshold = best["threshold"]
+        log(f"📐 [SemanticCache] 門檻校正為 {self.threshold:.3f} (精確率 {best['precision']:.1%}，召回率 {best['recall']:.1%})")
+        return best
+
+    # ── 索引維護 ──────────────────────────────────────────────────────────────
+
+    def _load_vectors(self, entries: list[dict]):
+        """新記錄的向量 (與 entries 同順序的矩陣)：先讀 AnswerStore 保存的 BLOB，仍缺的才編碼並寫回"""
+        import numpy as np
+        vectors = {rid: np.frombuffer(blob, dtype=np.float32)
+                   for rid, blob in self.store.embeddings([e["id"] for e in entries]).items()}
+        pending = [e for e in entries if e["id"] not in vectors]
+        if pending:
+            encoded = VM.encode([e["query"] for e in pending])
+            fresh = {}
+            for e, v in zip(pending, encoded):
+                vectors[e["id"]] = np.asarray(v, dtype=np.float32)
+                fresh[e["id"]] = vectors[e["id"]].tobytes()
+            self.store.set_embeddings(fresh)
+        return np.vstack([vectors[e["id"]] for e in entries])
+
+    def _append_rows(self, matrix, vectors):
+        """把新向量接在矩陣之後：matrix 就是緩衝的前幾列且空間足夠時直接寫入 (既有列不搬動，
+        查詢中的舊快照只看得到前 N 列，不受影響)；否則以兩倍容量重新配置"""
+        import numpy as np
+        n, k = (0 if matrix is None else len(matrix)), len(vectors)
+        buffer = self._buffer
+        if matrix is None or buffer is None or matrix.base is not buffer or len(buffer) < n + k:
+            buffer = np.empty((max(_MIN_CAPACITY, 2 * (n + k)), vectors.shape[1]), dtype=np.float32)
+            if n:
+                buffer[:n] = matrix
+        buffer[n:n + k] = vectors
+        self._buffer = buffer
+        return buffer[:n + k]
+
+    def _updated_index(self, old_entries: list[dict], old_matrix, rows: list) -> tuple[list, object]:
+        """依 AnswerStore 的現況算出新的 (entries, matrix)，沿用舊索引已有的列，只處理新增的記錄"""
+        known = {e["id"]: e for e in old_entries}
+
+        def entry(rid, q, exp):
+            return known.get(rid) or {"id": rid, "query": q, "expires": exp, "entities": extract_entities(q)}
+
+        if old_matrix is None or not VM.is_ready:
+            # 尚無矩陣 (首次建立或編碼器剛就緒)：全部記錄一次載入
+            entries = [entry(*row) for row in rows]
+            matrix = self._append_rows(None, self._load_vectors(entries)) if entries and VM.is_ready else None
+            return entries, matrix
+
+        # 刪除/過期的記錄改為墓碑：expires=0 與過期記錄一樣在查詢時被遮蔽，不必搬動矩陣
+        live = {row[0] for row in rows}
+        entries = [e if e["id"] in live else dict(e, expires=0.0) for e in old_entries]
+        matrix = old_matrix
+        if sum(1 for e in entries if e["id"] not in live) > len(entries) * _TOMBSTONE_RATIO:
+            keep = [i for i, e in enumerate(entries) if e["id"] in live]
+            entries, matrix = [entries[i] for i in keep], old_matrix[keep]
+            self._compactions += 1
+        added = [entry(*row) for row in rows if row[0] not in known]
+        if added:
+            entries += added
+            matrix = self._append_rows(matrix, self._load_vectors(added))
+        return entries, matrix
+
+    def _refresh(self):
+        """AnswerStore 有寫入時更新索引 (只讀記憶體熱層，不掃描資料庫)；編碼器剛就緒時補建矩陣
+
+        鎖內只判斷是否需要更新並快照舊索引；讀取/編碼向量在鎖外進行，最後才整批替換。
+        已有執行緒在更新時其餘查詢沿用舊索引 (已刪除的記錄取答案時會落空，不影響正確性)。
+        """
+        with self._lock:
+            stale = self.store.version != self._version or self._entries is None
+            if self._refreshing or not (stale or (self._matrix is None and self._entries and VM.is_ready)):
+                return
+            self._refreshing = True
+            old_entries, old_matrix = self._entries or [], self._matrix
+        try:
+            version, rows = self.store.live_entries()
+            entries, matrix = self._updated_index(old_entries, old_matrix, rows)
+            with self._lock:
+                self._entries, self._matrix, self._version = entries, matrix, version
+                self._tombstones = len(entries) - len(rows)
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    # ── 查詢 ──────────────────────────────────────────────────────────────────
+
+    def _guard(self, query_entities: frozenset, entry: dict) -> bool:
+        if not self.entity_guard or query_entities == entry["entities"]:
+            return True
+        log(f"🛡️ [SemanticCache] 實體不符，拒絕命中: {sorted(query_entities)} ≠ {sorted(entry['entities'])}")
+        return False
+
+    def lookup(self, query: str) -> str | None:
+        return self.match(query)[0]
+
+    def match(self, query: str) -> tuple[str | None, str | None]:
+        """回傳 (答案或 None, 命中途徑 "vector" / "cpu_ultra_hit" 或 None)"""
+        started = time.perf_counter()
+        query = normalize_query(query)
+        self._refresh()
+        with self._lock:
+            entries, matrix = self._entries, self._matrix   # 索引只會整批替換，快照後即可在鎖外計算
+        answer, rejects = self._search(query, entries, matrix) if entries else (None, 0)
+        fallback = bool(entries) and matrix is None
+        with self._lock:
+            self._lookups += 1
+            self._hits += answer is not None
+            self._guard_rejects += rejects
+            self._fallback_lookups += fallback
+            self._fallback_hits += fallback and answer is not None
+            self._lookup_seconds += time.perf_counter() - started
+        if answer is None:
+            return None, None
+        return answer, ("cpu_ultra_hit" if fallback else "vector")
+
+    def _search(self, query: str, entries: list, matrix) -> tuple:
+        """回傳 (答案或 None, 被實體守門拒絕的次數)"""
+        now = time.time()
+        query_entities = extract_entities(query)
+        rejects = 0
+
+        if matrix is None:
+            # 編碼器未就緒：CPU 字元重疊 Ultra Hit
+            for e in reversed(entries[-_FALLBACK_SCAN:]):
+                if e["expires"] > now and _char_overlap(query, e["query"]) >= _ULTRA_HIT_OVERLAP:
+                    if not self._guard(query_entities, e):
+                        rejects += 1
+                        continue
+                    answer = self.store.get(e["id"])
+                    if answer is not None:
+                        log(f"⚡ [CPU Ultra Hit] 字元重疊命中: {e['query'][:30]}")
+                        return answer, rejects
+            return None, rejects
+
+        import numpy as np
+        scores = matrix @ VM.encode([query])[0]
+        expires = np.fromiter((e["expires"] for e in entries), dtype=float, count=len(entries))
+        scores[expires <= now] = -1.0
+        for idx in np.argsort(-scores)[:3]:   # 前 3 名中第一個通過實體守門者
+            score = float(scores[idx])
+            if score < self.threshold:
+                break
+            entry = entries[idx]
+            if not self._guard(query_entities, entry):
+                rejects += 1
+                continue
+            answer = self.store.get(entry["id"])
+            if answer is not None:
+                log(f"⚡ [SemanticCache] 向量命中 (相似度 {score:.3f}): {entry['query'][:30]}")
+                return answer, rejects
+        return None, rejects
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries or []) - self._tombstones,
+                "indexed": 0 if self._matrix is None else int(self._matrix.shape[0]),
+                "tombstones": self._tombstones,
+                "compactions": self._compactions,
+                "threshold": self.threshold,
+                "entity_guard": self.entity_guard,
+                "lookups": self._lookups,
+                "hits": self._hits,
+                "hit_rate": round(self._hits / self._lookups, 4) if self._lookups else 0.0,
+                "guard_rejects": self._guard_rejects,
+                "fallback_lookups": self._fallback_lookups,
+                "fallback_hits": self._fallback_hits,
+                "avg_lookup_ms": round(self._lookup_seconds / self._lookups * 1000, 3) if self._lookups else 0.0,
+            }
+
+
+# 全域單例
+SEMANTIC_CACHE = SemanticAnswerCache()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 3 or sys.argv[1] != "calibrate":
+        sys.exit("用法: python -m modules.semantic_cache calibrate pairs.jsonl")
+    with open(sys.argv[2], "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    result = SEMANTIC_CACHE.calibrate([(r["a"], r["b"], r["same"]) for r in rows])
+    print(json.dumps(result, ensure_ascii=False, indent=2))
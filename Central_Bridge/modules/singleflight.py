@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+modules/singleflight.py — ArielOS 並發請求合併 (Single-Flight)
+
+兩個代理人 (或 Discord 重送) 同時送出相同的小腦 Prompt 時，只有第一個呼叫
+真正送往 Ollama，其餘呼叫等待並共用同一份結果 (或同一個例外)。
+
+包含：SingleFlight
+"""
+
+import threading
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """以 key 合併同時進行中的相同呼叫"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict = {}
+        self._executed = 0
+        self._shared = 0
+
+    def do(self, key, fn):
+        """執行 fn()；若相同 key 已在執行中，則等待其結果而不重複執行"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._executed += 1
+            else:
+                call.waiters += 1
+                self._shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "executed": self._executed,
+                "shared": self._shared,
+                "in_flight": len(self._calls),
+            }
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+modules/task_queue.py — ArielOS 大腦任務佇列 (多執行員 + 優先級老化 + 代理人公平排程)
+
+原本只有一條 brain_worker 執行緒搭配 FIFO queue.Queue：
+一位代理人 280 秒的 OpenClaw 任務 (最多重試 3 次) 會擋住所有代理人的 COMPLEX 請求，
+看板任務的 priority (high/medium/low) 也不影響執行順序，排程的 high 例行任務要排在好奇心任務後面。
+
+BrainTaskQueue 保留 queue.Queue 的介面 (put / get / task_done / qsize / empty)，供多條 brain_worker 共用：
+  1. 優先級：task["priority"] 為 high > medium > low (未指定視為 medium)
+  2. 老化：每等待 BRAIN_PRIORITY_AGING_SECONDS 秒提升一級，低優先任務不會永遠被插隊
+  3. 代理人並發上限：單一代理人同時執行的任務數不超過 BRAIN_AGENT_MAX_CONCURRENCY (可個別設定)
+  4. 加權公平排程 (start-time fair queuing)：同一優先級內，每位代理人有虛擬時間，取出一個任務就前進 1/權重；
+     永遠先服務虛擬時間最小的代理人，閒置的代理人不會累積額度 (回來時從目前的虛擬時鐘起算)
+  5. 同一代理人的任務依 (優先級, 先到先服務) 排序：下一個任務暫時不能執行時，不會讓其他任務插隊
+  6. 互斥資源：exclusive_key(task) 回傳相同 key 的任務不會同時執行
+     (Bridge 以工作區路徑作為寫入任務的 key，兩個寫入任務不會同時對同一工作區建立檢查點/回滾)
+
+brain_worker 完成任務時必須呼叫 task_done(task)，歸還代理人名額與互斥資源。
+snapshot() 提供佇列檢視 (深度、各任務等待秒數與預估順位)，見 GET /v1/brain/queue。
+
+包含：BrainTaskQueue, PRIORITY_LEVELS
+"""
+
+import time
+import queue
+import itertools
+import threading
+from collections import Counter
+
+from .config import (
+    BRAIN_AGENT_MAX_CONCURRENCY, BRAIN_AGENT_CONCURRENCY, BRAIN_AGENT_WEIGHTS, BRAIN_PRIORITY_AGING_SECONDS
+)
+
+PRIORITY_LEVELS = {"high": 0, "medium": 1, "low": 2}
+_LEVEL_NAMES = {v: k for k, v in PRIORITY_LEVELS.items()}
+
+
+class _Entry:
+    __slots__ = ("seq", "task", "agent_id", "priority", "rank", "exclusive", "enqueued_at")
+
+    def __init__(self, seq, task, exclusive):
+        self.seq = seq
+        self.task = task
+        self.agent_id = task.get("agent_id") or "system"
+        self.priority = task.get("priority") if task.get("priority") in PRIORITY_LEVELS else "medium"
+        self.rank = PRIORITY_LEVELS[self.priority]
+        self.exclusive = exclusive
+        self.enqueued_at = time.monotonic()
+
+
+class BrainTaskQueue:
+    """優先級老化 + 代理人公平 + 互斥資源感知的大腦任務佇列 (執行緒安全)"""
+
+    def __init__(self, exclusive_key=None, agent_limit: int = BRAIN_AGENT_MAX_CONCURRENCY,
+                 agent_limits: dict | None = None, weights: dict | None = None,
+                 aging_seconds: float = BRAIN_PRIORITY_AGING_SECONDS):
+        self.exclusive_key = exclusive_key
+        self.agent_limit = max(1, agent_limit)
+        self.agent_limits = dict(BRAIN_AGENT_CONCURRENCY if agent_limits is None else agent_limits)
+        self.weights = dict(BRAIN_AGENT_WEIGHTS if weights is None else weights)
+        self.aging_seconds = aging_seconds
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._waiting: list[_Entry] = []
+        self._running: dict[int, _Entry] = {}       # id(task) -> 執行中的任務
+        self._running_by_agent = Counter()
+        self._held: set = set()                      # 執行中任務持有的互斥 key
+        self._vtime: dict[str, float] = {}           # 代理人虛擬時間 (加權公平排程)
+        self._clock = 0.0
+        self._served = Counter()
+        self._served_by_priority = Counter()
+        self._aged = 0                               # 因老化提升優先級後才被取出的任務數
+        self._wait_total = 0.0
+
+    # ── queue.Queue 相容介面 ──────────────────────────────────────────────────
+
+    def put(self, task: dict, block: bool = True, timeout: float | None = None):
+        key = self.exclusive_key(task) if self.exclusive_key else None
+        with self._cond:
+            self._waiting.append(_Entry(next(self._seq), task, key))
+            self._cond.notify_all()
+
+    def get(self, block: bool = True, timeout: float | None = None) -> dict:
+        """取出下一個可執行的任務；沒有可執行的任務時阻塞 (block=False 或逾時則拋出 queue.Empty)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                entry = self._pick(time.monotonic())
+                if entry is not None:
+                    break
+                if not block:
+                    raise queue.Empty
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                self._cond.wait(remaining)
+            self._start(entry)
+            return entry.task
+
+    def task_done(self, task: dict | None = None):
+        """任務完成 (或放棄)：歸還代理人名額與互斥資源"""
+        if task is None:
+            return
+        with self._cond:
+            entry = self._running.pop(id(task), None)
+            if entry is None:
+                return
+            self._running_by_agent[entry.agent_id] -= 1
+            if entry.exclusive is not None:
+                self._held.discard(entry.exclusive)
+            self._cond.notify_all()
+
+    def qsize(self) -> int:
+        with self._cond:
+            return len(self._waiting)
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    # ── 排程 ──────────────────────────────────────────────────────────────────
+
+    def _limit(self, agent_id: str) -> int:
+        return max(1, self.agent_limits.get(agent_id, self.agent_limit))
+
+    def _weight(self, agent_id: str) -> float:
+        return max(self.weights.get(agent_id, 1), 1e-6)
+
+    def _level(self, entry: _Entry, now: float) -> int:
+        """老化後的優先級 (0 = high)"""
+        if self.aging_seconds <= 0:
+            return entry.rank
+        return max(0, entry.rank - int((now - entry.enqueued_at) // self.aging_seconds))
+
+    def _heads(self, entries: list[_Entry], now: float) -> list[tuple[int, _Entry]]:
+        """各代理人下一個要執行的任務：老化後優先級最高者，同級先到先服務"""
+        heads: dict[str, tuple[int, _Entry]] = {}
+        for e in entries:
+            level = self._level(e, now)
+            cur = heads.get(e.agent_id)
+            if cur is None or (level, e.seq) < (cur[0], cur[1].seq):
+                heads[e.agent_id] = (level, e)
+        return list(heads.values())
+
+    def _pick(self, now: float) -> _Entry | None:
+        """各代理人的下一個任務中，選出可執行者：優先級 → 虛擬時間最小的代理人 → 先到先服務"""
+        best, best_key = None, None
+        for level, e in self._heads(self._waiting, now):
+            if self._running_by_agent[e.agent_id] >= self._limit(e.agent_id):
+                continue
+            if e.exclusive is not None and e.exclusive in self._held:
+                continue
+            key = (level, max(self._vtime.get(e.agent_id, 0.0), self._clock), e.seq)
+            if best_key is None or key < best_key:
+                best, best_key = e, key
+        return best
+
+    def _start(self, entry: _Entry):
+        now = time.monotonic()
+        self._waiting.remove(entry)
+        tag = max(self._vtime.get(entry.agent_id, 0.0), self._clock)
+        self._clock = tag
+        self._vtime[entry.agent_id] = tag + 1.0 / self._weight(entry.agent_id)
+        self._running[id(entry.task)] = entry
+        self._running_by_agent[entry.agent_id] += 1
+        if entry.exclusive is not None:
+            self._held.add(entry.exclusive)
+        self._served[entry.agent_id] += 1
+        self._served_by_priority[entry.priority] += 1
+        if self._level(entry, now) < entry.rank:
+            self._aged += 1
+        self._wait_total += now - entry.enqueued_at
+
+    def _projected_order(self, now: float) -> list[_Entry]:
+        """依目前狀態模擬後續取出順序 (不考慮並發上限與互斥，僅供檢視)"""
+        pending = list(self._waiting)
+        vtime, clock = dict(self._vtime), self._clock
+        order = []
+        while pending:
+            level, e = min(self._heads(pending, now),
+                           key=lambda h: (h[0], max(vtime.get(h[1].agent_id, 0.0), clock), h[1].seq))
+            clock = max(vtime.get(e.agent_id, 0.0), clock)
+            vtime[e.agent_id] = clock + 1.0 / self._weight(e.agent_id)
+            pending.remove(e)
+            order.append(e)
+        return order
+
+    # ── 檢視 / 統計 ───────────────────────────────────────────────────────────
+
+    def _describe(self, e: _Entry, now: float) -> dict:
+        task = e.task
+        return {
+            "id": task.get("id"),
+            "agent_id": e.agent_id,
+            "priority": e.priority,
+            "effective_priority": _LEVEL_NAMES[self._level(e, now)],
+            "wait_s": round(now - e.enqueued_at, 1),
+            "kanban_task_id": task.get("kanban_task_id"),
+            "routine": bool(task.get("routine")),
+            "exclusive": e.exclusive is not None,
+            "content": (task.get("content") or "")[:60],
+        }
+
+    def snapshot(self) -> dict:
+        """佇列檢視：深度、執行中任務、等待中任務的預估順位與等待秒數"""
+        now = time.monotonic()
+        with self._cond:
+            waiting = []
+            for position, e in enumerate(self._projected_order(now), 1):
+                item = self._describe(e, now)
+                item["position"] = position
+                waiting.append(item)
+            running = [self._describe(e, now) for e in sorted(self._running.values(), key=lambda e: e.seq)]
+        return {
+            "depth": len(waiting),
+            "oldest_wait_s": max((w["wait_s"] for w in waiting), default=0.0),
+            "running": running,
+            "waiting": waiting,
+            "stats": self.stats(),
+        }
+
+    def stats(self) -> dict:
+        with self._cond:
+            served = sum(self._served.values())
+            return {
+                "waiting": len(self._waiting),
+                "waiting_by_agent": dict(Counter(e.agent_id for e in self._waiting)),
+                "waiting_by_priority": dict(Counter(e.priority for e in self._waiting)),
+                "running": len(self._running),
+                "running_by_agent": {a: n for a, n in self._running_by_agent.items() if n},
+                "exclusive_held": sorted(str(k) for k in self._held),
+                "served_by_agent": dict(self._served),
+                "served_by_priority": dict(self._served_by_priority),
+                "served_after_aging": self._aged,
+                "avg_wait_s": round(self._wait_total / served, 3) if served else 0.0,
+                "aging_seconds": self.aging_seconds,
+            }
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+modules/text_normalize.py — ArielOS 提問正規化與斷詞 (所有快取 key 與關鍵字索引共用)
+
+各處原本各自處理：_SIMPLE_CACHE 用原始字串、語意快取只去空白、
+MemoryManager.retrieve_relevant 以空白切詞 (對中文無效)、find_matching_skill 只轉小寫。
+「早安！」與「早安」、「ＡＰＩ」與「api」、「這個」與「这个」、「三天」與「3天」彼此永遠不會命中。
+
+normalize_query() 依序處理：
+  1. NFKC：全形英數/標點 → 半形，相容字元展開
+  2. 英文轉小寫
+  3. 繁簡折疊：統一轉為簡體字形 (多對一，適合當 key；有安裝 opencc 時使用其 t2s 轉換，否則使用內建常用字表)
+  4. 中文數字 → 阿拉伯數字：只轉換表示數量者 (後接單位、序數/星期或單獨出現；「十二點」→「12点」、
+     「二〇二六年」→「2026年」)；「千万」「十分」「万一」等慣用語與單獨的「一」保留
+  5. 標點換成空白 (數字之間的 . , : / 保留，避免「3.5」變成「35」)
+  6. 空白壓縮；中日韓文字旁的空白移除
+
+tokenize() 在正規化後斷詞：英數串為一詞；中文有安裝 jieba 時用 jieba 斷詞，
+否則切成相鄰二字組 (bigram，全文檢索常用的無詞典做法)。
+
+結果只用來比對，不顯示給使用者。
+
+包含：normalize_query, tokenize, fold_chinese, normalize_numerals
+"""
+
+import re
+import logging
+import unicodedata
+from functools import lru_cache
+
+from .config import log
+
+# 常用繁體字 → 簡體字 (兩兩一組)；只求快取 key 一致，不追求完整轉換
+_T2S_PAIRS = (
+    "個个們们這这來来時时說说會会國国對对學学還还後后發发髮发過过現现開开關关問问題题麼么點点"
+    "東东車车長长門门間间頭头體体實实樣样種种變变電电話话經经當当從从動动與与為为業业機机進进"
+    "氣气無无見见應应員员愛爱聽听讓让認认識识謝谢請请幫帮買买賣卖錢钱塊块萬万億亿歲岁號号鐘钟"
+    "書书寫写讀读語语詞词譯译記记歡欢樂乐筆笔紙纸網网頁页腦脑軟软視视線线圖图報报紀纪錄录資资"
+    "訊讯華华灣湾島岛區区縣县鄉乡鎮镇臺台颱台雲云風风陽阳陰阴溫温熱热涼凉霧雾雞鸡魚鱼鳥鸟馬马"
+    "龍龙飛飞場场鐵铁醫医藥药療疗廳厅飯饭麵面湯汤飲饮餅饼幾几兩两歷历曆历準准備备計计劃划畫画"
+    "設设產产務务師师專专類类單单雙双習习課课試试驗验證证據据權权價价錯错誤误難难聲声響响戲戏"
+    "劇剧團团隊队連连結结構构鍵键盤盘碼码庫库檔档標标簡简轉转換换傳传輸输運运續续確确詳详細细"
+    "狀状態态總总週周紅红綠绿藍蓝黃黄顏颜遠远離离舊旧將将給给該该並并決决議议論论調调帳账戶户"
+    "裡里裏里邊边嗎吗啟启閉闭儲储節节約约興兴慮虑憶忆憂忧懷怀戰战爭争鬥斗齊齐齒齿處处廣广莊庄"
+    "園园圓圆導导貓猫豬猪蘋苹葉叶藝艺術术劍剑亂乱測测壓压濕湿災灾預预顯显帶带讚赞賽赛贏赢勝胜"
+    "負负隻只條条張张項项顆颗輛辆層层樓楼橋桥極极擇择選选擊击擔担擴扩則则親亲覺觉聯联繫系係系"
+    "參参歸归貨货費费質质購购貼贴優优統统環环際际級级組组織织"
+)
+_T2S_TABLE = str.maketrans({_T2S_PAIRS[i]: _T2S_PAIRS[i + 1] for i in range(0, len(_T2S_PAIRS), 2)})
+
+try:
+    from opencc import OpenCC
+    _OPENCC = OpenCC("t2s")
+except Exception as e:
+    _OPENCC = None
+    log(f"ℹ️ [Normalize] opencc 未安裝，繁簡折疊使用內建常用字表 ({type(e).__name__})")
+
+try:
+    import jieba
+    jieba.setLogLevel(logging.WARNING)
+except Exception as e:
+    jieba = None
+    log(f"ℹ️ [Normalize] jieba 未安裝，中文斷詞使用二字組 ({type(e).__name__})")
+
+_KEEP_BETWEEN_DIGITS = ".,:/"
+_SPACE_RE = re.compile(r"\s+")
+_CJK_SPACE_RE = re.compile(r"(?<=[^\x00-\x7f]) | (?=[^\x00-\x7f])")
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9.\-_]*|[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+
+# 中文數字 (繁簡折疊後的字形)
+_CN_DIGITS = {"零": 0, "〇": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4,
+              "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+_CN_UNITS = {"十": 10, "百": 100, "千": 1000}
+_CN_NUMERAL_RE = re.compile(r"[零〇一二两三四五六七八九十百千万亿]+")
+_CJK_CHAR_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+# 數字後接這些單位 (時間/日期/量詞) 才視為數量；「千万别忘」「十分好吃」「万一」等慣用語維持原字
+_NUMERAL_UNITS = (
+    "年", "月", "日", "号", "点", "小时", "时", "分钟", "分", "秒", "天", "周", "星期", "岁",
+    "个", "位", "人", "名", "次", "件", "本", "张", "块", "元", "角", "毛", "条", "台", "部", "杯", "份",
+    "种", "斤", "公斤", "克", "米", "公里", "里", "度", "倍", "楼", "层", "页", "章", "辆", "间", "双",
+    "套", "首", "遍", "趟", "只", "支", "对",
+)
+_NUMERAL_PREFIXES = ("第", "星期", "周", "礼拜")   # 序數與星期：「第二」「星期三」
+
+
+def fold_chinese(text: str) -> str:
+    """繁簡折疊 (統一為簡體字形)"""
+    if _OPENCC is not None:
+        return _OPENCC.convert(text)
+    return text.translate(_T2S_TABLE)
+
+
+def _cn_to_int(run: str) -> int | None:
+    if not any(ch in _CN_UNITS or ch in "万亿" for ch in run):
+        return int("".join(str(_CN_DIGITS[ch]) for ch in run))    # 逐位念法：二〇二六
+    total, section, num = 0, 0, 0
+    for ch in run:
+        if ch in _CN_DIGITS:
+            num = _CN_DIGITS[ch]
+        elif ch in _CN_UNITS:
+            section += (num or 1) * _CN_UNITS[ch]
+            num = 0
+        else:   # 万 / 亿
+            unit = 10000 if ch == "万" else 100000000
+            total = (total + section + num) * unit
+            section = num = 0
+    return total + section + num
+
+
+def _is_quantity(run: str, before: str, after: str) -> bool:
+    """中文數字串是否為數量：後接單位、前接序數/星期，或前後都不是中文字 (單獨出現)"""
+    if after.startswith(_NUMERAL_UNITS):
+        # 「十分」多為副詞 (非常)；只有接在幾點之後 (三点十分) 或「十分钟」才是分鐘
+        if run == "十" and after.startswith("分") and not after.startswith("分钟"):
+            return before.endswith(("点", "时"))
+        return True
+    if before.endswith(_NUMERAL_PREFIXES):
+        return True
+    return not (before and _CJK_CHAR_RE.match(before[-1])) and not (after and _CJK_CHAR_RE.match(after[0]))
+
+
+def normalize_numerals(text: str) -> str:
+    """表示數量的中文數字串 → 阿拉伯數字 (見 _is_quantity)；單獨的「一」不轉換 (多為「一下」「统一」等非數量用法)"""
+    def _replace(m):
+        run = m.group(0)
+        if run == "一" or not _is_quantity(run, text[:m.start()], text[m.end():]):
+            return run
+        return str(_cn_to_int(run))
+    return _CN_NUMERAL_RE.sub(_replace, text)
+
+
+def _strip_punctuation(text: str) -> str:
+    chars = list(text)
+    last = len(chars) - 1
+    for i, ch in enumerate(chars):
+        if not unicodedata.category(ch).startswith("P"):
+            continue
+        if (ch in _KEEP_BETWEEN_DIGITS and 0 < i < last
+                and chars[i - 1].isdigit() and chars[i + 1].isdigit()):
+            continue
+        chars[i] = " "
+    return "".join(chars)
+
+
+@lru_cache(maxsize=8192)
+def normalize_query(text: str) -> str:
+    """快取 key / 關鍵字索引用的正規化：全半形、大小寫、繁簡、數字、標點、空白"""
+    if not text:
+        return ""
+    s = unicodedata.normalize("NFKC", text).lower()
+    s = fold_chinese(s)
+    s = normalize_numerals(s)
+    s = _strip_punctuation(s)
+    s = _SPACE_RE.sub(" ", s).strip()
+    return _CJK_SPACE_RE.sub("", s)
+
+
+def tokenize(text: str) -> list[str]:
+    """正規化後斷詞 (去重、保留順序)：英數串整段；中文用 jieba 或二字組；單一中文字只在整串僅一字時保留"""
+    tokens = []
+    for m in _TOKEN_RE.finditer(normalize_query(text)):
+        part = m.group(0)
+        if part.isascii():
+            tokens.append(part)
+        elif len(part) == 1:
+            tokens.append(part)
+        elif jieba is not None:
+            tokens.extend(w for w in jieba.lcut(part) if len(w) > 1)
+        else:
+            tokens.extend(part[i:i + 2] for i in range(len(part) - 1))
+    return list(dict.fromkeys(tokens))
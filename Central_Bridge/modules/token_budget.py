@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+modules/token_budget.py — ArielOS Token 預算 (num_ctx 自動選級)
+
+各呼叫點原本寫死 num_ctx (1024~4096)，不管 Prompt 長短：
+  - 短 Prompt 配置過大的 KV Cache，CPU 推論明顯變慢
+  - 長 Prompt (例如路由 Prompt 內嵌整份 SOUL.md) 超出 num_ctx 時被 Ollama 從開頭靜默截斷
+
+本模組以字元類別估算 Token 數 (CJK 約 1 字 1 token、拉丁文約 4 字元 1 token)，
+為每次呼叫挑選「放得下 Prompt + num_predict」的最小 num_ctx 級距；
+超出呼叫端指定值時發出警告，超出上限時記錄預估被截斷的 Token 數。
+
+Ollama 的 num_ctx 一改變就會重新載入 runner (效果等同換模型)，因此指定 model 時級距會黏住：
+每個模型只升不降，沿用目前見過的最大級距；連續 TOKEN_BUDGET_STICKY_DECAY 秒都沒有 Prompt
+需要這麼大的級距時才降一級 (預設與主力模型的 keep_alive 相同，閒置到卸載後再降也不多付載入成本)。
+
+包含：estimate_tokens, TokenBudget, TOKEN_BUDGET (全域單例)
+"""
+
+import re
+import math
+import time
+import threading
+
+from .config import TOKEN_BUDGET_ENABLED, NUM_CTX_BUCKETS, TOKEN_BUDGET_MARGIN, TOKEN_BUDGET_STICKY_DECAY, log
+
+# CJK 統一漢字、擴充 A、相容漢字、日文假名、韓文、全形標點
+_CJK_RE = re.compile(r"[　-〿぀-ヿ㐀-䶿一-鿿가-힯豈-﫿＀-￯]")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗估 Token 數：CJK 每字 1 token，其餘字元每 4 個 1 token (偏保守，寧可多估)"""
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+class TokenBudget:
+    """依 Prompt 長度挑選 num_ctx 級距並統計超出預算的呼叫"""
+
+    def __init__(self, enabled: bool = TOKEN_BUDGET_ENABLED, buckets=NUM_CTX_BUCKETS,
+                 margin: int = TOKEN_BUDGET_MARGIN, sticky_decay: float = TOKEN_BUDGET_STICKY_DECAY):
+        self.enabled = enabled
+        self.buckets = tuple(sorted(buckets))
+        self.margin = margin
+        self.sticky_decay = sticky_decay
+        self._lock = threading.Lock()
+        self._sticky: dict[str, list] = {}   # model -> [目前級距, 最後一次需要此級距的時間 (monotonic)]
+        self._decays = 0
+        self._calls = 0
+        self._shrunk = 0
+        self._grown = 0
+        self._truncated = 0
+        self._truncated_tokens = 0
+
+    def fit(self, prompt: str, num_ctx: int, num_predict: int, site: str = "general",
+            model: str | None = None) -> int:
+        """回傳此呼叫應使用的 num_ctx
+
+        needed = 估算 Prompt Token + num_predict + 安全餘量；取最小的足夠級距。
+        指定 model 時不低於該模型目前黏住的級距 (見 _stick)，避免 num_ctx 來回切換觸發 runner 重新載入。
+        比呼叫端指定的 num_ctx 大時警告 (原本會被靜默截斷)，連最大級距都放不下時記錄截斷量。
+        """
+        if not self.enabled:
+            return num_ctx
+        prompt_tokens = estimate_tokens(prompt)
+        needed = prompt_tokens + num_predict + self.margin
+        fitted = next((b for b in self.buckets if b >= needed), self.buckets[-1])
+
+        with self._lock:
+            if model:
+                fitted = self._stick(model, fitted, time.monotonic())
+            self._calls += 1
+            if fitted < num_ctx:
+                self._shrunk += 1
+            elif fitted > num_ctx:
+                self._grown += 1
+            if needed > fitted:
+                self._truncated += 1
+                self._truncated_tokens += needed - fitted
+
+        if needed > fitted:
+            log(f"✂️ [TokenBudget] {site}: Prompt 約 {prompt_tokens} tokens + 輸出 {num_predict}，"
+                f"超出上限 num_ctx={fitted}，預估開頭約 {needed - fitted} tokens 會被截斷")
+        elif fitted > num_ctx:
+            log(f"⚠️ [TokenBudget] {site}: Prompt 約 {prompt_tokens} tokens 超出指定 num_ctx={num_ctx}，"
+                f"改用 {fitted} 避免截斷")
+        return fitted
+
+    def _stick(self, model: str, fitted: int, now: float) -> int:
+        """模型的級距只升不降；閒置超過 sticky_decay 秒才降一級 (仍不低於本次需要的級距)"""
+        state = self._sticky.get(model)
+        if state is None or fitted >= state[0]:
+            self._sticky[model] = [fitted, now]
+            return fitted
+        if now - state[1] >= self.sticky_decay:
+            lower = self.buckets[max(0, self.buckets.index(state[0]) - 1)]
+            state[0], state[1] = max(lower, fitted), now
+            self._decays += 1
+        return state[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "buckets": list(self.buckets),
+                "calls": self._calls,
+                "shrunk": self._shrunk,
+                "grown": self._grown,
+                "truncated": self._truncated,
+                "truncated_tokens": self._truncated_tokens,
+                "sticky_num_ctx": {model: state[0] for model, state in self._sticky.items()},
+                "sticky_decays": self._decays,
+            }
+
+
+# 全域單例
+TOKEN_BUDGET = TokenBudget()
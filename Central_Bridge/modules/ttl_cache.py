@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+modules/ttl_cache.py — ArielOS 有界 LRU + TTL 記憶體快取
+
+_SIMPLE_CACHE 原本是無上限的 dict，每次寫入都掃描全部 key 找出過期項目 (O(N))。
+
+本模組以兩個 OrderedDict 維持順序：
+  - _lru：存取順序，超過容量時從最舊的一端淘汰
+  - _expiry：寫入順序；同一快取的 TTL 固定，寫入順序即到期順序，
+    只要從開頭檢查到第一筆未過期的記錄即可停止 (攤銷 O(1))
+
+key 一律先經過正規化函式 (預設 modules/text_normalize.normalize_query)，
+「早安！」與「早安」會命中同一格。
+
+包含：TTLCache
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+from .text_normalize import normalize_query
+
+
+class TTLCache:
+    """容量有上限、固定 TTL 的 LRU 快取 (執行緒安全)，附命中率統計"""
+
+    def __init__(self, max_entries: int, ttl: float, normalize=normalize_query):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.normalize = normalize
+        self._lock = threading.Lock()
+        self._lru: OrderedDict = OrderedDict()      # key -> (value, expires_at)
+        self._expiry: OrderedDict = OrderedDict()   # key -> None，依寫入 (即到期) 順序
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evicted = 0
+
+    def _purge_expired(self, now: float):
+        while self._expiry:
+            key = next(iter(self._expiry))
+            if self._lru[key][1] > now:
+                break
+            del self._expiry[key]
+            del self._lru[key]
+            self._expired += 1
+
+    def get(self, key: str):
+        k = self.normalize(key)
+        now = time.time()
+        with self._lock:
+            self._purge_expired(now)
+            entry = self._lru.get(k)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._lru.move_to_end(k)
+            self._hits += 1
+            return entry[0]
+
+    def set(self, key: str, value):
+        k = self.normalize(key)
+        now = time.time()
+        with self._lock:
+            self._purge_expired(now)
+            self._lru[k] = (value, now + self.ttl)
+            self._lru.move_to_end(k)
+            self._expiry.pop(k, None)
+            self._expiry[k] = None
+            while len(self._lru) > self.max_entries:
+                old, _ = self._lru.popitem(last=False)
+                del self._expiry[old]
+                self._evicted += 1
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            self._expiry.clear()
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._lru),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "expired": self._expired,
+                "evicted": self._evicted,
+            }
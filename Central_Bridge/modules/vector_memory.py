@@ -66,28 +66,41 @@ class VectorMemoryManager:
     _MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"
     _instance = None
 
-    def __new__(cls, base_dir: Path = BASE_DIR):
+    def __new__(cls, base_dir: Path = BASE_DIR, eager: bool = True):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance._initialized = False
         return cls._instance
 
-    def __init__(self, base_dir: Path = BASE_DIR):
+    def __init__(self, base_dir: Path = BASE_DIR, eager: bool = True):
         if self._initialized:
             return
         self._initialized = True
         self._ready = False
         self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
         self._base_dir = Path(base_dir)
+        if eager:
+            self.load()
+
+    def load(self):
+        """載入 Embedding 模型並初始化 Backend (可重複呼叫；Bridge 由 modules/warmup 在背景並行載入)"""
+        with self._load_lock:
+            if self._ready:
+                return
+            if _BACKEND == "disabled":
+                log("ℹ️ [VectorMemory] 向量記憶停用。安裝 sentence-transformers 以啟用。")
+                return
+            self._load_backend()
+        if not self._ready:
+            raise RuntimeError("VectorMemory 初始化失敗")
 
+    def _load_backend(self):
         global _BACKEND
-        if _BACKEND == "disabled":
-            log("ℹ️ [VectorMemory] 向量記憶停用。安裝 sentence-transformers 以啟用。")
-            return
-
         try:
             log(f"🤖 [VectorMemory] 載入 Embedding 模型: {self._MODEL_NAME}...")
             self._encoder = SentenceTransformer(self._MODEL_NAME)
+            self._encoder.encode(["warmup"])  # 第一次 encode 會初始化推論核心，預先付掉這筆成本
 
             if _BACKEND == "qdrant":
                 try:
@@ -242,6 +255,12 @@ class VectorMemoryManager:
             log(f"⚠️ [VectorMemory] query_semantic 失敗: {e}")
             return []
 
+    def encode(self, texts: list[str]):
+        """共用編碼器：回傳 L2 正規化後的向量 (numpy 陣列，內積即餘弦相似度)；未就緒時回傳 None"""
+        if not self._ready:
+            return None
+        return self._encoder.encode(texts, normalize_embeddings=True)
+
     def delete_fact(self, agent_id: str, fact_id: str) -> bool:
         """刪除一筆事實"""
         if not self._ready:
@@ -271,5 +290,5 @@ class VectorMemoryManager:
         return _BACKEND
 
 
-# 全域單例
-VM = VectorMemoryManager(BASE_DIR)
+# 全域單例 (Embedding 模型由 Bridge 啟動暖機時載入，見 modules/warmup)
+VM = VectorMemoryManager(BASE_DIR, eager=False)
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+modules/warmup.py — ArielOS 啟動暖機
+
+Bridge 啟動後第一個請求原本要依序承擔意圖模型、小腦模型與 SentenceTransformer
+編碼器的冷啟動成本。暖機階段在背景「並行」載入所有元件，並分別回報就緒狀態：
+  - /v1/health/ready：全部就緒回 200，否則 503 (附各元件狀態)，供 ariel_launcher 哨兵等待
+  - /v1/chat/completions：暖機未完成或有元件失敗時，回應標頭標示降級模式
+
+Ollama 模型只預載常駐容量 (OLLAMA_MAX_LOADED_MODELS) 放得下的數量；超過容量時並行預載
+只會讓模型互相換出，白白多付一次載入成本。
+
+包含：WarmupManager, WARMUP (全域單例), default_warmup_tasks
+"""
+
+import time
+import threading
+
+from .config import CEREBELLUM_MODEL, INTENT_MODEL, WARMUP_TIMEOUT, log
+
+PENDING, LOADING, READY, FAILED = "pending", "loading", "ready", "failed"
+
+
+class WarmupManager:
+    """並行執行暖機工作並追蹤每個元件的就緒狀態"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._components: dict[str, dict] = {}
+        self._finished = threading.Event()
+        self._started_at = None
+
+    def start(self, tasks: dict):
+        """tasks: {元件名稱: 無參數函式}；每個元件各自一條執行緒，全部結束後 finished"""
+        with self._lock:
+            if self._started_at is not None:
+                return
+            self._started_at = time.monotonic()
+            self._components = {name: {"state": PENDING, "seconds": None, "error": ""} for name in tasks}
+        if not tasks:
+            self._finished.set()
+            return
+        log(f"🔥 [Warmup] 並行暖機: {', '.join(tasks)}")
+        threads = [threading.Thread(target=self._run, args=(name, fn), daemon=True) for name, fn in tasks.items()]
+        for t in threads:
+            t.start()
+        threading.Thread(target=self._join, args=(threads,), daemon=True).start()
+
+    def _run(self, name: str, fn):
+        started = time.monotonic()
+        self._update(name, state=LOADING)
+        try:
+            fn()
+            self._update(name, state=READY, seconds=round(time.monotonic() - started, 2))
+            log(f"✅ [Warmup] {name} 就緒 ({time.monotonic() - started:.1f}s)")
+        except Exception as e:
+            self._update(name, state=FAILED, seconds=round(time.monotonic() - started, 2), error=str(e)[:200])
+            log(f"⚠️ [Warmup] {name} 暖機失敗: {e}")
+
+    def _join(self, threads):
+        for t in threads:
+            t.join()
+        self._finished.set()
+        status = self.status()
+        if status["ready"]:
+            log(f"🔥 [Warmup] 全部元件就緒 ({status['elapsed_s']}s)")
+        else:
+            log(f"⚠️ [Warmup] 暖機結束，以降級模式運作: {status['failed']}")
+
+    def _update(self, name: str, **fields):
+        with self._lock:
+            self._components[name].update(fields)
+
+    # ── 查詢 ──────────────────────────────────────────────────────────────────
+
+    @property
+    def is_finished(self) -> bool:
+        return self._finished.is_set()
+
+    @property
+    def is_ready(self) -> bool:
+        with self._lock:
+            return self.is_finished and all(c["state"] == READY for c in self._components.values())
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """等待暖機結束 (不論成功與否)；逾時回傳 False"""
+        return self._finished.wait(timeout)
+
+    def mode(self) -> str:
+        """warming (暖機中) / ready (全部就緒) / degraded (暖機結束但有元件失敗)"""
+        if not self.is_finished:
+            return "warming"
+        return "ready" if self.is_ready else "degraded"
+
+    def status(self) -> dict:
+        with self._lock:
+            components = {name: dict(c) for name, c in self._components.items()}
+            elapsed = round(time.monotonic() - self._started_at, 2) if self._started_at is not None else 0.0
+        finished = self.is_finished
+        return {
+            "ready": finished and all(c["state"] == READY for c in components.values()),
+            "finished": finished,
+            "failed": [name for name, c in components.items() if c["state"] == FAILED],
+            "elapsed_s": elapsed,
+            "components": components,
+        }
+
+
+def _models_to_preload() -> list[str]:
+    """依常駐規劃挑出要預載的模型：只預載放得下的數量，避免預載彼此換出
+
+    優先順序：永久常駐 (keep_alive < 0) 的模型 → INTENT_MODEL (每個請求的第一站) → CEREBELLUM_MODEL。
+    INTENT_MODEL 與 CEREBELLUM_MODEL 設為同一個模型時只預載一次。
+    """
+    from .model_residency import RESIDENCY
+
+    models = list(dict.fromkeys([INTENT_MODEL, CEREBELLUM_MODEL]))
+    models.sort(key=lambda m: RESIDENCY.keep_alive(m) >= 0)  # 穩定排序：永久常駐者提前，其餘維持原順序
+    selected, skipped = models[:RESIDENCY.capacity], models[RESIDENCY.capacity:]
+    if skipped:
+        log(f"ℹ️ [Warmup] 常駐容量 {RESIDENCY.capacity}，略過預載 {', '.join(skipped)} (首次使用時才載入)")
+    return selected
+
+
+def default_warmup_tasks() -> dict:
+    """Bridge 預設暖機項目：放得下的 Ollama 模型 (見 _models_to_preload) 與語意記憶編碼器"""
+    from .ollama_client import OLLAMA
+    from .vector_memory import VM
+
+    names = {INTENT_MODEL: "intent_model", CEREBELLUM_MODEL: "cerebellum_model"}
+    tasks = {}
+    # 選出的模型都能同時常駐，並行預載不會互相換出
+    for model in _models_to_preload():
+        tasks[names[model]] = (lambda m=model: OLLAMA.preload(m, timeout=WARMUP_TIMEOUT))
+    if VM.backend != "disabled":
+        tasks["encoder"] = VM.load
+    return tasks
+
+
+# 全域單例
+WARMUP = WarmupManager()
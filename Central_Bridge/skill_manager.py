@@ -3,40 +3,26 @@ ArielOS SkillManager — 小腦技能自動搜尋、安裝與執行模組
 混合模式：Python 技能用 import / MCP 技能用常駐 subprocess + JSON-RPC
 """
 
-import json, subprocess, re, os, time, threading, uuid, datetime, requests, logging, sys, shlex, shutil
+import json, subprocess, re, os, time, threading, uuid, datetime, logging, sys, shlex, shutil
 from pathlib import Path
 from ddgs import DDGS
 
-# Ollama API Configuration
-OLLAMA_API = "http://127.0.0.1:11434/api/generate"
+from modules.cerebellum import cerebellum_call as _cerebellum_call
+from modules.text_normalize import normalize_query
 
-# 模型配置 (與 ariel_bridge.py 同步)
-CEREBELLUM_MODEL = "gemma3:4b-it-q4_K_M"
-CEREBELLUM_FALLBACK_MODEL = "gemma3:4b"
 
 def cerebellum_call(prompt: str, temperature: float = 0.3, timeout: int = 120,
-                    num_ctx: int = 2048, num_predict: int = 256) -> str:
-    """🧠 小腦統一呼叫介面（含自動模型降級）"""
-    payload = {
-        "prompt": prompt,
-        "stream": False,
-        "options": {
-            "temperature": temperature,
-            "num_ctx": num_ctx,
-            "num_predict": num_predict
-        }
-    }
-    # 嘗試主要模型
+                    num_ctx: int = 2048, num_predict: int = 256, site: str = "skill") -> str:
+    """🧠 小腦統一呼叫介面（轉交 modules/cerebellum：連線池、並發合併、決定性快取、自動模型降級）"""
     try:
-        resp = requests.post(OLLAMA_API, json={**payload, "model": CEREBELLUM_MODEL}, timeout=timeout)
-        return resp.json().get('response', '').strip()
-    except Exception as e:
-        _log(f"⚠️ [{CEREBELLUM_MODEL}] 失敗，降級至 {CEREBELLUM_FALLBACK_MODEL}: {e}")
-    
-    # 降級：使用備用模型
-    try:
-        resp = requests.post(OLLAMA_API, json={**payload, "model": CEREBELLUM_FALLBACK_MODEL}, timeout=timeout)
-        return resp.json().get('response', '').strip()
+        return _cerebellum_call(
+            prompt=prompt,
+            temperature=temperature,
+            timeout=timeout,
+            num_ctx=num_ctx,
+            num_predict=num_predict,
+            site=site
+        )
     except Exception as e:
         _log(f"❌ 小腦呼叫徹底失敗: {e}")
         return ""
@@ -175,8 +161,9 @@ class SkillManager:
         """
         在已安裝技能 + MCP 目錄中尋找匹配技能。
         使用關鍵字積分比對 (匹配關鍵字總長度最高者勝出)。
+        提問與關鍵字都先經 normalize_query() (全半形、繁簡、中文數字、標點)。
         """
-        query_lower = query.lower()
+        query_norm = normalize_query(query)
         registry = self._load_registry()
 
         best_skill = None
@@ -187,10 +174,11 @@ class SkillManager:
         for skill in all_skills:
             score = 0
             for kw in skill.get("keywords", []):
-                if kw.lower() in query_lower:
+                kw_norm = normalize_query(kw)
+                if kw_norm and kw_norm in query_norm:
                     score += len(kw) * 10
                     # 如果關鍵字完全等於輸入，給極高分數
-                    if kw.lower() == query_lower.strip():
+                    if kw_norm == query_norm:
                         score += 1000
             
             if score > best_score:
@@ -234,7 +222,8 @@ class SkillManager:
                 temperature=0,
                 timeout=120,
                 num_ctx=2048,
-                num_predict=10
+                num_predict=10,
+                site="skill_match"
             )
             if "NO" not in judgment.upper():
                 match = re.search(r'\d+', judgment)
@@ -262,7 +251,8 @@ class SkillManager:
                 temperature=0,
                 timeout=120,
                 num_ctx=1024,
-                num_predict=30
+                num_predict=30,
+                site="skill_keywords"
             ).replace('"', '')
         except: return None
 
@@ -507,7 +497,8 @@ class SkillManager:
             temperature=0.2,
             timeout=120,
             num_ctx=2048,
-            num_predict=512
+            num_predict=512,
+            site="skill_codegen"
         )
         # 清理 markdown code block
         code = re.sub(r'^```\w*\n?', '', code)
@@ -588,7 +579,8 @@ class SkillManager:
                 temperature=0.1,
                 timeout=120,
                 num_ctx=2048,
-                num_predict=256
+                num_predict=256,
+                site="skill_tool_select"
             )
             json_str = re.search(r'\{.*\}', raw, re.DOTALL).group(0)
             selection = json.loads(json_str)
@@ -638,7 +630,8 @@ class SkillManager:
                 temperature=0.3,
                 timeout=180,
                 num_ctx=2048,
-                num_predict=256
+                num_predict=256,
+                site="skill_answer"
             )
             if answer:
                 return f"[技能: {name} (概念資訊)]\n我目前無法直接執行此工具的操作，但我理解它的功能：\n{answer}"
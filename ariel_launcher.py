@@ -20,6 +20,8 @@ import subprocess
 import sys
 import tarfile
 import time
+import urllib.error
+import urllib.request
 from datetime import datetime
 from pathlib import Path
 
@@ -49,6 +51,9 @@ MAX_BACKUPS = 7        # 最多保留幾份快照
 MAX_RESTARTS = 5       # Bridge 崩潰最多重試幾次
 RESTART_COOLDOWN = 10  # 每次重啟前等待秒數
 
+BRIDGE_READY_URL = "http://127.0.0.1:28888/v1/health/ready"
+BRIDGE_READY_TIMEOUT = 300  # 等待 Bridge 暖機 (模型/編碼器預載) 的最長秒數
+
 
 # ── 快照工具 ──────────────────────────────────────────────────────────────────
 
@@ -154,6 +159,31 @@ def run_bridge_sentinel():
         time.sleep(RESTART_COOLDOWN)
 
 
+def wait_for_bridge_ready(timeout: float = BRIDGE_READY_TIMEOUT, interval: float = 2.0) -> bool:
+    """輪詢 Bridge 的 /v1/health/ready，直到暖機結束 (全部就緒或確定降級) 或逾時"""
+    deadline = time.time() + timeout
+    last_status = None
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(BRIDGE_READY_URL, timeout=3):
+                print("✅ [哨兵] Bridge 暖機完成，所有模型已就緒。")
+                return True
+        except urllib.error.HTTPError as e:
+            # 503 = 暖機中或有元件失敗；回應內容帶有各元件狀態
+            try:
+                last_status = json.loads(e.read().decode("utf-8"))
+            except Exception:
+                last_status = None
+            if last_status and last_status.get("finished"):
+                print(f"⚠️ [哨兵] Bridge 暖機結束但以降級模式運作: {last_status.get('failed')}")
+                return False
+        except Exception:
+            pass  # Bridge 尚未開始監聽
+        time.sleep(interval)
+    print(f"⏳ [哨兵] 等待 Bridge 暖機逾時 ({timeout}s)，最後狀態: {last_status}")
+    return False
+
+
 # ── 多代理人 Discord 啟動器 ────────────────────────────────────────────────────
 
 sys.path.insert(0, str(BASE_DIR / "Ariel_Agent_1"))
@@ -236,6 +266,8 @@ if __name__ == "__main__":
         bridge_thread = threading.Thread(target=run_bridge_sentinel, daemon=True)
         bridge_thread.start()
         print("🛡️  [哨兵] Bridge 哨兵已在背景啟動。")
+        # 代理人上線前先等 Bridge 暖機，避免第一批訊息承擔冷啟動延遲
+        wait_for_bridge_ready()
 
         try:
             asyncio.run(run_agents())
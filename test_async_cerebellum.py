@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("requests")
+
+from Central_Bridge.modules.async_cerebellum import _single_flight, _AINFLIGHT
+
+
+def test_single_flight_survives_cancelled_waiter():
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def main():
+        first = asyncio.create_task(_single_flight("k", factory))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(_single_flight("k", factory))
+        await asyncio.sleep(0.01)
+        first.cancel()                             # 第一個呼叫端放棄等待，共用的呼叫照常完成
+        assert await second == "ok"
+        assert first.cancelled()
+
+    asyncio.run(main())
+    assert calls == [1]
+    assert not _AINFLIGHT
+
+
+def test_single_flight_propagates_errors():
+    async def factory():
+        raise ValueError("boom")
+
+    async def main():
+        results = await asyncio.gather(_single_flight("e", factory), _single_flight("e", factory),
+                                       return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+
+    asyncio.run(main())
+    assert not _AINFLIGHT
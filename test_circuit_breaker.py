@@ -0,0 +1,59 @@
+import time
+import threading
+
+from Central_Bridge.modules.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+def _wait_until_probed(breaker, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while breaker.state == HALF_OPEN:
+        assert time.monotonic() < deadline, "探針未在時限內結束"
+        time.sleep(0.005)
+
+
+def test_trips_after_consecutive_failures():
+    breaker = CircuitBreaker("m", failure_threshold=3, open_seconds=60)
+    for _ in range(2):
+        breaker.record_failure(RuntimeError("boom"))
+    breaker.record_success()                      # 成功會重置連續失敗次數
+    for _ in range(2):
+        breaker.record_failure(RuntimeError("boom"))
+    assert breaker.state == CLOSED
+    breaker.record_failure(RuntimeError("boom"))
+    assert breaker.state == OPEN
+    assert breaker.allow(lambda m: True) is False   # 斷路時間未到，不啟動探針
+
+
+def test_half_open_probe_success_closes():
+    breaker = CircuitBreaker("m", failure_threshold=1, open_seconds=0)
+    breaker.record_failure(RuntimeError("boom"))
+    release = threading.Event()
+    probes = []
+
+    def prober(model):
+        probes.append(model)
+        release.wait(2)
+        return True
+
+    assert breaker.allow(prober) is False         # 探針在背景執行，請求不等待
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow(prober) is False         # 半開期間不重複啟動探針
+    release.set()
+    _wait_until_probed(breaker)
+    assert breaker.state == CLOSED and probes == ["m"]
+    assert breaker.allow(prober) is True
+
+
+def test_half_open_probe_failure_reopens():
+    breaker = CircuitBreaker("m", failure_threshold=1, open_seconds=0)
+    breaker.record_failure(RuntimeError("boom"))
+
+    def prober(model):
+        raise ConnectionError("ollama down")
+
+    assert breaker.allow(prober) is False
+    _wait_until_probed(breaker)
+    assert breaker.state == OPEN
+    assert "ollama down" in breaker.stats()["last_error"]
+    breaker.open_seconds = 60                     # 重新計時：斷路時間未到前不再探測
+    assert breaker.allow(prober) is False and breaker.state == OPEN
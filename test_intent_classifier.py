@@ -0,0 +1,100 @@
+import json
+import tempfile
+from pathlib import Path
+
+from Central_Bridge.modules.intent_classifier import (
+    NaiveBayesIntentModel, IntentClassifier, FEATURE_VERSION, _features
+)
+
+SAMPLES = [
+    ("台北天氣如何", "SEARCH"), ("明天會下雨嗎", "SEARCH"), ("今天的新聞", "SEARCH"),
+    ("台積電股價多少", "SEARCH"), ("高雄天氣預報", "SEARCH"), ("最新科技新聞", "SEARCH"),
+    ("寫一個 python 腳本", "COMPLEX"), ("幫我寫程式爬網站", "COMPLEX"), ("建立一個 flask 專案", "COMPLEX"),
+    ("寫個 python 爬蟲", "COMPLEX"), ("幫我實作排序程式", "COMPLEX"), ("重構這個專案的程式", "COMPLEX"),
+    ("你好", "SIMPLE"), ("早安", "SIMPLE"), ("你是誰", "SIMPLE"), ("講個笑話", "SIMPLE"),
+]
+
+
+def test_features_fold_traditional_and_simplified():
+    assert _features("台北天氣如何？") == _features("台北天气如何")
+    assert _features("ＡＢ") == {"a": 1, "b": 1, "ab": 1}
+
+
+def test_model_predicts_trained_intents():
+    model = NaiveBayesIntentModel().fit(SAMPLES)
+    assert model.predict("台中天氣")[0] == "SEARCH"
+    assert model.predict("寫一個 python 程式")[0] == "COMPLEX"
+    proba = model.predict_proba("台中天氣")
+    assert set(proba) == {"SEARCH", "COMPLEX", "SIMPLE"}
+    assert abs(sum(proba.values()) - 1.0) < 1e-9
+
+
+def test_model_round_trips_through_dict():
+    model = NaiveBayesIntentModel().fit(SAMPLES)
+    data = json.loads(json.dumps(model.to_dict(), ensure_ascii=False))
+    restored = NaiveBayesIntentModel.from_dict(data)
+    for text in ("台中天氣", "寫程式", "你好"):
+        assert restored.predict_proba(text) == model.predict_proba(text)
+
+
+def _classifier(tmp: Path, threshold: float = 0.6) -> IntentClassifier:
+    return IntentClassifier(enabled=True, threshold=threshold, min_samples=5,
+                            model_path=tmp / "intent_model.json", labels_path=tmp / "intent_labels.jsonl",
+                            audit_path=tmp / "audit_log.jsonl")
+
+
+def test_classifier_untrained_defers_to_llm():
+    with tempfile.TemporaryDirectory() as tmp:
+        clf = _classifier(Path(tmp))
+        assert clf.predict("台北天氣如何") is None
+        assert clf.train()["trained"] is False          # 樣本不足時維持 LLM 路由
+
+
+def test_classifier_trains_from_labels_and_audit_log():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        clf = _classifier(tmp)
+        with open(tmp / "audit_log.jsonl", "w", encoding="utf-8") as f:
+            f.write(json.dumps({"query": "台北天氣如何", "intent": "COMPLEX"}, ensure_ascii=False) + "\n")
+            f.write("not json\n")
+        for query, intent in SAMPLES:
+            clf.record_label(query, intent)
+        clf.record_label("沒有這個標籤", "UNKNOWN")        # 不在 INTENT_TAGS 的標籤不記錄
+
+        samples = dict(clf._load_samples())
+        assert len(samples) == len(SAMPLES)
+        assert samples["台北天氣如何"] == "SEARCH"        # 同一提問以最後一筆 (LLM 標籤) 為準
+
+        report = clf.train()
+        assert report["trained"] is True and report["samples"] == len(SAMPLES)
+        assert (tmp / "intent_model.json").exists()
+
+        label, confidence = clf.predict("台中天氣預報")
+        assert label == "SEARCH" and confidence >= clf.threshold
+        assert clf.predict("你好") is None               # SIMPLE 的回答仍需 LLM 產生
+
+        reloaded = _classifier(tmp)
+        assert reloaded.predict("台中天氣預報") == (label, confidence)
+
+
+def test_classifier_threshold_defers_low_confidence():
+    with tempfile.TemporaryDirectory() as tmp:
+        clf = _classifier(Path(tmp), threshold=1.01)
+        for query, intent in SAMPLES:
+            clf.record_label(query, intent)
+        clf.train()
+        assert clf.predict("台中天氣預報") is None
+        assert clf.stats()["fallbacks"] == 1
+
+
+def test_classifier_skips_model_with_old_feature_version():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        data = NaiveBayesIntentModel().fit(SAMPLES).to_dict()
+        assert data["features"] == FEATURE_VERSION
+        data["features"] = FEATURE_VERSION - 1
+        with open(tmp / "intent_model.json", "w", encoding="utf-8") as f:
+            json.dump({"model": data, "report": {}}, f, ensure_ascii=False)
+        clf = _classifier(tmp)
+        assert clf.predict("台中天氣預報") is None
+        assert clf.stats()["trained"] is False
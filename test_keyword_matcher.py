@@ -0,0 +1,64 @@
+from Central_Bridge.modules.keyword_matcher import KeywordMatcher
+
+
+def test_overlapping_keywords():
+    matcher = KeywordMatcher()
+    matcher.register("g", ["he", "she", "his", "hers"])
+    assert matcher.match("ushers") == {"g": {"he", "she", "hers"}}
+
+
+def test_failure_link_outputs():
+    matcher = KeywordMatcher()
+    matcher.register("g", ["abcd", "bc"])
+    # 走到 "abc" 後在 "e" 失配；"bc" 需經 failure link 合併輸出才會被找到
+    assert matcher.match("abce") == {"g": {"bc"}}
+    assert matcher.match("xabcd") == {"g": {"abcd", "bc"}}
+
+
+def test_chinese_keywords_across_groups():
+    matcher = KeywordMatcher()
+    matcher.register("search", ["天氣", "天氣預報", "新聞"])
+    matcher.register("write", ["修改", "edit"])
+    assert matcher.match("明天天氣預報") == {"search": {"天氣", "天氣預報"}}
+    assert matcher.match("幫我修改今天的新聞稿") == {"search": {"新聞"}, "write": {"修改"}}
+    assert matcher.match("沒有任何關鍵字") == {}
+    assert matcher.match("") == {}
+
+
+def test_case_sensitive_like_substring():
+    matcher = KeywordMatcher()
+    matcher.register("write", ["edit"])
+    assert matcher.match("EDIT this") == {}
+    assert matcher.match("EDIT this".lower()) == {"write": {"edit"}}
+
+
+def test_groups_filter_limits_hits_and_scans():
+    matcher = KeywordMatcher()
+    matcher.register("a", ["foo"])
+    matcher.register("b", ["bar"])
+    assert matcher.match("foobar", groups=("b",)) == {"b": {"bar"}}
+    stats = matcher.stats()
+    assert stats["a"]["scans"] == 0 and stats["b"]["scans"] == 1
+    assert stats["a"]["hits"] == {"foo": 0}
+
+
+def test_register_rebuilds_and_unregister_removes():
+    matcher = KeywordMatcher()
+    matcher.register("g", ["old"])
+    assert matcher.match("old new") == {"g": {"old"}}
+    matcher.register("g", ["new", "", "new"])     # 覆寫：空字串與重複項目略過
+    assert matcher.keywords("g") == ("new",)
+    assert matcher.match("old new") == {"g": {"new"}}
+    matcher.unregister("g")
+    assert matcher.match("old new") == {}
+    assert "g" not in matcher.stats()
+
+
+def test_stats_reports_never_hit():
+    matcher = KeywordMatcher()
+    matcher.register("g", ["天氣", "股價"])
+    matcher.match("天氣如何")
+    matcher.match("明天天氣")
+    stats = matcher.stats()["g"]
+    assert stats["hits"] == {"天氣": 2, "股價": 0}
+    assert stats["never_hit"] == ["股價"]
@@ -0,0 +1,93 @@
+from Central_Bridge.modules.llm_scheduler import LLMScheduler, _Ticket
+from Central_Bridge.modules.model_residency import ModelResidency
+
+
+def _enqueue(sched, priority, model="m", agent_id=None):
+    ticket = _Ticket(next(sched._seq), priority, agent_id, model)
+    sched._waiting.append(ticket)
+    return ticket
+
+
+def test_pick_prefers_higher_priority():
+    sched = LLMScheduler(max_concurrency=2, residency=None)
+    _enqueue(sched, "background")
+    _enqueue(sched, "brain")
+    interactive = _enqueue(sched, "interactive")
+    assert sched._pick() is interactive
+
+
+def test_pick_keeps_reserved_slot_for_interactive():
+    sched = LLMScheduler(max_concurrency=2, interactive_reserved=1, residency=None)
+    sched._running = 1
+    brain = _enqueue(sched, "brain")
+    assert sched._pick() is None                  # 最後一個名額保留給 interactive
+    interactive = _enqueue(sched, "interactive")
+    assert sched._pick() is interactive
+    sched._running = 0
+    sched._waiting.remove(interactive)
+    assert sched._pick() is brain
+
+
+def test_pick_respects_model_limit():
+    sched = LLMScheduler(max_concurrency=2, model_limits={"big": 1}, residency=None)
+    sched._running_by_model["big"] = 1
+    _enqueue(sched, "interactive", "big")
+    small = _enqueue(sched, "interactive", "small")
+    assert sched._pick() is small
+
+
+def test_pick_round_robins_agents_within_priority():
+    sched = LLMScheduler(max_concurrency=2, residency=None)
+    sched._last_grant[("brain", "agent1")] = 5
+    _enqueue(sched, "brain", agent_id="agent1")
+    agent2 = _enqueue(sched, "brain", agent_id="agent2")
+    assert sched._pick() is agent2
+
+
+def test_slot_releases_on_exit():
+    sched = LLMScheduler(max_concurrency=2, residency=None)
+    with sched.slot("m", priority="brain", agent_id="agent1"):
+        assert sched.stats()["running"] == 1
+    assert sched.stats()["running"] == 0
+    assert sched.stats()["queue_time"]["brain"]["count"] == 1
+
+
+def _resident(*models):
+    residency = ModelResidency(capacity=max(1, len(models)), default_keep_alive=600)
+    for model in models:
+        residency.note_request(model)
+    return residency
+
+
+def test_pick_prefers_resident_model_for_non_interactive():
+    sched = LLMScheduler(max_concurrency=2, residency=_resident("small"))
+    _enqueue(sched, "brain", "big")
+    small = _enqueue(sched, "brain", "small")
+    assert sched._pick() is small
+
+
+def test_pick_does_not_reorder_interactive_by_residency():
+    sched = LLMScheduler(max_concurrency=2, residency=_resident("small"))
+    big = _enqueue(sched, "interactive", "big")
+    _enqueue(sched, "interactive", "small")
+    assert sched._pick() is big
+
+
+def test_pick_caps_resident_streak():
+    sched = LLMScheduler(max_concurrency=2, residency=_resident("small"), max_batch=2)
+    sched._streak_model, sched._streak = "small", 2
+    big = _enqueue(sched, "brain", "big")
+    _enqueue(sched, "brain", "small")
+    assert sched._pick() is big
+
+
+def test_residency_counts_swaps():
+    residency = ModelResidency(capacity=1, default_keep_alive=600, keep_alive={"fallback": 0})
+    for model in ("intent", "intent", "cerebellum", "intent"):
+        residency.note_request(model)
+    stats = residency.stats()
+    assert stats["resident"] == ["intent"]
+    assert (stats["requests"], stats["swaps"]) == (4, 2)
+    assert stats["evictions"] == {"intent": 1, "cerebellum": 1}
+    residency.note_request("fallback")             # keep_alive=0：用完立即卸載
+    assert not residency.is_resident("fallback")
@@ -0,0 +1,21 @@
+import json
+
+import pytest
+
+from Central_Bridge.modules.metrics import RouteMetrics
+
+
+def test_false_hit_counts_known_path(tmp_path):
+    metrics = RouteMetrics(false_hits_path=tmp_path / "false_hits.jsonl")
+    metrics.report_false_hit("semantic_cache", query="q", answer="a")
+    assert metrics.snapshot()["paths"]["semantic_cache"]["false_hits"] == 1
+    entry = json.loads((tmp_path / "false_hits.jsonl").read_text(encoding="utf-8"))
+    assert entry["path"] == "semantic_cache"
+
+
+def test_false_hit_rejects_unknown_path(tmp_path):
+    metrics = RouteMetrics(false_hits_path=tmp_path / "false_hits.jsonl")
+    with pytest.raises(ValueError):
+        metrics.report_false_hit('<img src=x onerror=alert(1)>')
+    assert metrics.snapshot()["paths"] == {}                 # 不會產生新的 Prometheus 標籤
+    assert not (tmp_path / "false_hits.jsonl").exists()
@@ -0,0 +1,62 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from Central_Bridge.modules import semantic_cache
+from Central_Bridge.modules.answer_store import AnswerStore
+from Central_Bridge.modules.semantic_cache import SemanticAnswerCache
+from Central_Bridge.modules.text_normalize import normalize_query
+
+
+class _Encoder:
+    """以字元碼產生的正規化向量代替 Embedding 模型，並記錄編碼過的提問"""
+    is_ready = True
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts):
+        self.encoded += texts
+        out = np.zeros((len(texts), 32), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for ch in text:
+                out[row, ord(ch) % 32] += 1.0
+        return out / np.linalg.norm(out, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    encoder = _Encoder()
+    monkeypatch.setattr(semantic_cache, "VM", encoder)
+    store = AnswerStore(tmp_path / "answers.db", max_entries=100, legacy_json=None)
+    cache = SemanticAnswerCache(store=store, threshold=0.99, entity_guard=False,
+                                calibration_path=tmp_path / "calibration.json")
+    return cache, store, encoder
+
+
+def test_new_entries_encode_only_themselves(cache):
+    cache, store, encoder = cache
+    store.put("台北天氣如何", "晴天", ttl=600)
+    assert cache.lookup("台北天氣如何") == "晴天"
+    buffer = cache._buffer
+    store.put("今天匯率多少", "31.5", ttl=600)
+    assert cache.lookup("今天匯率多少") == "31.5"
+    # 既有記錄不重新編碼 (每個提問只在建索引與查詢時各編碼一次)，新列直接寫進同一塊緩衝
+    first, second = normalize_query("台北天氣如何"), normalize_query("今天匯率多少")
+    assert encoder.encoded == [first, first, second, second]
+    assert cache._buffer is buffer and cache.stats()["indexed"] == 2
+
+
+def test_removed_entries_become_tombstones_then_compact(cache):
+    cache, store, _ = cache
+    for i in range(8):
+        store.put(f"問題{i}號", f"答案{i}", ttl=600)
+    cache.lookup("問題0號")
+    store.put("問題0號", "新答案", ttl=600)          # 覆寫：舊 id 變成墓碑
+    assert cache.lookup("問題0號") == "新答案"
+    assert cache.stats()["tombstones"] == 1 and cache.stats()["entries"] == 8
+    store.clear()
+    store.put("問題9號", "答案9", ttl=600)
+    assert cache.lookup("問題9號") == "答案9"
+    stats = cache.stats()
+    assert stats["compactions"] == 1 and stats["tombstones"] == 0 and stats["indexed"] == 1
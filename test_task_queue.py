@@ -0,0 +1,93 @@
+import queue
+
+from Central_Bridge.modules.task_queue import BrainTaskQueue
+
+
+def _drain(q):
+    """連續取出 (不呼叫 task_done)，直到沒有可執行的任務"""
+    names = []
+    while True:
+        try:
+            names.append(q.get(block=False)["id"])
+        except queue.Empty:
+            return names
+
+
+def test_weighted_fair_queuing_interleaves_agents():
+    q = BrainTaskQueue(agent_limit=10, weights={"a": 2})
+    for i in range(6):
+        q.put({"id": f"a{i}", "agent_id": "a"})
+    for i in range(3):
+        q.put({"id": f"b{i}", "agent_id": "b"})
+    # a 的權重為 2：每服務 b 一次就服務 a 兩次，b 不必等 a 的六個任務全部跑完
+    assert [name[0] for name in _drain(q)] == ["a", "b", "a", "a", "b", "a", "a", "b", "a"]
+
+
+def test_idle_agent_does_not_bank_credit():
+    q = BrainTaskQueue(agent_limit=10, weights={})
+    for i in range(4):
+        q.put({"id": f"a{i}", "agent_id": "a"})
+    assert _drain(q) == ["a0", "a1", "a2", "a3"]
+    # b 回來時從目前的虛擬時鐘起算：只先服務一次就與 a 輪流，不會連續插隊
+    for i in range(2):
+        q.put({"id": f"a{i + 4}", "agent_id": "a"})
+        q.put({"id": f"b{i}", "agent_id": "b"})
+    assert [name[0] for name in _drain(q)] == ["b", "a", "b", "a"]
+
+
+def test_agent_concurrency_limit():
+    q = BrainTaskQueue(agent_limit=1, agent_limits={"b": 2}, weights={})
+    for name, agent in (("a0", "a"), ("a1", "a"), ("b0", "b"), ("b1", "b")):
+        q.put({"id": name, "agent_id": agent})
+    first = q.get(block=False)
+    assert first["id"] == "a0"
+    assert _drain(q) == ["b0", "b1"]           # a 已達上限；b 個別放寬為 2
+    q.task_done(first)
+    assert q.get(block=False)["id"] == "a1"
+
+
+def test_exclusive_key_blocks_same_resource():
+    q = BrainTaskQueue(exclusive_key=lambda t: t.get("workspace"), agent_limit=10, weights={})
+    q.put({"id": "write-1", "agent_id": "a", "workspace": "/ws/a"})
+    q.put({"id": "write-2", "agent_id": "b", "workspace": "/ws/a"})
+    q.put({"id": "write-3", "agent_id": "c", "workspace": "/ws/c"})
+    first = q.get(block=False)
+    assert _drain(q) == ["write-3"]              # 同一工作區的寫入任務不會同時執行
+    assert q.stats()["exclusive_held"] == ["/ws/a", "/ws/c"]
+    q.task_done(first)
+    assert q.get(block=False)["id"] == "write-2"
+
+
+def test_get_timeout_raises_empty():
+    q = BrainTaskQueue(agent_limit=1, weights={})
+    try:
+        q.get(timeout=0.01)
+    except queue.Empty:
+        return
+    assert False, "空佇列逾時應拋出 queue.Empty"
+
+
+def test_priority_within_agent():
+    q = BrainTaskQueue(agent_limit=10, weights={}, aging_seconds=0)
+    for name, priority in (("low", "low"), ("high", "high"), ("medium", "medium"), ("unknown", "urgent")):
+        q.put({"id": name, "agent_id": "a", "priority": priority})
+    assert _drain(q) == ["high", "medium", "unknown", "low"]   # 未知優先級視為 medium
+
+
+def test_aging_promotes_waiting_task():
+    q = BrainTaskQueue(agent_limit=10, weights={}, aging_seconds=10)
+    q.put({"id": "old-low", "agent_id": "a", "priority": "low"})
+    q._waiting[0].enqueued_at -= 25              # 等待 25 秒 → 提升兩級，與 high 同級
+    q.put({"id": "new-high", "agent_id": "a", "priority": "high"})
+    assert _drain(q) == ["old-low", "new-high"]
+    assert q.stats()["served_after_aging"] == 1
+
+
+def test_snapshot_projects_order():
+    q = BrainTaskQueue(agent_limit=10, weights={}, aging_seconds=0)
+    q.put({"id": "a0", "agent_id": "a", "priority": "low"})
+    q.put({"id": "a1", "agent_id": "a", "priority": "high"})
+    q.put({"id": "b0", "agent_id": "b"})
+    snap = q.snapshot()
+    assert [(w["id"], w["position"]) for w in snap["waiting"]] == [("a1", 1), ("b0", 2), ("a0", 3)]
+    assert q.qsize() == 3                         # snapshot 只是模擬，不會取出任務
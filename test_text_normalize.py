@@ -0,0 +1,50 @@
+from Central_Bridge.modules.text_normalize import normalize_query
+
+
+def test_normalize_width_and_case():
+    assert normalize_query("ＡＰＩ") == "api"
+    assert normalize_query("Hello, World!") == "hello world"
+
+
+def test_normalize_strips_punctuation_and_cjk_spaces():
+    assert normalize_query("早安！") == normalize_query("早安") == "早安"
+    assert normalize_query("  你 好  ") == "你好"
+    assert normalize_query("台北 weather 如何？") == "台北weather如何"
+
+
+def test_normalize_folds_traditional_to_simplified():
+    assert normalize_query("這個") == normalize_query("这个")
+    assert normalize_query("台北天氣") == normalize_query("台北天气")
+
+
+def test_normalize_chinese_numerals():
+    assert normalize_query("三天") == "3天"
+    assert normalize_query("十二點") == "12点"
+    assert normalize_query("二〇二六年") == "2026年"
+    assert normalize_query("一萬五千") == "15000"
+    assert normalize_query("等一下") == "等一下"     # 單獨的「一」多為非數量用法，保留
+    assert normalize_query("三") == "3"
+    assert normalize_query("第二") == "第2"
+    assert normalize_query("星期三") == "星期3"
+
+
+def test_normalize_keeps_numeral_idioms():
+    assert normalize_query("千万别忘了") == "千万别忘了"
+    assert normalize_query("十分好吃") == "十分好吃"
+    assert normalize_query("万一下雨") == "万一下雨"
+    assert normalize_query("三心二意") == "三心二意"
+    assert normalize_query("千万元") == "10000000元"
+    assert normalize_query("十分钟") == "10分钟"
+    assert normalize_query("三点十分") == "3点10分"
+    assert normalize_query("考了九十分") == "考了90分"
+
+
+def test_normalize_keeps_separators_between_digits():
+    assert normalize_query("3.5 版") == "3.5版"
+    assert normalize_query("12:30") == "12:30"
+    assert normalize_query("end.") == "end"
+
+
+def test_normalize_empty():
+    assert normalize_query("") == ""
+    assert normalize_query("！？") == ""
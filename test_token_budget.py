@@ -0,0 +1,70 @@
+from Central_Bridge.modules.token_budget import TokenBudget, estimate_tokens
+
+
+def _budget(**kwargs):
+    kwargs.setdefault("enabled", True)
+    return TokenBudget(buckets=(4096, 1024, 2048), margin=64, **kwargs)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("你好") == 2           # CJK 每字 1 token
+    assert estimate_tokens("abcd") == 1          # 其餘每 4 字元 1 token
+    assert estimate_tokens("abcde") == 2         # 無條件進位，寧可多估
+    assert estimate_tokens("你好abcd") == 3
+
+
+def test_fit_shrinks_short_prompt():
+    budget = _budget()
+    assert budget.fit("hi", num_ctx=4096, num_predict=80) == 1024
+    assert budget.stats()["shrunk"] == 1
+
+
+def test_fit_picks_smallest_sufficient_bucket():
+    budget = _budget()
+    # 1000 (CJK) + 256 + 64 = 1320 → 2048
+    assert budget.fit("字" * 1000, num_ctx=2048, num_predict=256) == 2048
+    # 剛好等於級距時不升級：960 + 0 + 64 = 1024
+    assert budget.fit("字" * 960, num_ctx=1024, num_predict=0) == 1024
+    stats = budget.stats()
+    assert (stats["calls"], stats["shrunk"], stats["grown"]) == (2, 0, 0)
+
+
+def test_fit_grows_instead_of_truncating():
+    budget = _budget()
+    assert budget.fit("字" * 1500, num_ctx=1024, num_predict=256) == 2048
+    assert budget.stats()["grown"] == 1
+    assert budget.stats()["truncated"] == 0
+
+
+def test_fit_records_truncation_beyond_largest_bucket():
+    budget = _budget()
+    assert budget.fit("字" * 5000, num_ctx=2048, num_predict=100) == 4096
+    stats = budget.stats()
+    assert stats["truncated"] == 1
+    assert stats["truncated_tokens"] == 5000 + 100 + 64 - 4096
+
+
+def test_fit_disabled_returns_requested():
+    budget = _budget(enabled=False)
+    assert budget.fit("字" * 5000, num_ctx=2048, num_predict=100) == 2048
+    assert budget.stats()["calls"] == 0
+
+
+def test_fit_sticks_to_largest_bucket_per_model():
+    budget = _budget(sticky_decay=60)
+    assert budget.fit("字" * 1500, num_ctx=2048, num_predict=256, model="m") == 2048
+    # 短 Prompt 沿用同一模型已用過的級距，num_ctx 不變就不會觸發 Ollama 重新載入 runner
+    assert budget.fit("hi", num_ctx=1024, num_predict=80, model="m") == 2048
+    assert budget.fit("hi", num_ctx=1024, num_predict=80, model="other") == 1024
+    assert budget.fit("hi", num_ctx=1024, num_predict=80) == 1024
+    assert budget.stats()["sticky_num_ctx"] == {"m": 2048, "other": 1024}
+
+
+def test_fit_sticky_bucket_decays_one_level_when_idle():
+    budget = _budget(sticky_decay=60)
+    budget.fit("字" * 3000, num_ctx=4096, num_predict=256, model="m")
+    budget._sticky["m"][1] -= 61                  # 60 秒沒有 Prompt 需要 4096
+    assert budget.fit("hi", num_ctx=1024, num_predict=80, model="m") == 2048
+    assert budget.fit("hi", num_ctx=1024, num_predict=80, model="m") == 2048   # 剛降級，重新計時
+    assert budget.stats()["sticky_decays"] == 1
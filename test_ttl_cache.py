@@ -0,0 +1,34 @@
+from Central_Bridge.modules.ttl_cache import TTLCache
+
+
+def test_hits_normalized_key():
+    cache = TTLCache(max_entries=10, ttl=60)
+    cache.set("早安！", "morning")
+    assert cache.get("早安") == "morning"
+    assert cache.get("晚安") is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+
+def test_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1                    # a 變成最近使用
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evicted"] == 1
+
+
+def test_expires_entries():
+    cache = TTLCache(max_entries=10, ttl=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0 and cache.stats()["expired"] == 1
+
+
+def test_custom_normalize():
+    cache = TTLCache(max_entries=10, ttl=60, normalize=str)
+    cache.set("早安！", "morning")
+    assert cache.get("早安") is None
+    assert cache.get("早安！") == "morning"